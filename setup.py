@@ -33,9 +33,14 @@ class build_ext_subclass(build_ext):
                     if has_flag(self.compiler, c):
                         extra_compile_args.append(c)
 
+        openmp = has_flag(self.compiler, '-fopenmp')
         for e in self.extensions:
             #e.extra_compile_args += extra_compile_args
             e.include_dirs.extend([get_include()])
+            if openmp and e.name == 'shenfun.optimization.cython.la':
+                # Threaded line solves, see config['optimization']['threads']
+                e.extra_compile_args.append('-fopenmp')
+                e.extra_link_args.append('-fopenmp')
         build_ext.build_extensions(self)
 
 def get_extensions():
@@ -49,10 +49,20 @@ from .coordinates import Coordinates
 from .fourier import energy_fourier
 from .io import *
 from .matrixbase import *
-from .spectralbase import inner_product, MixedFunctionSpace, BoundaryConditions, Domain
+from .spectralbase import inner_product, MixedFunctionSpace, BoundaryConditions, Domain, \
+    import_fftw_wisdom, export_fftw_wisdom, clear_fftw_plans
 from .forms import *
 from .tensorproductspace import *
 from .utilities import *
 from .utilities.lagrangian_particles import *
 from .utilities.integrators import *
 comm = MPI.COMM_WORLD
+
+if config['fftw']['wisdom']['import']:
+    try:
+        import_fftw_wisdom()
+    except AssertionError: # No wisdom stored yet
+        pass
+if config['fftw']['wisdom']['export']:
+    import atexit
+    atexit.register(export_fftw_wisdom)
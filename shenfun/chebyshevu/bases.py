@@ -9,7 +9,8 @@ import sympy as sp
 from scipy.special import eval_chebyu
 from mpi4py_fft import fftw
 from shenfun.spectralbase import SpectralBase, Transform, FuncWrap, \
-    islicedict, slicedict, getCompositeBase, getBCGeneric, BoundaryConditions, Domain
+    islicedict, slicedict, getCompositeBase, getBCGeneric, BoundaryConditions, Domain, \
+    get_fftw_plans
 from shenfun.matrixbase import SparseMatrix
 from shenfun.config import config
 from shenfun.jacobi.recursions import half, un, n
@@ -315,13 +316,9 @@ class Orthogonal(JacobiBase):
                  fftw.flag_dict[opts['overwrite_input']])
         threads = opts['threads']
 
-        U = fftw.aligned(shape, dtype=float)
-
-        xfftn_fwd = plan_fwd(U, axes=(axis,), threads=threads, flags=flags)
-        V = xfftn_fwd.output_array
-        xfftn_bck = plan_bck(V, axes=(axis,), threads=threads, flags=flags, output_array=U)
-        V.fill(0)
-        U.fill(0)
+        xfftn_fwd, xfftn_bck = get_fftw_plans(plan_fwd, plan_bck, shape, float, (axis,),
+                                              threads, flags, flags)
+        U, V = xfftn_fwd.input_array, xfftn_fwd.output_array
 
         if np.dtype(dtype) is np.dtype('complex'):
             # dct only works on real data, so need to wrap it
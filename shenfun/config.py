@@ -11,8 +11,13 @@ config = {
     {
         'mode': 'cython',
         'verbose': False,
+        'threads': 1,
     },
     'basisvectors': 'normal',
+    'evaluate':
+    {
+        'blocksize': 4096
+    },
     'transforms':
     {
         'kind':
@@ -25,6 +30,18 @@ config = {
             'hermite': 'vandermonde',
             'laguerre': 'vandermonde',
             'jacobi': 'recursive'
+        },
+        'batched': False,
+        'blocked':
+        {
+            'memory': 2**22 # bytes used for each Vandermonde panel
+        },
+        'autotune':
+        {
+            'use': False,
+            'kinds': ['fast', 'recursive', 'vandermonde', 'blocked'],
+            'repeat': 3,
+            'filename': '~/.shenfun/transforms.yaml'
         }
     },
     'matrix':
@@ -35,13 +52,45 @@ config = {
             'permc_spec': 'COLAMD',
             'solve': 'csc',
             'diags': 'csc',
-            'matvec': 'csr'
+            'matvec': 'csr',
+            'share_lu': False
         },
         'block':
         {
             'assemble': 'csc',
             'use_scipy': True,
             'permc_spec': 'COLAMD',
+        },
+        'krylov':
+        {
+            'rtol': 1e-12,
+            'atol': 0,
+            'maxiter': None,
+            'restart': None
+        },
+        'cache':
+        {
+            'use': False,
+            'directory': '~/.shenfun/matrices'
+        }
+    },
+    'io':
+    {
+        'asynchronous':
+        {
+            'buffers': 2,
+            'chunks': None,
+            'compression': None
+        },
+        'checkpoint':
+        {
+            'checksum': True
+        },
+        'spectral':
+        {
+            'reltol': 1e-12,
+            'abstol': 1e-15,
+            'tol': None
         }
     },
     'bases':
@@ -88,6 +137,17 @@ config = {
         {
             'threads': 1,
             'planner_effort': 'FFTW_MEASURE'
+        },
+        'djt':
+        {
+            'threads': 1,
+            'planner_effort': 'FFTW_MEASURE'
+        },
+        'registry': False,
+        'wisdom':
+        {
+            'import': '',
+            'export': ''
         }
     }
 }
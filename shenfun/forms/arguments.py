@@ -1548,7 +1548,7 @@ class Function(ShenfunBaseArray, BasisFunction):
     def __call__(self, x, output_array=None):
         return self.eval(x, output_array=output_array)
 
-    def eval(self, x, output_array=None):
+    def eval(self, x, output_array=None, method=None):
         """Evaluate Function at points `x`
 
         Parameters
@@ -1556,6 +1556,9 @@ class Function(ShenfunBaseArray, BasisFunction):
         x : float or array of floats
         output_array : array, optional
             Return array, function values at points
+        method : int, optional
+            Implementation used by multidimensional spaces, see
+            :meth:`.TensorProductSpace.eval`
 
         Examples
         --------
@@ -1573,6 +1576,8 @@ class Function(ShenfunBaseArray, BasisFunction):
         >>> u0 = u.eval(points).real
         >>> assert np.allclose(u0, ul(*points))
         """
+        if method is not None:
+            return self.function_space().eval(x, self, output_array, method=method)
         return self.function_space().eval(x, self, output_array)
 
     def backward(self, output_array=None, kind=None, mesh=None, padding_factor=None):
@@ -1588,6 +1593,7 @@ class Function(ShenfunBaseArray, BasisFunction):
             - 'fast'
             - 'recursive'
             - 'vandermonde'
+            - 'blocked'
             For example kind={'chebyshev': 'vandermonde'}
             Note that for one-dimensional problems one can use just the string
             value and no dict
@@ -1731,13 +1737,21 @@ class Function(ShenfunBaseArray, BasisFunction):
         u_hat = self.refine(N, output_array=u_hat)
         return u_hat
 
-    def refine(self, N, output_array=None):
+    def refine(self, N, output_array=None, direct=True):
         """Return self with new number of quadrature points
 
         Parameters
         ----------
         N : number or sequence of numbers
             The new number of quadrature points
+        output_array : :class:`.Function`, optional
+            Return array. May be distributed differently than self
+            if direct is True
+        direct : bool, optional
+            If True, then move all coefficients directly to the rank that
+            owns them in output_array, using at most one global
+            Alltoallv. If False, then pad or truncate one axis at the time,
+            with global redistributions in between.
 
         Note
         ----
@@ -1769,7 +1783,7 @@ class Function(ShenfunBaseArray, BasisFunction):
             if output_array is None:
                 output_array = [None]*len(self)
             for i, array in enumerate(self):
-                output_array[i] = array.refine(N, output_array=output_array[i])
+                output_array[i] = array.refine(N, output_array=output_array[i], direct=direct)
             if isinstance(output_array, list):
                 T = output_array[0].function_space()
                 VT = VectorSpace(T)
@@ -1777,6 +1791,11 @@ class Function(ShenfunBaseArray, BasisFunction):
                 output_array = Function(VT, buffer=output_array)
             return output_array
 
+        if direct:
+            if output_array is None:
+                output_array = Function(space.get_refined(N))
+            return self._refine_direct(output_array)
+
         axes = [bx for ax in space.axes for bx in ax]
         base = space.bases[axes[0]]
         global_shape = list(self.global_shape) # Global shape in spectral space
@@ -1825,6 +1844,87 @@ class Function(ShenfunBaseArray, BasisFunction):
             output_array[:] = c1
         return output_array
 
+    def _refine_direct(self, output_array):
+        """Pad or truncate self into output_array with one Alltoallv
+
+        Padding and truncation are separable, and along each axis given by
+        two real matrices A and B, acting on the real and imaginary parts
+        of the coefficients. Each rank applies the matrices to its own
+        coefficients, restricted to the rows owned by the receiving rank.
+        All ranks know the distribution of both arrays, so the receivers
+        know the rows of each block and no indices are communicated.
+        """
+        from mpi4py import MPI
+        space = self.function_space()
+        newspace = output_array.function_space()
+        comm = space.comm if isinstance(space.comm, MPI.Comm) else newspace.comm
+        if not isinstance(comm, MPI.Comm):
+            comm = MPI.COMM_WORLD
+        rank, size = comm.Get_rank(), comm.Get_size()
+        AB = [_get_refine_matrices(base0, base1, n0, n1) for base0, base1, n0, n1 in
+              zip(space.bases, newspace.bases, self.global_shape, output_array.global_shape)]
+        nz = [abs(A)+abs(B) for A, B in AB]
+        s0 = comm.allgather([(s.start, s.stop) for s in space.local_slice(True)])
+        s1 = comm.allgather([(s.start, s.stop) for s in newspace.local_slice(True)])
+
+        def rows(p, q):
+            # Global rows of output owned by q that receive from p
+            r = []
+            for M, (p0, p1), (q0, q1) in zip(nz, s0[p], s1[q]):
+                sub = M[q0:q1, p0:p1]
+                r.append(np.flatnonzero(np.diff(sub.indptr))+q0)
+            return r
+
+        def matvec(m, v, axis):
+            if np.all(np.diff(m.indptr) == 1) and np.all(m.data == 1):
+                return np.take(v, m.indices, axis=axis) # Only copy
+            v = np.moveaxis(v, axis, 0)
+            shape = v.shape
+            v = m @ v.reshape((shape[0], -1))
+            return np.moveaxis(v.reshape((m.shape[0],)+shape[1:]), 0, axis)
+
+        u = np.asarray(self)
+        sendblocks = []
+        for q in range(size):
+            r = rows(rank, q)
+            if min([len(ri) for ri in r]) == 0:
+                sendblocks.append(np.zeros(0, dtype=self.dtype))
+                continue
+            v = u
+            for axis, (A, B) in enumerate(AB):
+                p0, p1 = s0[rank][axis]
+                a = A[r[axis]][:, p0:p1]
+                if np.iscomplexobj(v) and (A != B).nnz > 0:
+                    b = B[r[axis]][:, p0:p1]
+                    v = matvec(a, v.real, axis) + 1j*matvec(b, v.imag, axis)
+                else:
+                    v = matvec(a, v, axis)
+            sendblocks.append(v.ravel())
+        recvrows = [rows(p, rank) for p in range(size)]
+        recvcounts = [int(np.prod([len(ri) for ri in r])) for r in recvrows]
+        sendcounts = [len(b) for b in sendblocks]
+        nonlocal_data = sum(sendcounts)-sendcounts[rank]
+        if comm.allreduce(nonlocal_data, op=MPI.SUM) == 0:
+            recvblocks = [None]*size
+            recvblocks[rank] = sendblocks[rank]
+        else:
+            sendbuf = np.concatenate(sendblocks).astype(self.dtype)
+            recvbuf = np.zeros(sum(recvcounts), dtype=self.dtype)
+            sdispls = np.cumsum([0]+sendcounts[:-1])
+            rdispls = np.cumsum([0]+recvcounts[:-1])
+            comm.Alltoallv([sendbuf, (sendcounts, sdispls)],
+                           [recvbuf, (recvcounts, rdispls)])
+            recvblocks = [recvbuf[d:d+c] for d, c in zip(rdispls, recvcounts)]
+
+        output_array.fill(0)
+        start = [q0 for q0, q1 in s1[rank]]
+        for r, block, count in zip(recvrows, recvblocks, recvcounts):
+            if count == 0:
+                continue
+            ix = np.ix_(*[ri-st for ri, st in zip(r, start)])
+            output_array[ix] += block.reshape([len(ri) for ri in r])
+        return output_array
+
     def copy_to_flattened(self, f=None, j=(), dims=None, sl=None):
         """Copy dofs of self to a flattened array
 
@@ -1887,6 +1987,45 @@ class Function(ShenfunBaseArray, BasisFunction):
         return self
 
 
+def _get_refine_matrices(base0, base1, n0, n1):
+    """Return matrices for padding or truncating along one axis
+
+    Parameters
+    ----------
+    base0, base1 : :class:`.SpectralBase`
+        The bases before and after padding or truncation
+    n0, n1 : int
+        The number of coefficients along the axis before and after
+
+    Returns
+    -------
+    2-tuple of scipy sparse csr matrices
+        Matrices of shape (n1, n0) acting on the real and imaginary parts
+        of the coefficients, respectively
+    """
+    import scipy.sparse
+    # Probe with unit vectors stacked along another axis
+    axis = base0.axis
+    other = (axis+1) % base0.dimensions
+    shape0 = [1]*base0.dimensions
+    shape1 = [1]*base0.dimensions
+    shape0[axis] = shape1[other] = shape0[other] = n0
+    shape1[axis] = n1
+    fun = base0._padding_backward if n0 <= n1 else base1._truncation_forward
+    u0 = np.zeros(shape0, dtype=complex)
+    u1 = np.zeros(shape1, dtype=complex)
+    mats = []
+    for val in (1, 1j):
+        u0[...] = np.reshape(val*np.eye(n0), shape0)
+        fun(u0, u1)
+        if n0 > n1 and base1.bc: # Keep boundary condition dofs
+            sl = base1.get_bc_space().slice()
+            sb = base1.sl[slice(-(sl.stop-sl.start), None)]
+            u1[sb] = u0[sb]
+        M = (np.moveaxis(u1, (axis, other), (0, 1)).reshape((n1, n0))/val).real
+        mats.append(scipy.sparse.csr_matrix(M))
+    return tuple(mats)
+
 class Array(ShenfunBaseArray):
     r"""
     Numpy array for :class:`.TensorProductSpace`
@@ -101,6 +101,8 @@ def inner(expr0, expr1, output_array=None, assemble=None, kind=None, fixed_resol
         - 'fast' - Use FFT (only Fourier and Chebyshev first and second kind)
         - 'recursive' - Low-memory implementation (only for Jacobi polynomials)
         - 'vandermonde' - Use Vandermonde matrix
+        - 'blocked' - Use panels of Vandermonde matrix, computed by recursion
+          (only for Jacobi polynomials)
 
         E.g., kind={'chebyshev': 'recursive'}.
         Note that for one-dimensional problems it is enough to use just the
@@ -352,7 +354,6 @@ def inner(expr0, expr1, output_array=None, assemble=None, kind=None, fixed_resol
     if output_array is None and trial.argument == 2:
         output_array = Function(test.function_space())
 
-    orthogonal = None
     if trial.argument > 1:
         # Linear form
         assert isinstance(test, (Expr, BasisFunction))
@@ -506,8 +507,6 @@ def inner(expr0, expr1, output_array=None, assemble=None, kind=None, fixed_resol
             wh = b.matvec(uh, wh)
         output_array += wh
         wh.fill(0)
-    if orthogonal:
-        orthogonal.destroy(destroy_subcomm=False)
     return output_array
 
 work = CachedArrayDict()
@@ -528,6 +527,12 @@ class Inner:
     This is an optimization only for linear forms, not bilinear.
     There is no need to use this class for regular scalar products, where `uh`
     is simply an Array.
+
+    All the matrices are fused into as few operators as possible on the
+    first call. Diagonal matrices are summed into one scale array, and
+    matrices along the same axis, with the same scale, are summed into one
+    matrix. The result of each operator is accumulated directly into the
+    output array.
     """
     def __init__(self, v, uh):
         from shenfun.matrixbase import get_simplified_tpmatrices
@@ -542,32 +547,92 @@ class Inner:
             A = [A]
         self.A = [A]
         self.output_array = Function(v.function_space())
+        self._fused = None
 
     def __call__(self):
+        if self._fused is None:
+            self._fused = self._fuse()
         wh = work[(self.output_array, 0, True)]
         self.output_array.fill(0)
-        for uh, A in zip(self.uh, self.A):
+        for op, i, gi, *args in self._fused:
+            uh = self.uh[i]
+            uh = uh.base if uh.base is not None else uh
+            if op == 'scalar':
+                V = args[0].function_space()
+                wh = V.scalar_product(uh, wh)
+                self.output_array += wh
+                continue
+            u = uh.v[gi[1]] if uh.function_space().is_composite_space else uh
+            if gi[0] is None:
+                out, w = self.output_array, wh
+            else:
+                out, w = self.output_array.v[gi[0]], wh[gi[0]]
+            if op == 'diag':
+                out += args[0]*u
+            elif op == 'axis':
+                mat, axis, scale = args
+                w = mat.matvec(u, w, axis=axis)
+                if scale is not None:
+                    w *= scale
+                out += w
+            else:
+                w = args[0].matvec(u, w)
+                out += w
+        return self.output_array
+
+    def _fuse(self):
+        """Return list of fused operators for all matrices in self.A"""
+        ops = []
+        groups = {}
+        for i, (uh, A) in enumerate(zip(self.uh, self.A)):
             uh = uh.base if uh.base is not None else uh
             for b in A:
                 if isinstance(b, Function) and isinstance(uh, Array):
-                    V = b.function_space()
-                    wh = V.scalar_product(uh, wh)
-                    self.output_array += wh
-                elif uh.function_space().is_composite_space and wh.ndim == b.dimensions:
-                    wh = b.matvec(uh.v[b.global_index[1]], wh)
-                    self.output_array += wh
-                elif uh.function_space().is_composite_space and wh.ndim > b.dimensions:
-                    wh[b.global_index[0]] = b.matvec(uh.v[b.global_index[1]], wh[b.global_index[0]])
-                    self.output_array.v[b.global_index[0]] += wh[b.global_index[0]]
+                    ops.append(('scalar', i, None, b))
+                    continue
+                gi = (None, None)
+                if uh.function_space().is_composite_space:
+                    gi = (b.global_index[0] if self.output_array.ndim > b.dimensions else None,
+                          b.global_index[1])
+                if not isinstance(b, TPMatrix): # 1D
+                    groups.setdefault(('axis', i, gi, 0), []).append((b, 1))
+                    continue
+                b = b.get_simplified()
+                if len(b.naxes) == 0:
+                    groups.setdefault(('diag', i, gi), []).append(b.scale)
+                elif len(b.naxes) == 1:
+                    groups.setdefault(('axis', i, gi, b.naxes[0]), []).append((b.pmat, b.scale))
                 else:
-                    wh = b.matvec(uh, wh)
-                    self.output_array += wh
-                wh.fill(0)
-        return self.output_array
+                    ops.append(('tpmat', i, gi, b))
+
+        for key, terms in groups.items():
+            if key[0] == 'diag':
+                ops.append(key+(sum(terms[1:], start=terms[0]),))
+                continue
+            # Sum matrices with the same scale
+            clusters = []
+            for mat, scale in terms:
+                if np.size(scale) == 1:
+                    scale = np.squeeze(scale).item()
+                    mat, scale = (mat if scale == 1 else mat*scale), None
+                for cluster in clusters:
+                    s0 = cluster[1]
+                    if (scale is None and s0 is None) or (
+                            scale is not None and s0 is not None and
+                            np.shape(scale) == np.shape(s0) and np.array_equal(scale, s0)):
+                        cluster[0].append(mat)
+                        break
+                else:
+                    clusters.append(([mat], scale))
+            for mats, scale in clusters:
+                mat = mats[0] if len(mats) == 1 else sum(mats[1:], start=mats[0])
+                ops.append(key[:3]+(mat, key[3], scale))
+        return ops
 
     def __add__(self, c):
         assert isinstance(c, Inner)
         assert c.output_array.function_space() == self.output_array.function_space()
         self.A += c.A
         self.uh += c.uh
+        self._fused = None
         return self
@@ -39,7 +39,8 @@ where :math:`\overline{v}` is the complex conjugate of :math:`v`, and
 import sympy as sp
 import numpy as np
 from mpi4py_fft import fftw
-from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict, Domain
+from shenfun.spectralbase import SpectralBase, Transform, islicedict, slicedict, Domain, \
+    get_fftw_plans
 from shenfun.optimization import cython
 from shenfun.config import config
 
@@ -246,9 +247,7 @@ class FourierBase(SpectralBase):
         flags = (fftw.flag_dict[opts['planner_effort']],
                  fftw.flag_dict[opts['overwrite_input']])
 
-        U = fftw.aligned(shape, dtype=dtype)
-        xfftn_fwd = plan_fwd(U, s=s, axes=axis, threads=threads, flags=flags)
-        V = xfftn_fwd.output_array
+        flags_fwd = flags
 
         opts = plan_bck.opts
         opts['overwrite_input'] = 'FFTW_DESTROY_INPUT'
@@ -259,9 +258,9 @@ class FourierBase(SpectralBase):
         if np.issubdtype(dtype, np.floating):
             flags = (fftw.flag_dict[opts['planner_effort']],)
 
-        xfftn_bck = plan_bck(V, s=s, axes=axis, threads=threads, flags=flags, output_array=U)
-        V.fill(0)
-        U.fill(0)
+        xfftn_fwd, xfftn_bck = get_fftw_plans(plan_fwd, plan_bck, shape, dtype, axis,
+                                              threads, flags_fwd, flags, s=s)
+        U, V = xfftn_fwd.input_array, xfftn_fwd.output_array
         self._M = xfftn_fwd.get_normalization()
 
         if self.padding_factor > 1.+1e-8:
@@ -1,15 +1,21 @@
 import sys
 import os
+import zlib
 import numpy as np
 from mpi4py import MPI
 from mpi4py_fft.io import NCFile, HDF5File
 from .generate_xdmf import generate_xdmf
+from .async_file import AsyncFile
+from .spectral_file import SpectralFile
+from shenfun.config import config
 
-__all__ = ['HDF5File', 'NCFile', 'ShenfunFile', 'Checkpoint', 'generate_xdmf']
+__all__ = ['HDF5File', 'NCFile', 'ShenfunFile', 'Checkpoint', 'generate_xdmf',
+           'AsyncFile', 'SpectralFile']
 
 comm = MPI.COMM_WORLD
 
-def ShenfunFile(name, T, backend='hdf5', mode='r', mesh='quadrature', **kw):
+def ShenfunFile(name, T, backend='hdf5', mode='r', mesh='quadrature',
+                asynchronous=False, **kw):
     """Return a file handler
 
     Parameters
@@ -21,18 +27,32 @@ def ShenfunFile(name, T, backend='hdf5', mode='r', mesh='quadrature', **kw):
         :class:`.CompositeSpace` or
         :class:`.VectorSpace`.
     backend : str, optional
-        ``hdf5`` or ``netcdf4``. Default is ``hdf5``.
+        ``hdf5``, ``netcdf4`` or ``spectral``. Default is ``hdf5``. Use
+        ``spectral`` to store only the significant coefficients of arrays
+        in spectral space, see :class:`.SpectralFile`.
     mode : str, optional
         ``r`` or ``w``. Default is ``r``.
     mesh : str, optional
         - 'quadrature' - use quadrature mesh of self
         - 'uniform' - use uniform mesh for non-periodic bases
+    asynchronous : bool, optional
+        Whether to write snapshots asynchronously, using a background thread
+        and staging buffers. See :class:`.AsyncFile`. Only for mode ``w``
+        or ``a``.
 
     Returns
     -------
     Class instance
-        Instance of either :class:`.HDF5File` or :class:`.NCFile`
+        Instance of either :class:`.HDF5File`, :class:`.NCFile`,
+        :class:`.AsyncFile` or :class:`.SpectralFile`
     """
+    if backend.lower() == 'spectral':
+        return SpectralFile(name+'.h5', T, mode=mode, **kw)
+    if asynchronous:
+        assert mode in ('w', 'a')
+        ext = '.h5' if backend.lower() == 'hdf5' else '.nc'
+        return AsyncFile(name+ext, domain=[np.squeeze(d) for d in T.mesh(kind=mesh)],
+                         backend=backend, mode=mode, **kw)
     if backend.lower() == 'hdf5':
         return HDF5File(name+'.h5', domain=[np.squeeze(d) for d in T.mesh(kind=mesh)], mode=mode, **kw)
     assert kw.get('forward_output', False) is False, "NetCDF4 cannot store complex arrays, use HDF5"
@@ -57,56 +77,160 @@ class Checkpoint:
     The current timestep is 0, previous is 1 and so on if more is needed by the
     integrator. Note that checkpoint is storing results from spectral space.
 
+    Parameters
+    ----------
+    filename : str
+        Name of checkpoint file, without ending
+    checkevery : int, optional
+        Store checkpoint every checkevery timestep
+    data : dict, optional
+        The data to store, see above
+    checksum : bool or None, optional
+        Whether to store and verify checksums of all datasets. Using
+        ``config['io']['checkpoint']['checksum']`` if None.
+
+    Note
+    ----
+    Two generations of the checkpoint are kept, the newest in
+    ``filename.chk.h5`` and the previous in ``filename.old.chk.h5``. A new
+    checkpoint is written into the file of the previous generation, which is
+    marked as invalid until all data are written, and the two files are then
+    swapped by renaming. Hence there is always one complete checkpoint on
+    disk, and no file is ever copied. With checksums, datasets that have not
+    changed since the previous generation in the same file are not rewritten.
+
+    The checksums are computed for each local array and can only be verified
+    when restarting on the same number of processors.
+
     """
-    def __init__(self, filename, checkevery=10, data={}):
+    def __init__(self, filename, checkevery=10, data={}, checksum=None):
         self.f = None
         self.filename = filename
         self.data = data
         self.checkevery = checkevery
+        self.checksum = config['io']['checkpoint']['checksum'] if checksum is None else checksum
 
-    def open(self, mode='r+'):
+    def get_generations(self):
+        """Return list of (generation, filename) of valid checkpoint files
+
+        The list is sorted with the newest generation first.
+        """
+        import h5py
+        gens = []
+        for name in (self.filename+'.chk.h5', self.filename+'.old.chk.h5',
+                     self.filename+'.tmp.chk.h5'):
+            if not os.path.exists(name):
+                continue
+            try:
+                with h5py.File(name, 'r', driver="mpio", comm=comm) as f:
+                    if f.attrs.get('valid', True) and 'tstep' in f.attrs:
+                        gens.append((int(f.attrs.get('generation', 0)), name))
+            except OSError:
+                continue
+        return sorted(gens, reverse=True)
+
+    def open(self, mode='r+', filename=None):
+        """Open checkpoint file
+
+        Parameters
+        ----------
+        mode : str, optional
+            Open file in this mode. Default is 'r+'.
+        filename : str or None, optional
+            Name of file to open. Using the newest valid generation if None.
+        """
         import h5py
-        self.f = h5py.File(self.filename+'.chk.h5', mode, driver="mpio", comm=comm)
+        if filename is None:
+            gens = self.get_generations()
+            filename = gens[0][1] if len(gens) > 0 else self.filename+'.chk.h5'
+        self.f = h5py.File(filename, mode, driver="mpio", comm=comm)
 
     def close(self):
         if self.f:
             self.f.close()
 
     def update(self, t, tstep):
-        if self.f is None:
-            self.open(mode='w')
-            self.f.attrs.create('tstep', 0)
-            self.f.attrs.create('t', 0.0)
-            self.close()
-
         kill = self.check_if_kill()
         if tstep % self.checkevery == 0 or kill:
-            if comm.Get_rank() == 0: # for safety
-                os.system(f'cp {self.filename}.chk.h5 {self.filename}.old.chk.h5')
-            self.open()
+            gens = self.get_generations()
+            newest = self.filename+'.chk.h5'
+            target = self.filename+'.old.chk.h5'
+            generation = gens[0][0]+1 if len(gens) > 0 else 0
+            try:
+                self.open('r+', filename=target)
+            except OSError:
+                self.open('w', filename=target)
+            self.f.attrs['valid'] = False
+            self.f.flush()
             for key, val in self.data.items():
                 self.write(int(key), val)
             self.f.attrs['tstep'] = tstep
             self.f.attrs['t'] = t
+            self.f.attrs['generation'] = generation
+            self.f.attrs['valid'] = True
             self.close()
+            comm.Barrier()
+            if comm.Get_rank() == 0:
+                tmp = self.filename+'.tmp.chk.h5'
+                if os.path.exists(newest):
+                    os.replace(newest, tmp)
+                os.replace(target, newest)
+                if os.path.exists(tmp):
+                    os.replace(tmp, target)
+            comm.Barrier()
             if kill:
                 sys.exit(1)
 
+    @staticmethod
+    def _checksum(u):
+        """Return checksums of the local arrays of all processors"""
+        crc = zlib.crc32(np.ascontiguousarray(u).view(np.uint8))
+        return np.array(comm.allgather(crc), dtype=np.uint32)
+
     def write(self, step, d):
         for name, val in d.items():
             self.f.require_group(name)
             for u in val:
                 s = u.local_slice()
-                self.f[name].require_dataset(str(step), shape=u.global_shape, dtype=u.dtype)
-                self.f["/".join((name, str(step)))][s] = u
+                dset = self.f[name].require_dataset(str(step), shape=u.global_shape, dtype=u.dtype)
+                if self.checksum:
+                    crc = self._checksum(u)
+                    if np.array_equal(dset.attrs.get('checksum', []), crc):
+                        continue
+                    dset.attrs['checksum'] = crc
+                elif 'checksum' in dset.attrs:
+                    del dset.attrs['checksum']
+                dset[s] = u
 
     def read(self, u, name, **kw):
+        """Read ``name`` into ``u`` from the newest valid generation
+
+        Generations with datasets that do not match their stored checksums
+        are skipped.
+
+        Parameters
+        ----------
+        u : :class:`.Function`
+            The array to read into
+        name : str
+            Name of dataset
+        step : int, optional
+            The timestep stored, see :class:`.Checkpoint`
+        """
         step = kw.get('step', 0)
-        self.open()
-        s = u.local_slice()
         dset = "/".join((name, str(step)))
-        u[:] = self.f[dset][s]
-        self.close()
+        gens = self.get_generations()
+        for _, filename in gens:
+            self.open('r', filename=filename)
+            s = u.local_slice()
+            u[:] = self.f[dset][s]
+            crc = self.f[dset].attrs.get('checksum')
+            self.close()
+            if crc is None or len(crc) != comm.Get_size() or np.array_equal(crc, self._checksum(u)):
+                return
+            if comm.Get_rank() == 0:
+                print('Checksum mismatch for %s in %s' %(dset, filename))
+        raise RuntimeError('No valid checkpoint found for %s' %(self.filename))
 
     @staticmethod
     def check_if_kill():
@@ -0,0 +1,253 @@
+"""
+Module for asynchronous writing of distributed arrays to file
+
+"""
+import atexit
+import queue
+import threading
+import numpy as np
+from mpi4py import MPI
+from mpi4py_fft.io import HDF5File, NCFile
+from shenfun.config import config
+
+__all__ = ['AsyncFile']
+
+comm = MPI.COMM_WORLD
+
+
+class _AsyncHDF5File(HDF5File):
+    """HDF5 file opened on a private communicator
+
+    Datasets are created with the chunking and compression set in
+    ``dataset_kw``.
+    """
+    def __init__(self, h5name, domain=None, mode='a', comm=None, dataset_kw=None, **kw):
+        HDF5File.__init__(self, h5name, domain=domain, mode=mode, **kw)
+        self.comm = comm
+        self.dataset_kw = {} if dataset_kw is None else dataset_kw
+
+    def open(self, mode='r+'):
+        import h5py
+        self.f = h5py.File(self.filename, mode, driver="mpio", comm=self.comm)
+
+    def _write_group(self, name, u, step, **kw):
+        s = u.local_slice()
+        group = "/".join((name, "{}D".format(u.dimensions)))
+        self.f.require_group(group)
+        self.f[group].require_dataset(str(step), shape=u.global_shape,
+                                      dtype=u.dtype, **self.dataset_kw)
+        dset = self.f["/".join((group, str(step)))]
+        if dset.compression is not None and hasattr(dset, 'collective'):
+            # Filtered datasets must be written collectively
+            with dset.collective:
+                dset[s] = u
+        else:
+            dset[s] = u
+
+
+class _AsyncNCFile(NCFile):
+    """NetCDF4 file opened on a private communicator"""
+    def __init__(self, ncname, domain=None, mode='a', comm=None, dataset_kw=None, **kw):
+        NCFile.__init__(self, ncname, domain=domain, mode=mode, **kw)
+        self.comm = comm
+
+    def open(self, mode='r+'):
+        from netCDF4 import Dataset
+        self.f = Dataset(self.filename, mode=mode, parallel=True, comm=self.comm)
+
+
+class AsyncFile:
+    """Asynchronous, buffered file writer for distributed arrays
+
+    The local parts of the arrays are copied to one of a fixed number of
+    staging buffers, and the collective write to file is performed by a
+    background thread while the simulation continues. A call to
+    :meth:`write` blocks only if all staging buffers are still waiting to
+    be written (back-pressure). All pending snapshots are written before
+    :meth:`read`, :meth:`flush` and :meth:`close` return, and the file is
+    closed automatically at exit.
+
+    Parameters
+    ----------
+    filename : str
+        Name of file, with ending
+    domain : sequence
+        The mesh or domain of the stored data, see :class:`.HDF5File`
+    backend : str, optional
+        ``hdf5`` or ``netcdf4``. Default is ``hdf5``.
+    mode : str, optional
+        ``w`` or ``a``. Default is ``w``.
+    buffers : int or None, optional
+        Number of staging buffers. Using
+        ``config['io']['asynchronous']['buffers']`` if None.
+    chunks : None, True or tuple of ints, optional
+        Chunk shape for HDF5 datasets. Using
+        ``config['io']['asynchronous']['chunks']`` if None.
+    compression : None or str, optional
+        Compression filter for HDF5 datasets, e.g., 'gzip'. Using
+        ``config['io']['asynchronous']['compression']`` if None.
+    kw : dict, optional
+        Additional keyword arguments used when creating the file
+
+    Note
+    ----
+    The background thread requires MPI to be initialized with
+    ``MPI.THREAD_MULTIPLE``, which is the default for mpi4py. Otherwise the
+    snapshots are written synchronously.
+
+    Writing compressed datasets in parallel requires HDF5 >= 1.10.2.
+
+    Example
+    -------
+    >>> from shenfun import FunctionSpace, TensorProductSpace, Array, comm, ShenfunFile
+    >>> T = TensorProductSpace(comm, (FunctionSpace(8, 'C'), FunctionSpace(8, 'F', dtype='d')))
+    >>> u = Array(T, val=1)
+    >>> f = ShenfunFile('async_u', T, mode='w', asynchronous=True)
+    >>> for tstep in range(4):
+    ...     u += 1
+    ...     f.write(tstep, {'u': [u]})
+    >>> f.close()
+
+    """
+    def __init__(self, filename, domain=None, backend='hdf5', mode='w',
+                 buffers=None, chunks=None, compression=None, **kw):
+        conf = config['io']['asynchronous']
+        buffers = conf['buffers'] if buffers is None else buffers
+        chunks = conf['chunks'] if chunks is None else chunks
+        compression = conf['compression'] if compression is None else compression
+        assert buffers > 0
+        self.comm = comm.Dup()
+        dataset_kw = {}
+        if chunks is not None:
+            dataset_kw['chunks'] = tuple(chunks) if isinstance(chunks, (list, tuple)) else chunks
+        if compression is not None:
+            dataset_kw['compression'] = compression
+        fileclass = _AsyncHDF5File if backend.lower() == 'hdf5' else _AsyncNCFile
+        self.file = fileclass(filename, domain=domain, mode=mode, comm=self.comm,
+                              dataset_kw=dataset_kw, **kw)
+        self._free = queue.Queue()
+        for _ in range(buffers):
+            self._free.put({})
+        self._jobs = queue.Queue()
+        self._error = None
+        self._thread = None
+        if MPI.Query_thread() == MPI.THREAD_MULTIPLE:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def filename(self):
+        return self.file.filename
+
+    @staticmethod
+    def backend():
+        return 'async'
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                return
+            self._write(*job)
+            self._jobs.task_done()
+
+    def _write(self, step, fields, buf, kw):
+        try:
+            if self._error is None:
+                self.file.write(step, fields, **kw)
+        except Exception as e: # pylint: disable=broad-except
+            self._error = e
+        finally:
+            self._free.put(buf)
+
+    @staticmethod
+    def _stage(buf, fields):
+        """Return copy of `fields` using arrays in staging buffer `buf`"""
+        staged = {}
+        for group, list_of_fields in fields.items():
+            assert isinstance(list_of_fields, (tuple, list))
+            staged[group] = []
+            for i, field in enumerate(list_of_fields):
+                u = field[0] if isinstance(field, (tuple, list)) else field
+                v = buf.get((group, i))
+                if (type(v) is not type(u) or v.shape != u.shape or v.dtype != u.dtype
+                        or getattr(v, '_space', None) is not getattr(u, '_space', None)):
+                    v = buf[(group, i)] = u.copy()
+                else:
+                    np.copyto(v, u)
+                staged[group].append((v, field[1]) if isinstance(field, (tuple, list)) else v)
+        return staged
+
+    def _check_error(self):
+        if self._error is not None:
+            e, self._error = self._error, None
+            raise RuntimeError('Asynchronous write to %s failed' %(self.filename)) from e
+
+    def write(self, step, fields, **kw):
+        """Stage snapshot ``step`` of ``fields`` for writing to file
+
+        Parameters
+        ----------
+        step : int
+            Index of snapshot.
+        fields : dict
+            The fields to be dumped to file. (key, value) pairs are group name
+            and either arrays or 2-tuples, respectively. The arrays are complete
+            arrays to be stored, whereas 2-tuples are arrays with associated
+            *global* slices.
+        as_scalar : boolean, optional
+            Whether to store rank > 0 arrays as scalars. Default is False.
+
+        Note
+        ----
+        The arrays in ``fields`` may be modified as soon as this method
+        returns.
+        """
+        self._check_error()
+        buf = self._free.get()
+        staged = self._stage(buf, fields)
+        if self._thread is None:
+            self._write(step, staged, buf, kw)
+            self._check_error()
+        else:
+            self._jobs.put((step, staged, buf, kw))
+
+    def flush(self):
+        """Wait until all staged snapshots have been written to file"""
+        if self._thread is not None:
+            self._jobs.join()
+        self._check_error()
+
+    def read(self, u, name, **kw):
+        """Read field ``name`` into distributed array ``u``
+
+        Parameters
+        ----------
+        u : array
+            The :class:`.DistArray` to read into.
+        name : str
+            Name of field to be read.
+        step : int, optional
+            Index of field to be read. Default is 0.
+        """
+        self.flush()
+        self.file.read(u, name, **kw)
+
+    def close(self):
+        """Write all staged snapshots and stop the background thread"""
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+            self._thread = None
+        atexit.unregister(self.close)
+        if not self.comm == MPI.COMM_NULL:
+            self.comm.Free()
+        self._check_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
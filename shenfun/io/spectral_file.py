@@ -0,0 +1,346 @@
+"""
+Module for storing distributed arrays compactly in spectral space
+"""
+import json
+import importlib
+import itertools
+import numpy as np
+import sympy as sp
+from mpi4py import MPI
+from shenfun.config import config
+
+__all__ = ['SpectralFile']
+
+comm = MPI.COMM_WORLD
+
+
+class SpectralFile:
+    r"""Class for compressed storage of spectral coefficients in HDF5 format
+
+    Only the significant coefficients of a :class:`.Function` are stored.
+    Along each axis the stored coefficients are the union of two contiguous
+    blocks of global indices, :math:`[0, m)` and :math:`[N-n, N)`. For
+    complex Fourier axes these are the lowest positive and negative
+    wavenumbers, and for all other axes the second block is reserved for
+    boundary degrees of freedom. A coefficient :math:`\hat{u}_k` is
+    considered insignificant if
+
+    .. math::
+
+        |\hat{u}_k| < \max(reltol \cdot \max_j |\hat{u}_j|, abstol)
+
+    for all indices along the remaining axes, using the same criterion as
+    :meth:`.SpectralBase.count_trailing_zeros`.
+
+    The coefficients may also be quantized to integers with a spacing
+    :math:`tol \cdot \max_j |\hat{u}_j|`. Quantization is lossy, but
+    bounded by the given tolerance.
+
+    The file also holds the metadata required to recreate the
+    :class:`.TensorProductSpace`, see :meth:`get_space`, and the stored
+    arrays can be read back lazily, in parallel, and for any subset of the
+    stored modes, see :meth:`read`.
+
+    Parameters
+    ----------
+    filename : str
+        Name of hdf5 file, with ending
+    T : :class:`.TensorProductSpace` or :class:`.VectorSpace`, optional
+        The space of the stored data. If None, then the space is recreated
+        from the file when needed.
+    mode : str, optional
+        ``r``, ``w`` or ``a`` for read, write or append. Default is ``r``.
+    reltol, abstol : None or numbers, optional
+        Tolerances for insignificant coefficients. Using
+        ``config['io']['spectral']`` if None. Use zero for both to drop only
+        coefficients that are exactly zero.
+    tol : None or number, optional
+        Relative tolerance used for quantization. No quantization if None.
+        Using ``config['io']['spectral']['tol']`` if None.
+
+    Example
+    -------
+    >>> import sympy as sp
+    >>> from shenfun import FunctionSpace, TensorProductSpace, Function, comm
+    >>> from shenfun.io import SpectralFile
+    >>> x, y = sp.symbols('x,y', real=True)
+    >>> T = TensorProductSpace(comm, (FunctionSpace(16, 'C', bc=(0, 0)),
+    ...                               FunctionSpace(16, 'F', dtype='d')))
+    >>> u = Function(T, buffer=(1-x**2)*sp.cos(y))
+    >>> f = SpectralFile('spectral_u.h5', T, mode='w')
+    >>> f.write(0, {'u': u})
+    >>> u0 = Function(f.get_space('u'))
+    >>> f.read(u0, 'u', step=0)
+
+    """
+    def __init__(self, filename, T=None, mode='r', reltol=None, abstol=None,
+                 tol=None):
+        conf = config['io']['spectral']
+        self.filename = filename
+        self.T = T
+        self.reltol = conf['reltol'] if reltol is None else reltol
+        self.abstol = conf['abstol'] if abstol is None else abstol
+        self.tol = conf['tol'] if tol is None else tol
+        self.f = None
+        self.open(mode)
+        self.close()
+
+    @staticmethod
+    def backend():
+        return 'spectral'
+
+    def open(self, mode='r+'):
+        import h5py
+        self.f = h5py.File(self.filename, mode, driver="mpio", comm=comm)
+
+    def close(self):
+        if self.f:
+            self.f.close()
+        self.f = None
+
+    @staticmethod
+    def _get_bases(space):
+        T = space.flatten()[0] if hasattr(space, 'flatten') else space
+        return T.bases
+
+    @staticmethod
+    def _is_complex_fourier(base):
+        return base.family() == 'fourier' and np.dtype(base.dtype).char in 'FDG'
+
+    @staticmethod
+    def _get_metadata(space):
+        """Return json string with all that is needed to recreate `space`"""
+        bases = []
+        for base in SpectralFile._get_bases(space):
+            d = {'family': base.family(),
+                 'basis': base.__class__.__name__,
+                 'N': int(base.N),
+                 'domain': [str(x) for x in base.domain],
+                 'dtype': np.dtype(base.dtype).char}
+            if base.family() != 'fourier':
+                d['quad'] = base.quad
+            if getattr(base, 'bcs', None) is not None:
+                d['bc'] = str(dict(base.bcs))
+            if hasattr(base, '_scaled'):
+                d['scaled'] = bool(base._scaled)
+            for key in ('alpha', 'beta'):
+                if hasattr(base, key):
+                    d[key] = str(object.__getattribute__(base, key))
+            bases.append(d)
+        rank = getattr(space, 'rank', 0)
+        return json.dumps({'bases': bases, 'rank': rank})
+
+    def get_space(self, name, comm=comm, **kw):
+        """Return space of array `name`, recreated from stored metadata
+
+        Parameters
+        ----------
+        name : str
+            Name of stored array
+        comm : MPI communicator, optional
+            The communicator used for the new space
+        kw : dict, optional
+            Additional keyword arguments to :class:`.TensorProductSpace`
+
+        Returns
+        -------
+        :class:`.TensorProductSpace` or :class:`.VectorSpace`
+        """
+        from shenfun.tensorproductspace import TensorProductSpace, VectorSpace
+        from shenfun.spectralbase import Domain
+        self.open('r')
+        meta = json.loads(self.f[name].attrs['space'])
+        self.close()
+        bases = []
+        for d in meta['bases']:
+            mod = importlib.import_module('shenfun.%s.bases' %(d['family']))
+            par = {'domain': Domain(*[sp.sympify(x) for x in d['domain']])}
+            if d['family'] != 'fourier':
+                par['quad'] = d['quad']
+                par['dtype'] = d['dtype']
+            if 'bc' in d:
+                par['bc'] = sp.sympify(d['bc'])
+            if 'scaled' in d:
+                par['scaled'] = d['scaled']
+            for key in ('alpha', 'beta'):
+                if key in d:
+                    par[key] = sp.sympify(d[key])
+            bases.append(getattr(mod, d['basis'])(d['N'], **par))
+        T = TensorProductSpace(comm, bases, **kw)
+        if meta['rank'] == 1:
+            return VectorSpace(T)
+        assert meta['rank'] == 0
+        return T
+
+    def _get_extent(self, u, bases):
+        """Return number of leading and trailing significant coefficients"""
+        rank = u.rank
+        s = u.local_slice()[rank:]
+        a = abs(np.asarray(u))
+        if a.size == 0:
+            a = np.zeros(a.shape[rank:])
+        elif rank > 0:
+            a = a.max(axis=tuple(range(rank)))
+        extent = []
+        for axis, base in enumerate(bases):
+            N = u.global_shape[rank+axis]
+            profile = np.zeros(N)
+            if a.size > 0:
+                others = tuple(i for i in range(a.ndim) if i != axis)
+                profile[s[axis]] = a.max(axis=others)
+            comm.Allreduce(MPI.IN_PLACE, profile, op=MPI.MAX)
+            sig = ~((profile < self.reltol*profile.max()) | (profile < self.abstol))
+            if self._is_complex_fourier(base):
+                h = N//2+1
+                nz = np.nonzero(sig[:h])[0]
+                m = nz[-1]+1 if len(nz) > 0 else 0
+                nz = np.nonzero(sig[h:])[0]
+                n = N-h-nz[0] if len(nz) > 0 else 0
+            else:
+                stop = base.slice().stop
+                nz = np.nonzero(sig[:stop])[0]
+                m = nz[-1]+1 if len(nz) > 0 else 0
+                n = N-stop
+            extent.append((int(m), int(n)))
+        return extent
+
+    @staticmethod
+    def _get_local_blocks(glob, sl):
+        """Return intersection of global blocks with local slice
+
+        Parameters
+        ----------
+        glob : sequence of 2-tuples
+            Pairs of global slices and slices into the stored dataset
+        sl : slice
+            The local slice of a distributed array
+
+        Returns
+        -------
+        list of 2-tuples
+            Pairs of local slices and slices into the stored dataset
+        """
+        blocks = []
+        for g, d in glob:
+            start = max(g.start, sl.start)
+            stop = min(g.stop, sl.stop)
+            if stop > start:
+                blocks.append((slice(start-sl.start, stop-sl.start),
+                               slice(d.start+start-g.start, d.start+stop-g.start)))
+        return blocks
+
+    def write(self, step, fields):
+        """Write snapshot ``step`` of ``fields`` to file
+
+        Parameters
+        ----------
+        step : int
+            Index of snapshot.
+        fields : dict
+            The fields to be dumped to file. (key, value) pairs are name and
+            :class:`.Function` in spectral space. The value may also be a
+            list containing the one :class:`.Function`.
+        """
+        self.open()
+        for name, u in fields.items():
+            if isinstance(u, (list, tuple)):
+                assert len(u) == 1
+                u = u[0]
+            self._write_step(name, step, u)
+        self.close()
+
+    def _write_step(self, name, step, u):
+        space = u.function_space() if self.T is None else self.T
+        bases = self._get_bases(space)
+        rank = u.rank
+        group = self.f.require_group(name)
+        if 'space' not in group.attrs:
+            group.attrs['space'] = self._get_metadata(space)
+        extent = self._get_extent(u, bases)
+        shape = u.global_shape[:rank] + tuple(m+n for m, n in extent)
+        data = np.asarray(u)
+        quantum = None
+        if self.tol is not None:
+            amax = comm.allreduce(abs(data).max() if data.size > 0 else 0, op=MPI.MAX)
+            quantum = self.tol*amax if amax > 0 else 1
+            dtype = np.int32 if 1/self.tol < np.iinfo(np.int32).max else np.int64
+            if np.iscomplexobj(data):
+                shape += (2,)
+                data = np.stack((data.real, data.imag), axis=-1)
+            data = np.rint(data/quantum).astype(dtype)
+        else:
+            dtype = data.dtype
+        if str(step) in group:
+            del group[str(step)]
+        dset = group.create_dataset(str(step), shape=shape, dtype=dtype)
+        dset.attrs['shape'] = u.global_shape
+        dset.attrs['extent'] = np.array(extent, dtype=int).reshape((-1, 2))
+        dset.attrs['complex'] = np.iscomplexobj(u)
+        if quantum is not None:
+            dset.attrs['quantum'] = quantum
+        s = u.local_slice()
+        blocks = [[(sl, sl)] for sl in s[:rank]]
+        for axis, (m, n) in enumerate(extent):
+            N = u.global_shape[rank+axis]
+            glob = ((slice(0, m), slice(0, m)), (slice(N-n, N), slice(m, m+n)))
+            blocks.append(self._get_local_blocks(glob, s[rank+axis]))
+        for block in itertools.product(*blocks):
+            src, dst = zip(*block)
+            dset[dst] = data[src]
+
+    def read(self, u, name, step=0, modes=None):
+        """Read array ``name`` into :class:`.Function` ``u``
+
+        Only the part of the stored dataset that is needed for the local
+        slice of ``u`` is read from file. All coefficients of ``u`` that are
+        not stored are set to zero.
+
+        Parameters
+        ----------
+        u : :class:`.Function`
+            The array to read into. The space of ``u`` may have a different
+            number of coefficients than the space used for writing, in which
+            case the coefficients are truncated or padded with zeros.
+        name : str
+            Name of array to be read
+        step : int, optional
+            Index of snapshot to be read
+        modes : None or sequence of ints or None, optional
+            Maximum number of modes to read along each axis. For complex
+            Fourier axes this is the maximum absolute wavenumber plus one.
+            Boundary degrees of freedom are always read. None for all.
+        """
+        self.open('r')
+        dset = self.f["/".join((name, str(step)))]
+        extent = dset.attrs['extent']
+        rank = u.rank
+        meta = json.loads(self.f[name].attrs['space'])
+        assert meta['rank'] == rank
+        s = u.local_slice()
+        blocks = [[(sl, sl)] for sl in s[:rank]]
+        for axis, (m, n) in enumerate(extent):
+            M = u.global_shape[rank+axis]
+            base = meta['bases'][axis]
+            mode = M if modes is None or modes[axis] is None else modes[axis]
+            if base['family'] == 'fourier' and base['dtype'] in 'FDG':
+                h = M//2+1
+                p = min(m, h, mode)
+                q = min(n, M-h, max(mode-1, 0))
+            else:
+                assert n == M-self._get_bases(u.function_space())[axis].slice().stop
+                q = n
+                p = min(m, M-q, mode)
+            glob = ((slice(0, p), slice(0, p)), (slice(M-q, M), slice(m+n-q, m+n)))
+            blocks.append(self._get_local_blocks(glob, s[rank+axis]))
+        u[:] = 0
+        quantum = dset.attrs.get('quantum', None)
+        for block in itertools.product(*blocks):
+            dst, src = zip(*block)
+            d = dset[src]
+            if quantum is not None:
+                if dset.attrs['complex']:
+                    d = d[..., 0] + 1j*d[..., 1]
+                d = d*quantum
+            u[dst] = d
+        self.close()
+        return u
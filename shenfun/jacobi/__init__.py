@@ -1,2 +1,3 @@
 from .bases import *
 from .matrices import *
+from .djt import *
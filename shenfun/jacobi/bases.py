@@ -6,6 +6,7 @@ Module for function spaces of generalized Jacobi type
 import numpy as np
 import sympy as sp
 from scipy.special import eval_jacobi, roots_jacobi #, gamma
+from mpi4py_fft import fftw
 from shenfun.config import config
 from shenfun.spectralbase import SpectralBase, getCompositeBase, getBCGeneric, \
     BoundaryConditions, Domain
@@ -39,6 +40,7 @@ class JacobiBase(SpectralBase):
         self.alpha = alpha  # Jacobi parameter
         self.beta = beta    # Jacobi parameter
         self.gn = 1         # Jacobi scaling function
+        self._djt = {}      # Planned fast transforms
 
     @property
     def is_jacobi(self):
@@ -113,6 +115,69 @@ class JacobiBase(SpectralBase):
         self._bc_space = BCGeneric(self.N, bc=self.bcs, domain=self.domain, alpha=self.alpha, beta=self.alpha)
         return self._bc_space
 
+    def has_fast_transform(self):
+        """Return whether the fast transform (kind='fast') is available
+
+        The fast transform requires Jacobi-Gauss quadrature and that the
+        parameters differ from either Chebyshev or Legendre parameters by
+        nonnegative integers. Otherwise the recursive method is used.
+        """
+        from .djt import get_connection_parameter
+        return self.quad in ('JG', 'QG') and get_connection_parameter(self.alpha, self.beta) is not None
+
+    def get_fast_scaling(self, N):
+        """Return scaling of Jacobi polynomials used by fast transforms
+
+        Parameters
+        ----------
+        N : int
+            Number of polynomials
+        """
+        return None
+
+    def get_fast_transform(self, kind, shape):
+        """Return planned :class:`.DJT` of given kind for arrays of shape
+
+        Parameters
+        ----------
+        kind : str
+            Either 'backward' or 'scalar product'
+        shape : tuple of ints
+            Shape of arrays to transform. Transform is along self.axis
+        """
+        from .djt import DJT
+        key = (kind, shape, self.axis)
+        if key not in self._djt:
+            opts = config['fftw']['djt']
+            flags = (fftw.flag_dict[opts['planner_effort']],
+                     fftw.flag_dict['FFTW_PRESERVE_INPUT'])
+            M = shape[self.axis]
+            xj, wj = self.points_and_weights(M)
+            if self.domain_factor() != 1:
+                wj /= float(self.domain_factor())
+            U = np.zeros(shape, dtype=self.forward.output_array.dtype)
+            self._djt[key] = DJT(U, self.alpha, self.beta, axes=(self.axis,),
+                                 threads=opts['threads'], kind=kind, flags=flags,
+                                 points=xj, weights=wj, scaling=self.get_fast_scaling(M))
+        return self._djt[key]
+
+    def _evaluate_expansion_all(self, input_array, output_array, x=None, kind=None):
+        if kind == 'fast' and x is None and self.has_fast_transform():
+            djt = self.get_fast_transform('backward', input_array.shape)
+            djt(input_array, output_array)
+            return
+        kind = 'recursive' if kind == 'fast' else kind
+        SpectralBase._evaluate_expansion_all(self, input_array, output_array, x, kind=kind)
+
+    def _evaluate_scalar_product(self, kind=None):
+        if kind == 'fast' and self.has_fast_transform():
+            input_array = self.scalar_product.input_array
+            djt = self.get_fast_transform('scalar product', input_array.shape)
+            djt(input_array, self.scalar_product.tmp_array)
+            return
+        kind = 'recursive' if kind == 'fast' else kind
+        SpectralBase._evaluate_scalar_product(self, kind=kind)
+
 class Orthogonal(JacobiBase):
     r"""Function space for regular (orthogonal) Jacobi functions
 
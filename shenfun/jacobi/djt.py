@@ -0,0 +1,283 @@
+r"""
+Module for fast discrete Jacobi transforms
+
+The Jacobi series
+
+.. math::
+
+    f(x_j) = \sum_{k=0}^{N-1} \hat{f}_k P^{(\alpha,\beta)}_k(x_j)
+
+is computed in three steps. The Jacobi coefficients are first converted to
+either Chebyshev or Legendre coefficients using a sequence of banded
+(bidiagonal) solves that lower the parameters by one at the time. Legendre
+coefficients are then converted to Chebyshev using the fast multipole
+method of :class:`.Leg2Cheb`. Finally, the Chebyshev series is evaluated
+on the Jacobi-Gauss points using a Taylor expansion around the
+Chebyshev-Gauss points, like in :class:`.DLT`. The scalar product is
+computed as the exact transpose of these operations.
+
+"""
+import numpy as np
+from numpy.polynomial import chebyshev as n_cheb
+from scipy.linalg import solve_banded
+from scipy.special import gammaln, roots_jacobi
+from mpi4py_fft import fftw
+from mpi4py_fft.fftw.utilities import FFTW_MEASURE, FFTW_PRESERVE_INPUT
+from shenfun.legendre.dlt import DCT, DST, Leg2Cheb
+
+__all__ = ['DJT', 'get_connection_parameter']
+
+
+def get_connection_parameter(alpha, beta):
+    r"""Return parameter of the polynomials used for connection
+
+    The Jacobi polynomials :math:`P^{(\alpha,\beta)}_k` can be cheaply
+    connected to :math:`P^{(\gamma,\gamma)}_k` if both :math:`\alpha-\gamma`
+    and :math:`\beta-\gamma` are nonnegative integers. Here we use either
+    Chebyshev (:math:`\gamma=-1/2`) or Legendre (:math:`\gamma=0`).
+
+    Parameters
+    ----------
+    alpha, beta : numbers
+        Parameters of the Jacobi polynomials
+
+    Returns
+    -------
+    number or None
+        The parameter :math:`\gamma`, or None if there is no fast connection
+    """
+    for gamma in (-0.5, 0):
+        da, db = float(alpha)-gamma, float(beta)-gamma
+        if (abs(da-round(da)) < 1e-12 and abs(db-round(db)) < 1e-12
+                and round(da) >= 0 and round(db) >= 0):
+            return gamma
+    return None
+
+class DJT:
+    r"""Discrete Jacobi Transform
+
+    A class for performing fast discrete Jacobi transforms on the
+    Jacobi-Gauss points, both backwards and scalar products.
+
+    Parameters
+    ----------
+    input_array : real or complex array
+    alpha, beta : numbers
+        Parameters of the Jacobi polynomials. Both :math:`\alpha+1/2` and
+        :math:`\beta+1/2`, or both :math:`\alpha` and :math:`\beta`, must
+        be nonnegative integers.
+    axes : integer or 1-tuple of int, optional
+        Axis over which to compute the DJT. Named axes for compatibility.
+    threads : int, optional
+        Number of threads used in computing DJT.
+    kind : str, optional
+        Either one of
+
+            - 'backward'
+            - 'scalar product'
+
+    flags : sequence of ints, optional
+        Flags for planning the FFTW transforms.
+    output_array : real or complex array, optional
+        Array to be used as output array. Must be of correct shape, type,
+        strides and alignment
+    points, weights : arrays, optional
+        The Jacobi-Gauss quadrature points and weights. Computed with
+        :func:`scipy.special.roots_jacobi` if not given.
+    scaling : array, optional
+        Scale the Jacobi polynomials, i.e., use basis
+        :math:`\{g_k P^{(\alpha,\beta)}_k\}_{k=0}^{N-1}`
+
+    Note
+    ----
+    The connection from Jacobi to Chebyshev coefficients requires a
+    sequence of :math:`\alpha+\beta+1` or :math:`\alpha+\beta` bidiagonal
+    solves, so the transform is best suited for moderate parameters.
+
+    Like :class:`.DLT`, this transform is slower than the recursive
+    version for small :math:`N`.
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> from shenfun import FunctionSpace, Function, Array
+    >>> J = FunctionSpace(8, 'J', alpha=1, beta=2)
+    >>> u = Function(J)
+    >>> u[:] = 1
+    >>> c = J.backward(u, kind='fast').copy()
+    >>> np.allclose(c, J.backward(u, kind='recursive'))
+    True
+
+    """
+    def __init__(self, input_array, alpha=0, beta=0, axes=(-1,), threads=1,
+                 kind='backward', flags=(FFTW_MEASURE, FFTW_PRESERVE_INPUT),
+                 output_array=None, points=None, weights=None, scaling=None):
+        if isinstance(axes, tuple):
+            assert len(axes) == 1
+            axis = axes[-1]
+        elif isinstance(axes, int):
+            axis = axes
+        axis = self.axis = axis % input_array.ndim
+        assert kind in ('scalar product', 'backward')
+        self.kind = kind
+        gamma = get_connection_parameter(alpha, beta)
+        assert gamma is not None, 'No fast transform for these parameters'
+        self.gamma = gamma
+        N = self.N = input_array.shape[axis]
+        if points is None:
+            points, weights = roots_jacobi(N, float(alpha), float(beta))
+        xc = n_cheb.chebgauss(N)[0]
+        thetaj = np.arccos(points)[::-1]
+        thetac = np.arccos(xc)
+        s = [None]*input_array.ndim
+        s[axis] = slice(None)
+        s = self.s = tuple(s) # broadcast to ndims
+        self.dtheta = (thetaj - thetac)[s]
+        self.n = np.arange(N, dtype=float)[s]
+        self.reverse = [slice(None)]*input_array.ndim
+        self.reverse[axis] = slice(-1, None, -1)
+        self.reverse = tuple(self.reverse)
+        if kind == 'scalar product':
+            self.wj = weights[::-1][s]
+        self.scaling = None if scaling is None else scaling[s]
+        self.steps = self._get_steps(float(alpha), float(beta), gamma, N)
+        if gamma == 0:
+            self.leg2chebclass = Leg2Cheb(np.zeros(input_array.shape), domains=2, diagonals=16,
+                                          axis=axis, maxs=100, use_direct=1000)
+        else:
+            k = np.arange(N)
+            self.p1 = np.exp(gammaln(k+0.5)-gammaln(0.5)-gammaln(k+1))[s]
+        U = input_array
+        V = output_array if output_array is not None else U.copy()
+        self.plan(U, V, kind, threads, flags)
+
+    @staticmethod
+    def _get_steps(alpha, beta, gamma, N):
+        """Return bidiagonal matrices lowering the parameters by one
+
+        Each matrix is returned in banded storage as used by
+        :func:`scipy.linalg.solve_banded`, together with the diagonal and
+        the subdiagonal of the transpose.
+        """
+        steps = []
+        n = np.arange(N, dtype=float)
+        a, b = alpha, beta
+        while a+b > 2*gamma+0.5:
+            lower_beta = b-1 >= gamma-1e-12
+            d = 2*n+a+b
+            d[0] = 1
+            A = (n+a+b)/d
+            A[0] = 1
+            B = (n+a)/d if lower_beta else -(n+b)/d
+            ab = np.zeros((2, N))
+            ab[1] = A
+            ab[0, 1:] = B[1:]
+            abT = np.zeros((2, N))
+            abT[0] = A
+            abT[1, :-1] = B[1:]
+            steps.append((ab, abT))
+            if lower_beta:
+                b -= 1
+            else:
+                a -= 1
+        return steps
+
+    def plan(self, U, V, kind, threads, flags):
+        # dct and dst use the same real input/output arrays
+        Uc = fftw.aligned(U.shape, dtype=float)
+        Vc = fftw.aligned(V.shape, dtype=float)
+        t = 2 if kind == 'scalar product' else 3
+        self.dct = DCT(Uc, axis=self.axis, type=t, threads=threads, flags=flags, output_array=Vc)
+        self.dst = DST(Uc, axis=self.axis, type=t, threads=threads, flags=flags, output_array=Vc)
+        self._input_array = U
+        self._output_array = V
+
+    @property
+    def input_array(self):
+        return self._input_array
+
+    @property
+    def output_array(self):
+        return self._output_array
+
+    def _solve(self, x, transpose=False):
+        """Apply the inverse of all bidiagonal matrices to x"""
+        if len(self.steps) == 0:
+            return x
+        shape = x.shape
+        y = np.moveaxis(x, self.axis, 0)
+        yshape = y.shape
+        y = y.reshape((self.N, -1))
+        if transpose:
+            for ab, abT in self.steps[::-1]:
+                y = solve_banded((1, 0), abT, y, overwrite_b=True, check_finite=False)
+        else:
+            for ab, abT in self.steps:
+                y = solve_banded((0, 1), ab, y, overwrite_b=True, check_finite=False)
+        x = np.moveaxis(y.reshape(yshape), 0, self.axis)
+        assert x.shape == shape
+        return x
+
+    def _to_chebyshev(self, x, transpose=False):
+        if self.gamma == 0:
+            return self.leg2chebclass(x.copy(), x, transpose=transpose)
+        x *= self.p1
+        return x
+
+    def _taylor(self, x, fk):
+        """Add the Taylor expansion around the Chebyshev points to fk"""
+        nfac = 1
+        y = 1
+        n = 1
+        converged = False
+        while not converged:
+            even = n % 2 == 0
+            deven = (n+1)//2 % 2 == 0
+            nfac *= n
+            if self.kind == 'backward':
+                x *= self.n
+                y *= self.dtheta
+            else:
+                x *= self.dtheta
+                y *= self.n
+            sign = 1 if deven else -1
+            fft = self.dct if even else self.dst
+            h = fft(x)
+            df = sign/nfac*y*h
+            fk += df
+            error = np.linalg.norm(df)
+            converged = error <= 1e-16*np.linalg.norm(fk)
+            n += 1
+        return fk
+
+    def _transform(self, x):
+        if self.kind == 'backward':
+            if self.scaling is not None:
+                x *= self.scaling
+            x = self._solve(x)
+            x = self._to_chebyshev(x)
+            fk = self.dct(x).copy()
+            fk = self._taylor(x, fk)
+            return fk[self.reverse]
+
+        x = x[self.reverse]*self.wj
+        fk = self.dct(x).copy()
+        fk = self._taylor(x, fk)
+        fk = self._to_chebyshev(fk, transpose=True)
+        fk = self._solve(fk, transpose=True)
+        if self.scaling is not None:
+            fk *= self.scaling
+        return fk
+
+    def __call__(self, input_array=None, output_array=None, **kw):
+        if input_array is not None:
+            self._input_array[:] = input_array
+        if output_array is None:
+            output_array = self._output_array
+        u = self._input_array
+        if np.iscomplexobj(u):
+            output_array.real[:] = self._transform(u.real.copy())
+            output_array.imag[:] = self._transform(u.imag.copy())
+        else:
+            output_array[:] = self._transform(u.copy())
+        return output_array
@@ -3,9 +3,13 @@ This module contains linear algebra solvers for SparseMatrices,
 TPMatrices and BlockMatrices.
 """
 from numbers import Number, Integral
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import scipy.linalg as scipy_la
 from scipy.sparse import spmatrix, kron
-from scipy.sparse.linalg import splu
+from scipy.sparse.linalg import splu, LinearOperator, cg, minres, gmres, \
+    norm as spnorm
 from shenfun.config import config
 from shenfun.optimization import optimizer, runtimeoptimizer
 from shenfun.matrixbase import SparseMatrix, extract_bc_matrices, \
@@ -14,6 +18,39 @@ from shenfun.forms.arguments import Function
 from mpi4py import MPI
 comm = MPI.COMM_WORLD
 
+def parallel_map(func, items):
+    """Return list of `func` applied to all `items`
+
+    The items are processed by a pool of config['optimization']['threads']
+    threads. Meant for independent assembly and factorization of matrices.
+
+    Parameters
+    ----------
+    func : callable
+        Function taking one item as argument
+    items : iterable
+    """
+    items = list(items)
+    threads = config['optimization']['threads']
+    if threads > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(func, items))
+    return [func(item) for item in items]
+
+def apply_axis(A, x, axis):
+    """Return matrix `A` applied along axis `axis` of array `x`
+
+    Parameters
+    ----------
+    A : Scipy sparse matrix or dense 2D array
+    x : array
+    axis : int
+    """
+    y = np.moveaxis(x, axis, 0)
+    shape = y.shape
+    z = A.dot(y.reshape((shape[0], -1)))
+    return np.moveaxis(z.reshape((A.shape[0],)+shape[1:]), 0, axis)
+
 def Solver(mats):
     """Return appropriate solver for `mats`
 
@@ -882,6 +919,22 @@ class SolverGeneric2ND:
         assert len(diagonal_axis) == 1
         return diagonal_axis[0]
 
+    def get_scales(self, i):
+        """Return scales of all matrices for index `i` in diagonal direction
+
+        Parameters
+        ----------
+        i : int
+            Fourier wavenumber
+        """
+        diagonal_axis = self.get_diagonal_axis()
+        sc = [0, 0, 0]
+        scales = []
+        for m in self.tpmats:
+            sc[diagonal_axis] = i if m.scale.shape[diagonal_axis] > 1 else 0
+            scales.append(m.scale[tuple(sc)])
+        return tuple(scales)
+
     def diags(self, i):
         """Return matrix for given index `i` in diagonal direction
 
@@ -945,10 +998,18 @@ class SolverGeneric2ND:
                 self.mats2D[0] = mat
 
             elif ndim == 3:
+                # Wavenumbers with identical scales share one matrix if
+                # config['matrix']['sparse']['share_lu'] is True
                 diagonal_axis = self.get_diagonal_axis()
-                for i in range(self.T.shape(True)[diagonal_axis]):
-                    M0 = self.diags(i)
-                    self.mats2D[i] = M0
+                share = config['matrix']['sparse']['share_lu']
+                keys = [self.get_scales(i) if share else i
+                        for i in range(self.T.shape(True)[diagonal_axis])]
+                unique = {}
+                for i, key in enumerate(keys):
+                    unique.setdefault(key, i)
+                mats = dict(zip(unique.keys(), parallel_map(self.diags, unique.values())))
+                for i, key in enumerate(keys):
+                    self.mats2D[i] = mats[key]
         return self.mats2D
 
     def perform_lu(self):
@@ -956,12 +1017,18 @@ class SolverGeneric2ND:
             return self._lu
         ndim = self.tpmats[0].dimensions
         self._lu = {}
+        permc_spec = config['matrix']['sparse']['permc_spec']
         if ndim == 2:
-            self._lu[0] = splu(self.mats2D[0], permc_spec=config['matrix']['sparse']['permc_spec'])
+            self._lu[0] = splu(self.mats2D[0], permc_spec=permc_spec)
         else:
+            # Factorize each distinct matrix once
             diagonal_axis = self.get_diagonal_axis()
-            for i in range(self.T.shape(True)[diagonal_axis]):
-                self._lu[i] = splu(self.mats2D[i], permc_spec=config['matrix']['sparse']['permc_spec'])
+            N = self.T.shape(True)[diagonal_axis]
+            mats = {id(self.mats2D[i]): self.mats2D[i] for i in range(N)}
+            lu = dict(zip(mats.keys(), parallel_map(lambda A: splu(A, permc_spec=permc_spec),
+                                                    mats.values())))
+            for i in range(N):
+                self._lu[i] = lu[id(self.mats2D[i])]
         return self._lu
 
     def __call__(self, b, u=None, constraints=()):
@@ -1180,6 +1247,411 @@ class SolverND(Solver2D):
         Solver2D.__init__(self, tpmats)
 
 
+class SolverKrylov:
+    """Matrix-free Krylov solver for tensorproductspaces
+
+    The sum of :class:`.TPMatrix` instances is never assembled into a
+    Kronecker product matrix. It is instead applied through one-dimensional
+    matrix vector products along each axis of the tensor product space.
+
+    Parameters
+    ----------
+    tpmats : sequence
+        sequence of instances of :class:`.TPMatrix`
+    method : str, optional
+        The Krylov method. Either one of
+
+            - 'cg' - Conjugate gradient, for symmetric positive definite systems
+            - 'minres' - Minimal residual, for symmetric systems
+            - 'gmres' - Generalized minimal residual
+
+    preconditioner : str or None, optional
+        Either one of
+
+            - 'fdm' - Fast diagonalization of a separable approximation to
+              the sum of matrices. Exact for separable problems, like
+              Poisson and Helmholtz.
+            - 'lu' - One-dimensional LU-factorizations of the dominating
+              tensor product matrix.
+            - 'diagonal' - The inverse of the diagonal
+            - None - No preconditioner
+
+    Note
+    ----
+    Tolerances, the maximum number of iterations and the restart parameter
+    of gmres are set in config['matrix']['krylov']. The convergence info
+    returned by the scipy Krylov method is stored in attribute info after
+    each call.
+
+    Both cg and minres require a symmetric positive definite preconditioner.
+    Constraints replace rows of the equation system, which makes the system
+    nonsymmetric. Use gmres if constraints are required.
+
+    If there are boundary matrices in the list of mats, then
+    these matrices are used to modify the right hand side before
+    solving. If this is not the desired behaviour, then use
+    :func:`.extract_bc_matrices` on mats before using this class.
+
+    """
+
+    def __init__(self, tpmats, method='gmres', preconditioner='fdm'):
+        assert method in ('cg', 'minres', 'gmres')
+        bc_mats = extract_bc_matrices([tpmats])
+        self.tpmats = tpmats
+        self.bc_mats = bc_mats
+        m = tpmats[0]
+        self.T = m.space
+        assert m._issimplified is False, "Cannot use simplified matrices with this solver"
+        self.method = method
+        self.dims = tuple(self.T.dims())
+        self.terms = [(np.atleast_1d(m.scale).item(), [mat.diags('csr') for mat in m.mats])
+                      for m in tpmats]
+        self.dtype = np.result_type(*[np.array(scale) for scale, _ in self.terms],
+                                    *[A.dtype for _, mats in self.terms for A in mats])
+        self.preconditioner = preconditioner
+        self._precond = None
+        if preconditioner is not None:
+            self._precond = getattr(self, '_setup_'+preconditioner)()
+        self._constraints = ()
+        self.info = None
+
+    def _matvec(self, x):
+        x = x.reshape(self.dims)
+        y = 0
+        for scale, mats in self.terms:
+            z = x
+            for axis, A in enumerate(mats):
+                z = apply_axis(A, z, axis)
+            y = y + scale*z
+        y = np.ravel(y)
+        for (row, _) in self._constraints:
+            y[row] = x.flat[row]
+        return y
+
+    def matvec(self, u, c):
+        c.fill(0)
+        s0 = tuple(base.slice() for base in self.T)
+        c[s0] = self._matvec(u[s0]).reshape(self.dims)
+        return c
+
+    def _setup_diagonal(self):
+        d = 0
+        for scale, mats in self.terms:
+            dm = np.array(scale)
+            for A in mats:
+                dm = np.multiply.outer(dm, A.diagonal())
+            d = d + dm
+        d = np.where(abs(d) > 0, d, 1)
+        return lambda x: np.ravel(x.reshape(self.dims)/d)
+
+    def _setup_lu(self):
+        norms = [abs(scale)*np.prod([spnorm(A) for A in mats]) for scale, mats in self.terms]
+        scale, mats = self.terms[int(np.argmax(norms))]
+        lus = [splu(A.tocsc(), permc_spec=config['matrix']['sparse']['permc_spec']) for A in mats]
+
+        def precond(x):
+            z = x.reshape(self.dims)/scale
+            for axis, lu in enumerate(lus):
+                y = np.moveaxis(z, axis, 0)
+                shape = y.shape
+                y = np.ascontiguousarray(y.reshape((shape[0], -1)))
+                if np.iscomplexobj(y) and lu.U.dtype.char not in 'FDG':
+                    y = lu.solve(y.real.copy()) + 1j*lu.solve(y.imag.copy())
+                else:
+                    y = lu.solve(y)
+                z = np.moveaxis(y.reshape(shape), 0, axis)
+            return np.ravel(z)
+        return precond
+
+    def _setup_fdm(self):
+        # Along each axis, use the generalized eigenvectors of two distinct
+        # matrices to diagonalize all matrices approximately
+        W, V, D = [], [], [[] for _ in self.terms]
+        for axis in range(len(self.dims)):
+            mats = [m[axis].toarray() for _, m in self.terms]
+            v, w = SolverFDM.get_eigenpairs(mats)
+            W.append(w)
+            V.append(v)
+            for i, A in enumerate(mats):
+                D[i].append(np.diag(w.dot(A.dot(v))))
+        d = 0
+        for (scale, _), di in zip(self.terms, D):
+            dm = np.array(scale)
+            for dd in di:
+                dm = np.multiply.outer(dm, dd)
+            d = d + dm
+        d = np.where(abs(d) > 1e-12*abs(d).max(), d, 1)
+
+        def precond(x):
+            z = x.reshape(self.dims)
+            for axis, w in enumerate(W):
+                z = apply_axis(w, z, axis)
+            z = z / d
+            for axis, v in enumerate(V):
+                z = apply_axis(v, z, axis)
+            if not np.iscomplexobj(x):
+                z = z.real
+            return np.ravel(z)
+        return precond
+
+    def __call__(self, b, u=None, constraints=()):
+        """Solve generic problem for sum of :class:`TPMatrix` instances
+
+        Parameters
+        ----------
+        b : array, right hand side
+        u : array, solution. If different from b, then u is also used as
+            initial guess for the Krylov method.
+        constraints : tuple of 2-tuples
+            Each 2-tuple (row, value) is a constraint set for the flattened
+            array of unknowns
+
+        """
+        x0 = None
+        if u is None:
+            u = b
+        s0 = tuple(base.slice() for base in self.T)
+        if u is not b:
+            x0 = u[s0].flatten()
+
+        if len(self.bc_mats) > 0:
+            u.set_boundary_dofs()
+            w0 = Function(self.T).v
+            for bc_mat in self.bc_mats:
+                b -= bc_mat.matvec(u, w0)
+
+        bs = b[s0].flatten()
+        self._constraints = constraints
+        for (row, val) in constraints:
+            bs[row] = val
+
+        dtype = np.result_type(bs.dtype, self.dtype)
+        N = bs.shape[0]
+        A = LinearOperator((N, N), matvec=self._matvec, dtype=dtype)
+        M = None
+        if self._precond is not None:
+            M = LinearOperator((N, N), matvec=self._precond, dtype=dtype)
+        params = config['matrix']['krylov']
+        kw = {'rtol': params['rtol'], 'maxiter': params['maxiter'], 'M': M}
+        if self.method in ('cg', 'gmres'):
+            kw['atol'] = params['atol']
+        if self.method == 'gmres':
+            kw['restart'] = params['restart']
+        method = {'cg': cg, 'minres': minres, 'gmres': gmres}[self.method]
+        x, self.info = method(A, bs, x0=x0, **kw)
+        u[s0] = x.reshape(self.dims)
+
+        if hasattr(u, 'set_boundary_dofs'):
+            u.set_boundary_dofs()
+        return u
+
+
+class SolverFDM:
+    r"""Fast diagonalization solver for separable tensor product problems
+
+    Solves problems of the form
+
+    .. math::
+
+        \sum_{m} s_m \bigotimes_{i} C^{(m)}_i u = b
+
+    where, along each non-diagonal axis :math:`i`, all the matrices
+    :math:`C^{(m)}_i` are linear combinations of only two matrices
+    :math:`A_i` and :math:`B_i`. Using the generalized eigenvectors,
+    :math:`A_i V_i = B_i V_i \Lambda_i`, all the matrices are diagonalized
+    simultaneously and the solution is computed as
+
+    .. math::
+
+        u = \left(\bigotimes_i V_i\right) D^{-1}
+            \left(\bigotimes_i V_i^{-1} B_i^{-1}\right) b
+
+    with :math:`D` diagonal. The one-dimensional eigenpairs are cached and
+    reused by all solvers with the same one-dimensional matrices, and they
+    are applied as dense matrix-matrix products. A solve costs
+    :math:`\mathcal{O}(N^{d+1})` operations for :math:`d` non-diagonal axes.
+
+    Parameters
+    ----------
+    tpmats : sequence
+        sequence of instances of :class:`.TPMatrix`
+
+    Note
+    ----
+    The non-diagonal axes need to be aligned (not distributed), whereas any
+    diagonal (Fourier) axes may be distributed.
+
+    If there are boundary matrices in the list of mats, then
+    these matrices are used to modify the right hand side before
+    solving. If this is not the desired behaviour, then use
+    :func:`.extract_bc_matrices` on mats before using this class.
+
+    """
+
+    _eigenpairs = {}
+
+    def __init__(self, tpmats):
+        tpmats = get_simplified_tpmatrices(tpmats)
+        bc_mats = extract_bc_matrices([tpmats])
+        self.tpmats = tpmats
+        self.bc_mats = bc_mats
+        self.T = T = tpmats[0].space
+        self.naxes = naxes = T.get_nondiagonal_axes()
+        shape = T.shape(True)
+        ls = T.local_slice(True)
+        for axis in naxes:
+            assert ls[axis].stop-ls[axis].start == shape[axis], "Non-diagonal axes cannot be distributed"
+        self.V = {}
+        self.W = {}
+        diags = [[] for _ in tpmats]
+        for axis in naxes:
+            mats = [m.mats[axis].diags('csr').toarray() for m in tpmats]
+            V, W = self.get_eigenpairs(mats)
+            for i, C in enumerate(mats):
+                E = W.dot(C.dot(V))
+                d = np.diag(E).copy()
+                E[np.diag_indices_from(E)] = 0
+                if abs(E).max() > 1e-8*max(abs(d).max(), 1):
+                    raise ValueError('Problem is not separable along axis %d' %(axis))
+                s = [np.newaxis]*T.dimensions
+                s[axis] = slice(None)
+                diags[i].append(d[tuple(s)])
+            self.V[axis] = V
+            self.W[axis] = W
+        D = 0
+        for m, dm in zip(tpmats, diags):
+            Dm = m.scale
+            for d in dm:
+                Dm = Dm*d
+            D = D + Dm
+        if np.isrealobj(D) or np.allclose(D.imag, 0):
+            D = D.real
+        self.D = D
+        self._null = abs(D) <= 1e-12*abs(D).max()
+        with np.errstate(divide='ignore'):
+            self.Dinv = np.where(self._null, 0, 1/D)
+
+    @classmethod
+    def get_eigenpairs(cls, mats):
+        """Return generalized eigenvectors of one-dimensional matrices
+
+        Parameters
+        ----------
+        mats : sequence of dense 2D arrays
+            All the matrices along one axis
+
+        Returns
+        -------
+        2-tuple of 2D arrays
+            The generalized eigenvectors :math:`V` of two distinct matrices
+            :math:`A` and :math:`B`, and :math:`V^{-1}B^{-1}`
+        """
+        distinct = []
+        for C in mats:
+            if not any(np.allclose(C, D, rtol=0, atol=1e-14*abs(D).max()) for D in distinct):
+                distinct.append(C)
+        B = min(distinct, key=np.linalg.cond)
+        A = ([C for C in distinct if C is not B]+[B])[0]
+        key = hashlib.sha1(b''.join([str(A.shape).encode(), A.tobytes(), B.tobytes()])).hexdigest()
+        if key in cls._eigenpairs:
+            return cls._eigenpairs[key]
+        if np.allclose(A, A.T) and np.allclose(B, B.T) and np.isrealobj(A) and np.isrealobj(B):
+            try:
+                _, V = scipy_la.eigh(A, B)
+                W = V.T
+                cls._eigenpairs[key] = (V, W)
+                return V, W
+            except scipy_la.LinAlgError:
+                pass
+        lam, V = np.linalg.eig(np.linalg.solve(B, A))
+        if np.allclose(lam.imag, 0) and np.isrealobj(A) and np.isrealobj(B):
+            V = V.real
+        W = np.linalg.solve(B.dot(V), np.eye(B.shape[0]))
+        cls._eigenpairs[key] = (V, W)
+        return V, W
+
+    def slice(self):
+        s = [slice(None)]*self.T.dimensions
+        for axis in self.naxes:
+            s[axis] = self.T.bases[axis].slice()
+        return tuple(s)
+
+    def _solve(self, bs):
+        z = bs
+        for axis in self.naxes:
+            z = apply_axis(self.W[axis], z, axis)
+        z = z*self.Dinv
+        for axis in self.naxes:
+            z = apply_axis(self.V[axis], z, axis)
+        return z
+
+    def apply_constraints(self, b, constraints):
+        """Return null vector and value used to enforce constraints
+
+        Modifies `b` such that the singular system is consistent.
+        """
+        assert len(constraints) == 1, "Only one constraint is supported"
+        row, val = constraints[0]
+        ls = self.T.local_slice(True)
+        diagonal_axes = np.setxor1d(self.naxes, range(self.T.dimensions)).astype(int)
+        if not all(ls[axis].start == 0 for axis in diagonal_axes):
+            return None
+        s0 = tuple(0 if axis in diagonal_axes else slice(None) for axis in range(self.T.dimensions))
+        null = np.broadcast_to(self._null, b.shape)[s0]
+        assert null.sum() == 1, "Constraints require a one-dimensional nullspace"
+        j = np.unravel_index(np.argmax(null), null.shape)
+        l = n = np.ones(1)
+        for i, axis in enumerate(self.naxes):
+            l = np.multiply.outer(l, self.W[axis][j[i]])
+            n = np.multiply.outer(n, self.V[axis][:, j[i]])
+        l, n = l.ravel(), n.ravel()
+        b0 = b[s0].ravel().copy()
+        b0[row] = 0
+        b[s0].flat[row] = -l.dot(b0)/l[row]
+        return s0, row, val, n
+
+    def __call__(self, b, u=None, constraints=()):
+        """Solve separable problem
+
+        Parameters
+        ----------
+        b : array, right hand side
+        u : array, solution
+        constraints : tuple of 2-tuples
+            Each 2-tuple (row, value) is a constraint set for the flattened
+            non-diagonal axes, for Fourier index 0. Only one constraint,
+            fixing a one-dimensional nullspace, is supported.
+
+        """
+        if u is None:
+            u = b
+        else:
+            assert u.shape == b.shape
+
+        if len(self.bc_mats) > 0:
+            u.set_boundary_dofs()
+            w0 = Function(self.T).v
+            for bc_mat in self.bc_mats:
+                b -= bc_mat.matvec(u, w0)
+
+        s0 = self.slice()
+        bs = b[s0].copy()
+        gauge = None
+        if len(constraints) > 0:
+            gauge = self.apply_constraints(bs, constraints)
+
+        z = self._solve(bs)
+        if gauge is not None:
+            s, row, val, n = gauge
+            z0 = z[s]
+            z0 += ((val-z0.flat[row])/n[row])*n.reshape(z0.shape)
+
+        u[s0] = z if np.iscomplexobj(u) else z.real
+        if hasattr(u, 'set_boundary_dofs'):
+            u.set_boundary_dofs()
+        return u
+
+
 class SolverGeneric1ND:
     """Generic solver for tensorproduct matrices consisting of
     non-diagonal matrices along only one axis and Fourier along
@@ -1228,39 +1700,58 @@ class SolverGeneric1ND:
                 c += bc_mat.matvec(u, w0)
         return c
 
+    def get_solver(self, scales):
+        """Return 1D solver for the matrices scaled by `scales`
+
+        Parameters
+        ----------
+        scales : sequence of numbers
+            One scale for each matrix in self.mats
+        """
+        sol = None
+        for mat, sc in zip(self.mats, scales):
+            if sol:
+                sol += mat.mats[self.naxes]*sc
+            else:
+                sol = mat.mats[self.naxes]*sc
+        return Solver(sol)
+
     def assemble(self):
         ndim = self.mats[0].dimensions
         shape = self.mats[0].space.shape(True)
-        self.solvers1D = []
+        scales = []
         if ndim == 2:
             zi = np.ndindex((1, shape[1])) if self.naxes == 0 else np.ndindex((shape[0], 1))
             other_axis = (self.naxes+1) % 2
             for i in zi:
-                sol = None
-                for mat in self.mats:
-                    sc = mat.scale[i] if mat.scale.shape[other_axis] > 1 else mat.scale[0, 0]
-                    if sol:
-                        sol += mat.mats[self.naxes]*sc
-                    else:
-                        sol = mat.mats[self.naxes]*sc
-                self.solvers1D.append(Solver(sol))
+                scales.append(tuple(mat.scale[i] if mat.scale.shape[other_axis] > 1 else mat.scale[0, 0]
+                                    for mat in self.mats))
 
         elif ndim == 3:
             s = [0, 0, 0]
             n0, n1 = np.setxor1d((0, 1, 2), self.naxes)
             for i in range(shape[n0]):
-                self.solvers1D.append([])
                 s[n0] = i
                 for j in range(shape[n1]):
-                    sol = None
                     s[n1] = j
-                    for mat in self.mats:
-                        sc = np.broadcast_to(mat.scale, shape)[tuple(s)]
-                        if sol:
-                            sol += mat.mats[self.naxes]*sc
-                        else:
-                            sol = mat.mats[self.naxes]*sc
-                    self.solvers1D[-1].append(Solver(sol))
+                    scales.append(tuple(np.broadcast_to(mat.scale, shape)[tuple(s)]
+                                        for mat in self.mats))
+
+        # Indices with identical scales share one solver if
+        # config['matrix']['sparse']['share_lu'] is True. The first index may
+        # be modified by constraints and is never shared.
+        share = config['matrix']['sparse']['share_lu']
+        keys = [sc if share and k > 0 else k for k, sc in enumerate(scales)]
+        unique = {}
+        for key, sc in zip(keys, scales):
+            unique.setdefault(key, sc)
+        solvers = dict(zip(unique.keys(), parallel_map(self.get_solver, unique.values())))
+        solvers1D = [solvers[key] for key in keys]
+        if ndim == 2:
+            self.solvers1D = solvers1D
+        else:
+            M = shape[n1]
+            self.solvers1D = [solvers1D[i*M:(i+1)*M] for i in range(shape[n0])]
 
     def apply_constraints(self, b, constraints=()):
         #The SolverGeneric1ND solver can only constrain the first dofs of
@@ -1287,13 +1778,11 @@ class SolverGeneric1ND:
             return
 
         if isinstance(self.solvers1D[0], SparseMatrixSolver):
-            for m in self.solvers1D:
-                lu = m.perform_lu()
-
+            solvers = self.solvers1D
         else:
-            for mi in self.solvers1D:
-                for mij in mi:
-                    lu = mij.perform_lu()
+            solvers = [mij for mi in self.solvers1D for mij in mi]
+        solvers = {id(sol): sol for sol in solvers}
+        parallel_map(lambda sol: sol.perform_lu(), solvers.values())
         self._lu = True
 
     def get_data(self, is_rank_zero):
@@ -1434,6 +1923,23 @@ class SolverGeneric1ND:
         return u
 
 class BlockMatrixSolver:
+    """Direct solver for block matrices
+
+    The block matrix is assembled as one global scipy sparse matrix for each
+    index into the diagonal (Fourier) axes, and factored with
+    :func:`scipy.sparse.linalg.splu`. The factorizations are computed once,
+    on the first call, and the assembled matrices are thereafter released.
+    Factorizations are also cached and reused by all solvers with the same
+    assembled matrices (and constraints).
+
+    Parameters
+    ----------
+    mats : :class:`.BlockMatrix` or list of :class:`.TPMatrix`
+
+    """
+
+    _factorizations = {}
+
     def __init__(self, mats):
         assert isinstance(mats, (BlockMatrix, list))
         self.bc_mat = None
@@ -1446,6 +1952,24 @@ class BlockMatrixSolver:
         if len(bc_mats) > 0:
             self.bc_mat = BlockMatrix(bc_mats)
 
+    @classmethod
+    def get_factorization(cls, A):
+        """Return (cached) LU factorization of scipy sparse matrix `A`
+
+        Parameters
+        ----------
+        A : scipy sparse matrix
+        """
+        A = A.tocsc()
+        A.sort_indices()
+        permc_spec = config['matrix']['block']['permc_spec']
+        key = hashlib.sha1(b''.join([str((A.shape, A.dtype.char, permc_spec)).encode(),
+                                     A.indptr.tobytes(), A.indices.tobytes(),
+                                     A.data.tobytes()])).hexdigest()
+        if key not in cls._factorizations:
+            cls._factorizations[key] = splu(A, permc_spec=permc_spec)
+        return cls._factorizations[key]
+
     @staticmethod
     def apply_constraint(A, b, offset, i, constraint):
         if constraint is None or comm.Get_rank() > 0:
@@ -1474,11 +1998,10 @@ class BlockMatrixSolver:
 
     def __call__(self, b, u=None, constraints=()):
         from .forms.arguments import Function
-        import scipy.sparse as sp
         space = b.function_space()
         if u is None:
             u = Function(space)
-        
+
         if self.bc_mat: # Add contribution to right hand side due to inhomogeneous boundary conditions
             u.set_boundary_dofs()
             w0 = np.zeros_like(b)
@@ -1492,43 +2015,39 @@ class BlockMatrixSolver:
             assert isinstance(con[0], Integral)
             assert isinstance(con[1], Integral)
             assert isinstance(con[2], Number)
-        self.mat.assemble()
+        daxes = space.get_diagonal_axes()
         if self._lu is None:
-            self._lu = {}
+            self.mat.assemble()
+            if len(daxes) == space.dimensions:
+                # Only Fourier spaces, all diagonal
+                Ai = self.mat._Ai[0]
+                for con in constraints:
+                    Ai, _ = self.apply_constraint(Ai, np.zeros(Ai.shape[0]), int(np.sum(np.array(space.dims()[:con[0]]))), 0, con)
+                self._lu = self.get_factorization(Ai)
+            else:
+                _, dims = space._get_ndiag_slices_and_dims()
+                self._lu = {}
+                for key, Ai in self.mat._Ai.items():
+                    for con in constraints:
+                        Ai, _ = self.apply_constraint(Ai, np.zeros(Ai.shape[0]), dims[con[0]], key, con)
+                    self._lu[key] = self.get_factorization(Ai)
+            self.mat._Ai = None
 
-        daxes = space.get_diagonal_axes()
         if len(daxes) == space.dimensions:
-            # Only Fourier spaces, all diagonal
-            assert len(daxes) == space.dimensions
-            Ai = self.mat._Ai[0]
             gi = b.flatten()
-            if isinstance(self._lu, dict):
-                for con in constraints:
-                    Ai, gi = self.apply_constraint(Ai, gi, int(np.sum(np.array(space.dims()[:con[0]]))), 0, con)
-            else:
-                for con in constraints:
-                    _, gi = self.apply_constraint(None, gi, int(np.sum(np.array(space.dims()[:con[0]]))), 0, con)
-            lu = sp.linalg.splu(Ai, permc_spec=config['matrix']['block']['permc_spec'])
-            self._lu = lu
-            u[:] = lu.solve(gi).reshape(u.shape)
+            for con in constraints:
+                _, gi = self.apply_constraint(None, gi, int(np.sum(np.array(space.dims()[:con[0]]))), 0, con)
+            u[:] = self._lu.solve(gi).reshape(u.shape)
 
         else:
             sl, dims = space._get_ndiag_slices_and_dims()
             gi = np.zeros(dims[-1], dtype=b.dtype)
-            for key, Ai in self.mat._Ai.items():
+            for key, lu in self._lu.items():
                 if len(daxes) > 0:
                     sl.T[daxes+1] = key if isinstance(key, int) else np.array(key)[:, None]
                 gi = b.copy_to_flattened(gi, key, dims, sl)
-                if key in self._lu:
-                    lu = self._lu[key]
-                    for con in constraints:
-                        _, gi = self.apply_constraint(None, gi, dims[con[0]], key, con)
-                else:
-                    for con in constraints:
-                        Ai, gi = self.apply_constraint(Ai, gi, dims[con[0]], key, con)
-
-                    lu = sp.linalg.splu(Ai, permc_spec=config['matrix']['block']['permc_spec'])
-                    self._lu[key] = lu
+                for con in constraints:
+                    _, gi = self.apply_constraint(None, gi, dims[con[0]], key, con)
 
                 if b.dtype.char in 'fdg' or lu.U.dtype.char in 'FDG':
                     u = u.copy_from_flattened(lu.solve(gi), key, dims, sl)
@@ -1539,3 +2058,268 @@ class BlockMatrixSolver:
         u = u.reshape(u.shape[1:]) if nvars == 1 else u
         b = b.reshape(b.shape[1:]) if nvars == 1 else b
         return u
+
+class SchurComplementSolver:
+    r"""Block elimination solver for coupled problems
+
+    Solves block systems with unknowns split into two groups, primary
+    (:math:`x_p`) and Schur (:math:`x_s`), like velocity and pressure in
+    Stokes problems
+
+    .. math::
+
+        \begin{bmatrix}
+            A_{pp} & A_{ps} \\
+            A_{sp} & A_{ss}
+        \end{bmatrix}
+        \begin{bmatrix}
+            x_p \\ x_s
+        \end{bmatrix} =
+        \begin{bmatrix}
+            b_p \\ b_s
+        \end{bmatrix}
+
+    The primary components must be decoupled from each other, such that
+    :math:`A_{pp}` is block diagonal with one banded block for each primary
+    component. The solution is computed as
+
+    .. math::
+
+        S x_s &= b_s - A_{sp} A_{pp}^{-1} b_p \\
+        x_p &= A_{pp}^{-1} b_p - A_{pp}^{-1} A_{ps} x_s
+
+    where :math:`S = A_{ss} - A_{sp} A_{pp}^{-1} A_{ps}` is the Schur
+    complement. The banded blocks are factored with LAPACK's ``gbtrf`` and
+    the (small) Schur complement is factored as a dense matrix. All
+    factorizations are computed once for each index into the diagonal
+    (Fourier) axes, directly from the one-dimensional matrices, such that
+    the global sparse matrix is never formed.
+
+    Parameters
+    ----------
+    mats : :class:`.BlockMatrix` or list of :class:`.TPMatrix`
+    schur : sequence of ints, optional
+        The components of the Schur unknowns. Default is the last component.
+
+    Note
+    ----
+    There can be at most one non-diagonal axis, and this axis cannot be
+    distributed.
+
+    If there are boundary matrices in the list of mats, then
+    these matrices are used to modify the right hand side before
+    solving. If this is not the desired behaviour, then use
+    :func:`.extract_bc_matrices` on mats before using this class.
+
+    Example
+    -------
+    >>> from shenfun import FunctionSpace, TensorProductSpace, VectorSpace, \
+    ...     CompositeSpace, TrialFunction, TestFunction, Function, inner, \
+    ...     grad, div, comm, la
+    >>> import numpy as np
+    >>> F = FunctionSpace(8, 'F', dtype='d')
+    >>> D = FunctionSpace(12, 'L', bc=(0, 0))
+    >>> P = FunctionSpace(12, 'L')
+    >>> TD = TensorProductSpace(comm, (D, F))
+    >>> TP = TensorProductSpace(comm, (P, F), modify_spaces_inplace=True)
+    >>> P.slice = lambda: slice(0, 10)
+    >>> Q = CompositeSpace([VectorSpace(TD), TP])
+    >>> u, p = TrialFunction(Q)
+    >>> v, q = TestFunction(Q)
+    >>> A = inner(grad(v), grad(u)) + inner(div(v), p) + inner(q, div(u))
+    >>> sol = la.SchurComplementSolver(A)
+    >>> b = Function(Q)
+    >>> b[:2] = np.random.random(b[:2].shape)
+    >>> up = sol(b, constraints=((2, 0, 0),))
+
+    """
+    def __init__(self, mats, schur=None):
+        assert isinstance(mats, (BlockMatrix, list))
+        self.bc_mat = None
+        self._lu = None
+        if isinstance(mats, BlockMatrix):
+            mats = mats.get_mats()
+        bc_mats = extract_bc_matrices([mats])
+        assert len(mats) > 0
+        self.mat = BlockMatrix(mats)
+        if len(bc_mats) > 0:
+            self.bc_mat = BlockMatrix(bc_mats)
+        ncomps = self.mat.dims[0]
+        assert self.mat.dims[0] == self.mat.dims[1]
+        assert ncomps > 1
+        self.schur = schur = [ncomps-1] if schur is None else [int(i) % ncomps for i in schur]
+        self.primary = primary = [i for i in range(ncomps) if i not in schur]
+        for i in primary:
+            for j in primary:
+                if i != j and not isinstance(self.mat.mats[i][j], Number):
+                    raise ValueError('Primary components %d and %d are coupled' %(i, j))
+        space = self.mat.testbase
+        if space.dimensions > 1:
+            naxes = space.get_nondiagonal_axes()
+            assert len(naxes) == 1, 'SchurComplementSolver requires exactly one non-diagonal axis'
+            for T in space.flatten():
+                ls = T.local_slice(True)[naxes[0]]
+                assert ls.stop-ls.start == T.shape(True)[naxes[0]], 'Non-diagonal axis cannot be distributed'
+
+    @staticmethod
+    def get_banded(A):
+        """Return LAPACK banded storage of square scipy sparse matrix `A`
+
+        Parameters
+        ----------
+        A : scipy sparse matrix
+
+        Returns
+        -------
+        2-tuple
+            - (l, u) - The number of sub- and superdiagonals
+            - ab - Array of shape (2*l+u+1, A.shape[1]), with the matrix
+              in the last l+u+1 rows, as required by ``gbtrf``
+        """
+        A = A.todia()
+        offsets = A.offsets
+        l = max(0, -offsets.min()) if len(offsets) > 0 else 0
+        u = max(0, offsets.max()) if len(offsets) > 0 else 0
+        ab = np.zeros((2*l+u+1, A.shape[1]), dtype=A.dtype)
+        W = min(A.data.shape[1], A.shape[1])
+        for k, off in enumerate(offsets):
+            ab[l+u-off, :W] += A.data[k, :W]
+        return (l, u), ab
+
+    @staticmethod
+    def banded_solve(lu, b):
+        """Return solution of banded system factored by :meth:`factor_banded`
+
+        Parameters
+        ----------
+        lu : 3-tuple
+            Return value of :meth:`factor_banded`
+        b : array
+            Right hand side of shape (N,) or (N, M)
+        """
+        (l, u), ab, piv = lu
+        gbtrs, = scipy_la.get_lapack_funcs(('gbtrs',), (ab, b))
+        x, info = gbtrs(ab, l, u, b, piv)
+        assert info == 0
+        return x
+
+    @staticmethod
+    def factor_banded(A):
+        """Return LU factorization of square scipy sparse matrix `A`
+
+        Parameters
+        ----------
+        A : scipy sparse matrix
+        """
+        (l, u), ab = SchurComplementSolver.get_banded(A)
+        gbtrf, = scipy_la.get_lapack_funcs(('gbtrf',), (ab,))
+        ab, piv, info = gbtrf(ab, l, u, overwrite_ab=True)
+        if info > 0:
+            raise scipy_la.LinAlgError('Singular primary block')
+        return (l, u), ab, piv
+
+    @staticmethod
+    def is_constrained(key):
+        return comm.Get_rank() == 0 and np.sum(np.atleast_1d(key)) == 0
+
+    def get_blocks(self, key, constraints):
+        """Return dict of one-dimensional (csr) blocks for index `key`
+
+        Rows constrained by `constraints` are replaced by identity rows
+        """
+        from scipy.sparse import csr_matrix
+        ncomps = self.mat.dims[0]
+        dims = self.mat.testbase._get_ndiag_cum_dofs()
+        blocks = {}
+        for i in range(ncomps):
+            for j in range(ncomps):
+                Aij = self.mat.block_diags(i, j, key, 'csr')
+                if Aij is not None:
+                    blocks[(i, j)] = Aij.tocsr()
+        if self.is_constrained(key):
+            for con in constraints:
+                i, row = con[0], con[1]
+                for j in range(ncomps):
+                    if (i, j) in blocks:
+                        A = blocks[(i, j)].tolil()
+                        A[row, :] = 0
+                        blocks[(i, j)] = A.tocsr()
+                Aii = blocks.get((i, i))
+                if Aii is None:
+                    n = dims[i+1]-dims[i]
+                    Aii = csr_matrix((n, n))
+                Aii = Aii.tolil()
+                Aii[row, row] = 1
+                blocks[(i, i)] = Aii.tocsr()
+        return blocks
+
+    def factor(self, key, constraints):
+        from scipy.sparse import bmat, csr_matrix
+        blocks = self.get_blocks(key, constraints)
+        dims = self.mat.testbase._get_ndiag_cum_dofs()
+        ns = [dims[i+1]-dims[i] for i in self.schur]
+        S = bmat([[blocks.get((i, j), csr_matrix((ni, nj))) for j, nj in zip(self.schur, ns)]
+                  for i, ni in zip(self.schur, ns)]).toarray()
+        lus, Asp, W = [], [], []
+        for i in self.primary:
+            lu = self.factor_banded(blocks[(i, i)])
+            ni = dims[i+1]-dims[i]
+            Aps = bmat([[blocks.get((i, j), csr_matrix((ni, n))) for j, n in zip(self.schur, ns)]])
+            Asp_i = bmat([[blocks.get((j, i), csr_matrix((n, ni)))] for j, n in zip(self.schur, ns)], format='csr')
+            Wi = self.banded_solve(lu, Aps.toarray())
+            S = S - Asp_i.dot(Wi)
+            lus.append(lu)
+            Asp.append(Asp_i)
+            W.append(Wi)
+        return lus, Asp, W, scipy_la.lu_factor(S)
+
+    def __call__(self, b, u=None, constraints=()):
+        space = b.function_space()
+        if u is None:
+            u = Function(space)
+
+        if self.bc_mat: # Add contribution to right hand side due to inhomogeneous boundary conditions
+            u.set_boundary_dofs()
+            w0 = np.zeros_like(b)
+            b -= self.bc_mat.matvec(u, w0, use_scipy=True)
+
+        for con in constraints:
+            assert len(con) == 3
+            assert isinstance(con[0], Integral)
+            assert isinstance(con[1], Integral)
+            assert isinstance(con[2], Number)
+        daxes = space.get_diagonal_axes()
+        if len(daxes) > 0:
+            daxes += 1
+        sl, dims = space._get_ndiag_slices_and_dims()
+        if self._lu is None:
+            shape = np.array(b.shape[1:])
+            ndindices = [(0,)] if len(daxes) == 0 else np.ndindex(tuple(shape[daxes-1]))
+            self._lu = {}
+            for key in ndindices:
+                key = key[0] if len(key) == 1 else key
+                self._lu[key] = self.factor(key, constraints)
+
+        gi = np.zeros(dims[-1], dtype=b.dtype)
+        for key, (lus, Asp, W, S) in self._lu.items():
+            if len(daxes) > 0:
+                sl.T[daxes] = key if isinstance(key, int) else np.array(key)[:, None]
+            gi = b.copy_to_flattened(gi, key, dims, sl)
+            if self.is_constrained(key):
+                for con in constraints:
+                    gi[dims[con[0]]+con[1]] = con[2]
+            bs = np.concatenate([gi[dims[i]:dims[i+1]] for i in self.schur])
+            y = []
+            for i, lu, Asp_i in zip(self.primary, lus, Asp):
+                y.append(self.banded_solve(lu, gi[dims[i]:dims[i+1]]))
+                bs = bs - Asp_i.dot(y[-1])
+            xs = scipy_la.lu_solve(S, bs)
+            for i, yi, Wi in zip(self.primary, y, W):
+                gi[dims[i]:dims[i+1]] = yi - Wi.dot(xs)
+            offset = 0
+            for i in self.schur:
+                n = dims[i+1]-dims[i]
+                gi[dims[i]:dims[i+1]] = xs[offset:offset+n]
+                offset += n
+            u = u.copy_from_flattened(gi, key, dims, sl)
+        return u
@@ -311,6 +311,7 @@ class Orthogonal(JacobiBase):
 
         self.si = islicedict(axis=self.axis, dimensions=U.ndim)
         self.sl = slicedict(axis=self.axis, dimensions=U.ndim)
+        self._plan_transform_cache()
 
 
 CompositeBase = getCompositeBase(Orthogonal)
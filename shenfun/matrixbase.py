@@ -3,6 +3,8 @@ This module contains classes for working with sparse matrices.
 
 """
 from __future__ import division
+import os
+import hashlib
 import functools
 from copy import copy, deepcopy
 from collections.abc import Mapping, MutableMapping
@@ -80,9 +82,11 @@ class SparseMatrix(MutableMapping):
         self._storage = {si[0]: si[1] for si in sorted_dict}
         self.shape = shape
         self._diags = dia_matrix((1, 1))
+        self._cache = {}
         self.scale = scale
         self._matvec_methods = []
         self.solver = None
+        self._solver_key = None
 
     def matvec(self, v, c, format=None, axis=0):
         """Matrix vector product
@@ -163,18 +167,80 @@ class SparseMatrix(MutableMapping):
         Note
         ----
         This method returns the matrix scaled by self.scale if keyword scaled
-        is True.
+        is True. The unscaled matrix is computed from :meth:`banded` and
+        cached for each format until the matrix is modified, so the returned
+        matrix is always a copy that may be modified freely.
 
         """
         format = config['matrix']['sparse']['diags'] if format is None else format
-        self.sort()
-        self._diags = sp_diags(list(self.values()),
-                               list(self.keys()),
-                               shape=self.shape, format=format)
+        key = (format, tuple(self.shape))
+        if key not in self._cache:
+            if format == 'dia':
+                (l, u), ab = self.banded()
+                N, M = self.shape
+                keys = np.array(sorted(self.keys()), dtype=int)
+                W = max([min(N+k, M-k)+max(0, k) for k in keys]+[0])
+                self._cache[key] = dia_matrix((ab[u-keys, :W], keys), shape=self.shape)
+            else:
+                self._cache[key] = self.diags('dia', False).asformat(format)
+        self._diags = self._cache[key]
+        if not scaled:
+            return self._diags.copy()
         scale = self.scale
         if isinstance(scale, np.ndarray):
             scale = np.atleast_1d(scale).item()
-        return self._diags*scale if scaled else self._diags
+        return self._diags*scale
+
+    def banded(self):
+        """Return unscaled matrix in contiguous LAPACK banded storage
+
+        Returns
+        -------
+        2-tuple
+            - (l, u) - The number of nonzero sub- and superdiagonals
+            - ab - Array of shape (l+u+1, self.shape[1]), where
+              ``ab[u+i-j, j] = A[i, j]``
+
+        Note
+        ----
+        The banded array is computed once for each shape and reused until
+        the matrix is modified. The cached array is read-only, so make a
+        copy before modifying it, e.g., for :func:`scipy.linalg.solve_banded`
+        with ``overwrite_ab=True``.
+
+        """
+        cache_key = ('banded', tuple(self.shape))
+        if cache_key not in self._cache:
+            self.sort()
+            N, M = self.shape
+            keys = list(self.keys())
+            vals = [np.atleast_1d(self[key]) for key in keys]
+            u = max([0]+keys)
+            l = -min([0]+keys)
+            dtype = np.common_type(*vals) if len(vals) > 0 else float
+            ab = np.zeros((l+u+1, M), dtype=dtype)
+            for key, val in zip(keys, vals):
+                j = max(0, key)
+                n = min(N+key, M-key, N, M)
+                if n > 0:
+                    ab[u-key, j:j+n] = val[..., :n]
+            ab.flags.writeable = False
+            self._cache[cache_key] = ((l, u), ab)
+        return self._cache[cache_key]
+
+    def get_hash(self):
+        """Return hash of the shape and the unscaled diagonals of self
+
+        The hash is computed once and reused until the matrix is modified.
+        """
+        if 'hash' not in self._cache:
+            h = hashlib.sha1(str((tuple(self.shape), list(self.keys()))).encode())
+            for key in self.keys():
+                val = np.ascontiguousarray(np.atleast_1d(self[key]))
+                h.update(val.dtype.char.encode())
+                h.update(val.tobytes())
+            self._cache['hash'] = h.hexdigest()
+        return self._cache['hash']
 
     def sort(self):
         self._storage = {si[0]: si[1] for si in sorted(self.items())}
@@ -186,9 +252,11 @@ class SparseMatrix(MutableMapping):
         return v
 
     def __delitem__(self, key):
+        self._cache.clear()
         del self._storage[key]
 
     def __setitem__(self, key, val):
+        self._cache.clear()
         self._storage[key] = val
 
     def __iter__(self):
@@ -399,6 +467,7 @@ class SparseMatrix(MutableMapping):
             return
         if hasattr(self, '_keyscale'):
             self._keyscale *= self.scale
+            self._cache.clear()
         else:
             for key, val in self.items():
                 self[key] = val*self.scale
@@ -430,12 +499,24 @@ class SparseMatrix(MutableMapping):
         ----
         Vectors may be one- or multidimensional.
 
+        The solver is created on the first call and reused for as long as
+        the matrix, its scale and the constrained rows are unchanged.
+
         """
-        if self.solver is None:
+        key = self._get_solver_key(constraints)
+        if self.solver is None or key != self._solver_key:
             self.solver = self.get_solver()(self)
         u = self.solver(b, u=u, axis=axis, constraints=constraints)
+        # Constraints may modify self, so store key of modified matrix
+        self._solver_key = self._get_solver_key(constraints)
         return u
 
+    def _get_solver_key(self, constraints=()):
+        scale = self.scale
+        if isinstance(scale, np.ndarray):
+            scale = np.atleast_1d(scale).item()
+        return (self.get_hash(), scale, tuple(row for row, _ in constraints))
+
     def get_solver(self):
         """Return appropriate solver for self
 
@@ -636,10 +717,23 @@ class SpectralMatrix(SparseMatrix):
             assemble = 'quadrature'
         d = {}
         _assembly_method = assemble
-        if assemble == 'exact':
+        cache_key = None
+        if config['matrix']['cache']['use']:
+            cache_key = _get_cache_key(self, test, trial, measure, assemble,
+                                       kind, fixed_resolution)
+            d, _assembly_method = _load_cached_matrix(cache_key, _assembly_method)
+            if d is not None:
+                assemble = 'cached'
+            else:
+                d = {}
+        if assemble == 'cached':
+            pass
+        elif assemble == 'exact':
             d = self.assemble(assemble) # Look for implemented exact matrix
             if d is None:
                 d = _get_matrix(test, trial, measure, assemble=assemble)
+            else:
+                _assembly_method += '_implemented'
         elif assemble == 'adaptive':
             d = _get_matrix(test, trial, measure, assemble=assemble)
         else:
@@ -689,6 +783,9 @@ class SpectralMatrix(SparseMatrix):
                 elif kind == 'vandermonde':
                     d = _get_matrix(test, trial, measure, assemble='quadrature', fixed_resolution=fixed_resolution)
                     _assembly_method += '_vandermonde'
+        if cache_key is not None and assemble != 'cached':
+            if not _assembly_method.endswith('_implemented'):
+                _store_cached_matrix(cache_key, d, _assembly_method)
         if test[0].domain_factor() != 1:
             scale *= float(test[0].domain_factor())**(test[1]+trial[1]-1)
         SparseMatrix.__init__(self, d, shape, scale)
@@ -1168,6 +1265,57 @@ class BlockMatrix:
         tpmat = self.get_mats(True)
         return np.setxor1d(tpmat.naxes, range(tpmat.dimensions)).astype(int)
 
+    def block_diags(self, i, j, it=None, format=None):
+        """Return block (i, j) in scipy sparse format
+
+        Parameters
+        ----------
+        i, j : int
+            Block row and column
+        it : n-tuple of ints or None, optional
+            where n is dimensions-1. These are the indices into the diagonal
+            axes, or the axes with Fourier bases.
+        format : str or None, optional
+            The format of the returned matrix. See `Scipy sparse matrices <https://docs.scipy.org/doc/scipy/reference/sparse.html>`_
+            If None, then use default for :class:`.TPMatrix`.
+
+        Returns
+        -------
+        Scipy sparse matrix or None if the block is empty
+        """
+        from .spectralbase import MixedFunctionSpace
+        mij = self.mats[i][j]
+        if isinstance(mij, Number):
+            return None
+        m = mij[0]
+        if isinstance(self.testbase, MixedFunctionSpace) or len(m.naxes) == len(m.mats) or len(m.naxes) == 0:
+            d = m.diags(format)
+            for mj in mij[1:]:
+                d = d + mj.diags(format)
+
+        elif len(m.naxes) == 2: # 2 non-periodic directions
+            iit = np.where(np.array(m.scale.shape) == 1, 0, it) # if shape is 1 use index 0, else use given index (shape=1 means the scale is constant in that direction)
+            d = m.scale[tuple(iit)]*kron(m.mats[m.naxes[0]].diags(format=format), m.mats[m.naxes[1]].diags(format=format))
+            for mj in mij[1:]:
+                iit = np.where(np.array(mj.scale.shape) == 1, 0, it)
+                sc = mj.scale[tuple(iit)]
+                d = d + sc*kron(mj.mats[mj.naxes[0]].diags(format=format), mj.mats[mj.naxes[1]].diags(format=format))
+
+        else:
+            assert len(m.naxes) == 1
+            iit = np.zeros(m.dimensions, dtype=int)
+            diagonal_axes = self.get_diagonal_axes()
+            assert len(diagonal_axes) + len(m.naxes) == m.dimensions
+            iit[diagonal_axes] = it
+            ij = np.where(np.array(m.scale.shape) == 1, 0, iit) # if shape is 1 use index 0, else use given index (shape=1 means the scale is constant in that direction)
+            sc = m.scale[tuple(ij)]
+            d = sc*m.mats[m.naxes[0]].diags(format)
+            for mj in mij[1:]:
+                ij = np.where(np.array(mj.scale.shape) == 1, 0, iit)
+                sc = mj.scale[tuple(ij)]
+                d = d + sc*mj.mats[mj.naxes[0]].diags(format)
+        return d
+
     def diags(self, it=None, format=None):
         """Return global block matrix in scipy sparse format
 
@@ -1184,44 +1332,13 @@ class BlockMatrix:
             If None, then use default for :class:`.TPMatrix`.
 
         """
-        from .spectralbase import MixedFunctionSpace
         if self.contains_bc_matrix() and self.contains_regular_matrix():
             raise RuntimeError('diags only works for pure boundary or pure regular matrices. Consider splitting this BlockMatrix using :func:`.BlockMatrices`')
         bm = []
-        for mi in self.mats:
+        for i, mi in enumerate(self.mats):
             bm.append([])
-            for mij in mi:
-                if isinstance(mij, Number):
-                    bm[-1].append(None)
-                else:
-                    m = mij[0]
-                    if isinstance(self.testbase, MixedFunctionSpace) or len(m.naxes) == len(m.mats) or len(m.naxes) == 0:
-                        d = m.diags(format)
-                        for mj in mij[1:]:
-                            d = d + mj.diags(format)
-
-                    elif len(m.naxes) == 2: # 2 non-periodic directions
-                        iit = np.where(np.array(m.scale.shape) == 1, 0, it) # if shape is 1 use index 0, else use given index (shape=1 means the scale is constant in that direction)
-                        d = m.scale[tuple(iit)]*kron(m.mats[m.naxes[0]].diags(format=format), m.mats[m.naxes[1]].diags(format=format))
-                        for mj in mij[1:]:
-                            iit = np.where(np.array(mj.scale.shape) == 1, 0, it)
-                            sc = mj.scale[tuple(iit)]
-                            d = d + sc*kron(mj.mats[mj.naxes[0]].diags(format=format), mj.mats[mj.naxes[1]].diags(format=format))
-
-                    else:
-                        assert len(m.naxes) == 1
-                        iit = np.zeros(m.dimensions, dtype=int)
-                        diagonal_axes = self.get_diagonal_axes()
-                        assert len(diagonal_axes) + len(m.naxes) == m.dimensions
-                        iit[diagonal_axes] = it
-                        ij = np.where(np.array(m.scale.shape) == 1, 0, iit) # if shape is 1 use index 0, else use given index (shape=1 means the scale is constant in that direction)
-                        sc = m.scale[tuple(ij)]
-                        d = sc*m.mats[m.naxes[0]].diags(format)
-                        for mj in mij[1:]:
-                            ij = np.where(np.array(mj.scale.shape) == 1, 0, iit)
-                            sc = mj.scale[tuple(ij)]
-                            d = d + sc*mj.mats[mj.naxes[0]].diags(format)
-                    bm[-1].append(d)
+            for j in range(len(mi)):
+                bm[-1].append(self.block_diags(i, j, it, format))
         return bmat(bm, format=format)
 
     def solve(self, b, u=None, constraints=()):
@@ -1324,6 +1441,9 @@ class TPMatrix:
         self.testbase = testbase
         self.trialbase = trialbase
         self._issimplified = False
+        self._transfer = {}
+        self._solver = None
+        self._solver_key = None
 
     def get_simplified(self):
         diagonal_axes = np.setxor1d(self.naxes, range(self.space.dimensions)).astype(int)
@@ -1423,17 +1543,29 @@ class TPMatrix:
             d = np.where(np.isfinite(d), d, 0)
             u[sl] = b[sl] * d[sl]
 
-        elif len(tpmat.naxes) == 1:
-            from shenfun.la import SolverGeneric1ND
-            H = SolverGeneric1ND([tpmat])
-            u = H(b, u, constraints=constraints)
-
-        elif len(tpmat.naxes) == 2:
-            from shenfun.la import SolverGeneric2ND
-            H = SolverGeneric2ND([tpmat])
-            u = H(b, u, constraints=constraints)
+        elif len(tpmat.naxes) in (1, 2):
+            from shenfun.la import SolverGeneric1ND, SolverGeneric2ND
+            key = self._get_solver_key(constraints)
+            if self._solver is None or key != self._solver_key:
+                sol = SolverGeneric1ND if len(tpmat.naxes) == 1 else SolverGeneric2ND
+                self._solver = sol([tpmat])
+            u = self._solver(b, u, constraints=constraints)
+            # Constraints may modify the matrices, so store key after solve
+            self._solver_key = self._get_solver_key(constraints)
         return u
 
+    def _get_solver_key(self, constraints=()):
+        """Return key identifying the content of self and the constraints"""
+        rows = tuple(tuple(c[:-1]) for c in constraints)
+        h = hashlib.sha1(str((rows, self.global_index)).encode())
+        for mat in self.mats:
+            h.update(mat.get_hash().encode())
+            h.update(np.asarray(mat.scale).tobytes())
+        scale = np.asarray(self.scale)
+        h.update(str((scale.shape, scale.dtype.char)).encode())
+        h.update(np.ascontiguousarray(scale).tobytes())
+        return h.hexdigest()
+
     def matvec(self, v, c, format=None):
         tpmat = self.get_simplified()
         c.fill(0)
@@ -1449,12 +1581,45 @@ class TPMatrix:
             c[:] = c*tpmat.scale
         elif len(tpmat.naxes) == 2:
             # 2 non-periodic directions (may be non-aligned in second axis, hence transfers)
-            npaxes = deepcopy(list(tpmat.naxes))
+            transAB, cB, cC, axis, second_axis = self._get_transfer(tpmat, c.dtype)[:5]
+            bb = tpmat.mats[axis]
+            c = bb.matvec(v, c, format=format, axis=axis)
+            # align in second non-periodic axis
+            transAB.forward(c, cB)
+            bb = tpmat.mats[second_axis]
+            cC = bb.matvec(cB, cC, format=format, axis=second_axis)
+            transAB.backward(cC, c)
+            c *= tpmat.scale
+
+        return c
+
+    def _get_transfer(self, tpmat, dtype):
+        """Return transfer object and work arrays used by :meth:`matvec`
+
+        The returned objects are created on the first call, and then stored
+        for the lifetime of self, or until :meth:`destroy` is called.
+
+        Parameters
+        ----------
+        tpmat : :class:`.TPMatrix`
+            The simplified version of self
+        dtype : np.dtype
+            The datatype of the arrays to transfer
+
+        Returns
+        -------
+        6-tuple
+            The transfer object, two work arrays aligned in the second
+            nondiagonal axis, the two nondiagonal axes, and the unplanned
+            space created if self.space is padded (None otherwise)
+        """
+        key = np.dtype(dtype).char
+        if key not in self._transfer:
+            npaxes = list(tpmat.naxes)
             space = tpmat.space
-            newspace = False
+            newspace = None
             if space.forward.input_array.shape != space.forward.output_array.shape:
-                space = space.get_unplanned(True) # in case self.space is padded
-                newspace = True
+                space = newspace = space.get_unplanned(True) # in case self.space is padded
 
             pencilA = space.forward.output_pencil
             subcomms = [s.Get_size() for s in pencilA.subcomm]
@@ -1463,22 +1628,19 @@ class TPMatrix:
             npaxes.remove(axis)
             second_axis = npaxes[0]
             pencilB = pencilA.pencil(second_axis)
-            transAB = pencilA.transfer(pencilB, c.dtype.char)
-            cB = np.zeros(transAB.subshapeB, dtype=c.dtype)
-            cC = np.zeros(transAB.subshapeB, dtype=c.dtype)
-            bb = tpmat.mats[axis]
-            c = bb.matvec(v, c, format=format, axis=axis)
-            # align in second non-periodic axis
-            transAB.forward(c, cB)
-            bb = tpmat.mats[second_axis]
-            cC = bb.matvec(cB, cC, format=format, axis=second_axis)
-            transAB.backward(cC, c)
-            c *= tpmat.scale
+            transAB = pencilA.transfer(pencilB, key)
+            cB = np.zeros(transAB.subshapeB, dtype=key)
+            cC = np.zeros(transAB.subshapeB, dtype=key)
+            self._transfer[key] = (transAB, cB, cC, axis, second_axis, newspace)
+        return self._transfer[key]
+
+    def destroy(self):
+        """Destroy MPI transfer objects and work arrays stored by :meth:`matvec`"""
+        for transAB, _, _, _, _, space in self._transfer.values():
             transAB.destroy()
-            if newspace:
+            if space is not None:
                 space.destroy()
-
-        return c
+        self._transfer = {}
 
     def get_key(self):
         naxis = self.space.get_nondiagonal_axes()
@@ -1792,6 +1954,74 @@ def extract_bc_matrices(mats):
                 a.remove(b)
     return bc_mats
 
+def _basis_signature(basis):
+    """Return string uniquely describing the 1D basis `basis` for caching"""
+    sig = [basis.__class__.__module__, basis.__class__.__name__, basis.N,
+           basis.quad, basis.dim(), str(basis.domain), np.dtype(basis.dtype).str]
+    for attr in ('alpha', 'beta', '_scaled'):
+        sig.append(str(getattr(basis, attr, None)))
+    bcs = getattr(basis, 'bcs', None)
+    sig.append(str(bcs) if bcs is None else str(dict(bcs)))
+    return '|'.join([str(si) for si in sig])
+
+def _get_cache_key(mat, test, trial, measure, assemble, kind, fixed_resolution):
+    """Return content-addressed key for a :class:`.SpectralMatrix`
+
+    Used by the optional disk cache, see ``config['matrix']['cache']``.
+    """
+    sig = '/'.join([mat.__class__.__module__+'.'+mat.__class__.__name__,
+                    _basis_signature(test[0]), str(test[1]),
+                    _basis_signature(trial[0]), str(trial[1]),
+                    sp.srepr(sp.sympify(measure)), str(assemble), str(kind),
+                    str(fixed_resolution), config['bases']['jacobi']['mode']])
+    return hashlib.sha1(sig.encode('utf-8')).hexdigest()
+
+def _cache_filename(key):
+    path = os.path.expanduser(os.path.expandvars(config['matrix']['cache']['directory']))
+    return os.path.join(path, key+'.npz')
+
+def _load_cached_matrix(key, method):
+    """Return diagonals and assembly method of a cached matrix
+
+    Returns (None, method) if no matrix with `key` has been stored.
+    """
+    filename = _cache_filename(key)
+    if not os.path.isfile(filename):
+        return None, method
+    try:
+        with np.load(filename, allow_pickle=False) as f:
+            method = str(f['method'])
+            d = {}
+            for k in f.files:
+                if k == 'method':
+                    continue
+                v = f[k]
+                d[int(k[1:])] = v.item() if v.ndim == 0 else v
+    except (OSError, ValueError, KeyError): # pragma: no cover
+        return None, method
+    return d, method
+
+def _store_cached_matrix(key, d, method):
+    """Store diagonals `d` of matrix with `key` in a compressed npz-file
+
+    Only rank 0 of MPI.COMM_WORLD writes. The file is written to a temporary
+    name and then atomically renamed, such that concurrent runs never see a
+    partially written matrix.
+    """
+    if comm.Get_rank() > 0:
+        return
+    if not all(np.asarray(v).dtype.kind in 'biufc' for v in d.values()):
+        return
+    filename = _cache_filename(key)
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmpname = filename[:-4]+'.%d.tmp.npz'%(os.getpid())
+        np.savez_compressed(tmpname, method=np.array(method),
+                            **{'d%d'%(k): np.asarray(v) for k, v in d.items()})
+        os.replace(tmpname, filename)
+    except OSError: # pragma: no cover
+        pass
+
 def _get_matrix(test, trial, measure=1, assemble=None, fixed_resolution=None):
     """Return assembled matrix
 
@@ -10,7 +10,9 @@ from libcpp.vector cimport vector
 from libcpp.algorithm cimport copy
 from libc.stdlib cimport malloc, free
 from cpython cimport array
+from cython.parallel cimport prange
 import array
+from shenfun.config import config
 np.import_array()
 
 ctypedef fused T:
@@ -21,95 +23,132 @@ ctypedef fused T:
 #ctypedef double double
 #ctypedef np.int64_t int
 
-ctypedef void (*innerfunc)(complex*, int, double*, int, int)
-ctypedef void (*funcT)(T*, int, double*, int, int)
+ctypedef void (*innerfunc)(complex*, int, double*, int, int) noexcept nogil
+ctypedef void (*funcT)(T*, int, double*, int, int) noexcept nogil
+
+# The independent 1D solves along all axes but one may be distributed over
+# config['optimization']['threads'] OpenMP threads. Each line is solved by
+# the same serial code, so the result is independent of the number of threads.
+
+cdef int get_num_threads():
+    return max(1, int(config['optimization']['threads']))
 
 # XXX_Solve - Solve multidimensional array u along axis
 
+def Solve_axis_ND(u, data, axis, sol):
+    """Solve array u of more than 3 dimensions along axis
+
+    Loop over one axis different from axis and solve the remaining
+    lower-dimensional arrays with the solver sol.
+    """
+    ax = 0 if axis > 0 else 1
+    s = [slice(None)]*u.ndim
+    for i in range(u.shape[ax]):
+        s[ax] = i
+        sol(u[tuple(s)], data, axis-1 if axis > ax else axis)
+
 def ThreeDMA_Solve(u, data, axis):
+    if u.ndim > 3:
+        Solve_axis_ND(u, data, axis, ThreeDMA_Solve)
+        return
     if u.dtype.char in 'FDG':
         if u.ndim == 1:
             ThreeDMA_inner_solve[complex](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[complex](u, data, ThreeDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[complex](u, data, ThreeDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[complex](u, data, ThreeDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[complex](u, data, ThreeDMA_inner_solve_ptr, axis, get_num_threads())
     else:
         if u.ndim == 1:
             ThreeDMA_inner_solve[double](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[double](u, data, ThreeDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[double](u, data, ThreeDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[double](u, data, ThreeDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[double](u, data, ThreeDMA_inner_solve_ptr, axis, get_num_threads())
 
 def TwoDMA_Solve(u, data, axis):
+    if u.ndim > 3:
+        Solve_axis_ND(u, data, axis, TwoDMA_Solve)
+        return
     if u.dtype.char in 'FDG':
         if u.ndim == 1:
             TwoDMA_inner_solve[complex](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[complex](u, data, TwoDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[complex](u, data, TwoDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[complex](u, data, TwoDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[complex](u, data, TwoDMA_inner_solve_ptr, axis, get_num_threads())
     else:
         if u.ndim == 1:
             TwoDMA_inner_solve[double](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[double](u, data, TwoDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[double](u, data, TwoDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[double](u, data, TwoDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[double](u, data, TwoDMA_inner_solve_ptr, axis, get_num_threads())
 
 def PDMA_Solve(u, data, axis):
+    if u.ndim > 3:
+        Solve_axis_ND(u, data, axis, PDMA_Solve)
+        return
     if u.dtype.char in 'FDG':
         if u.ndim == 1:
             PDMA_inner_solve[complex](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[complex](u, data, PDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[complex](u, data, PDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[complex](u, data, PDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[complex](u, data, PDMA_inner_solve_ptr, axis, get_num_threads())
     else:
         if u.ndim == 1:
             PDMA_inner_solve[double](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[double](u, data, PDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[double](u, data, PDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[double](u, data, PDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[double](u, data, PDMA_inner_solve_ptr, axis, get_num_threads())
 
 def TDMA_Solve(u, data, axis):
+    if u.ndim > 3:
+        Solve_axis_ND(u, data, axis, TDMA_Solve)
+        return
     if u.dtype.char in 'FDG':
         if u.ndim == 1:
             TDMA_inner_solve[complex](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[complex](u, data, TDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[complex](u, data, TDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[complex](u, data, TDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[complex](u, data, TDMA_inner_solve_ptr, axis, get_num_threads())
     else:
         if u.ndim == 1:
             TDMA_inner_solve[double](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[double](u, data, TDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[double](u, data, TDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[double](u, data, TDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[double](u, data, TDMA_inner_solve_ptr, axis, get_num_threads())
 
 def TDMA_O_Solve(u, data, axis):
+    if u.ndim > 3:
+        Solve_axis_ND(u, data, axis, TDMA_O_Solve)
+        return
     if u.dtype.char in 'FDG':
         if u.ndim == 1:
             TDMA_O_inner_solve[complex](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[complex](u, data, TDMA_O_inner_solve_ptr, axis)
+            Solve_axis_2D[complex](u, data, TDMA_O_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[complex](u, data, TDMA_O_inner_solve_ptr, axis)
+            Solve_axis_3D[complex](u, data, TDMA_O_inner_solve_ptr, axis, get_num_threads())
     else:
         if u.ndim == 1:
             TDMA_O_inner_solve[double](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[double](u, data, TDMA_O_inner_solve_ptr, axis)
+            Solve_axis_2D[double](u, data, TDMA_O_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[double](u, data, TDMA_O_inner_solve_ptr, axis)
+            Solve_axis_3D[double](u, data, TDMA_O_inner_solve_ptr, axis, get_num_threads())
 
 cpdef DiagMA_Solve(u, double[:, ::1] data, int axis):
     cdef:
         int n = u.ndim
 
+    if n > 3:
+        Solve_axis_ND(u, data, axis, DiagMA_Solve)
+        return
     if u.dtype.char in 'FDG':
         if n == 1:
             DiagMA_inner_solve[complex](u, data)
@@ -163,36 +202,42 @@ cpdef DiagMA_Solve_3D(np.ndarray[T, ndim=3] u, double[:, ::1] data, int axis):
 
 
 def FDMA_Solve(u, data, axis):
+    if u.ndim > 3:
+        Solve_axis_ND(u, data, axis, FDMA_Solve)
+        return
     if u.dtype.char in 'FDG':
         if u.ndim == 1:
             FDMA_inner_solve[complex](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[complex](u, data, FDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[complex](u, data, FDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[complex](u, data, FDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[complex](u, data, FDMA_inner_solve_ptr, axis, get_num_threads())
     else:
         if u.ndim == 1:
             FDMA_inner_solve[double](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[double](u, data, FDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[double](u, data, FDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[double](u, data, FDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[double](u, data, FDMA_inner_solve_ptr, axis, get_num_threads())
 
 def HeptaDMA_Solve(u, data, axis):
+    if u.ndim > 3:
+        Solve_axis_ND(u, data, axis, HeptaDMA_Solve)
+        return
     if u.dtype.char in 'FDG':
         if u.ndim == 1:
             HeptaDMA_inner_solve[complex](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[complex](u, data, HeptaDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[complex](u, data, HeptaDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[complex](u, data, HeptaDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[complex](u, data, HeptaDMA_inner_solve_ptr, axis, get_num_threads())
     else:
         if u.ndim == 1:
             HeptaDMA_inner_solve[double](u, data)
         elif u.ndim == 2:
-            Solve_axis_2D[double](u, data, HeptaDMA_inner_solve_ptr, axis)
+            Solve_axis_2D[double](u, data, HeptaDMA_inner_solve_ptr, axis, get_num_threads())
         elif u.ndim == 3:
-            Solve_axis_3D[double](u, data, HeptaDMA_inner_solve_ptr, axis)
+            Solve_axis_3D[double](u, data, HeptaDMA_inner_solve_ptr, axis, get_num_threads())
 
 # LU - decomposition
 
@@ -426,44 +471,50 @@ cdef void SolverGeneric1ND_solve_2D(complex[:, ::1] u, double[:, :, ::1] data, i
             sol(&u[i, 0], st, &data[i, 0, 0], data.shape[1], data.shape[2])
 
 @cython.cdivision(True)
-cdef void Solve_axis_3D(T[:, :, ::1] u, double[:, ::1] data, funcT sol, int naxes):
+cdef void Solve_axis_3D(T[:, :, ::1] u, double[:, ::1] data, funcT sol, int naxes, int threads):
     cdef:
-        int i, j, st
+        int i, j, st, m0, m1
+        double* dp = &data[0, 0]
 
     st = u.strides[naxes]/u.itemsize
+    m0 = data.shape[0]
+    m1 = data.shape[1]
     if naxes == 0:
-        for i in range(u.shape[1]):
+        for i in prange(u.shape[1], nogil=True, schedule='static', num_threads=threads):
             for j in range(u.shape[2]):
-                sol(&u[0, i, j], st, &data[0, 0], data.shape[0], data.shape[1])
+                sol(&u[0, i, j], st, dp, m0, m1)
 
     elif naxes == 1:
-        for i in range(u.shape[0]):
+        for i in prange(u.shape[0], nogil=True, schedule='static', num_threads=threads):
             for j in range(u.shape[2]):
-                sol(&u[i, 0, j], st, &data[0, 0], data.shape[0], data.shape[1])
+                sol(&u[i, 0, j], st, dp, m0, m1)
 
     elif naxes == 2:
-        for i in range(u.shape[0]):
+        for i in prange(u.shape[0], nogil=True, schedule='static', num_threads=threads):
             for j in range(u.shape[1]):
-                sol(&u[i, j, 0], st, &data[0, 0], data.shape[0], data.shape[1])
+                sol(&u[i, j, 0], st, dp, m0, m1)
 
 @cython.cdivision(True)
-cdef void Solve_axis_2D(T[:, ::1] u, double[:, ::1] data, funcT sol, int naxes):
+cdef void Solve_axis_2D(T[:, ::1] u, double[:, ::1] data, funcT sol, int naxes, int threads):
     cdef:
-        int i, j, st
+        int i, st, m0, m1
+        double* dp = &data[0, 0]
 
     st = u.strides[naxes]/u.itemsize
+    m0 = data.shape[0]
+    m1 = data.shape[1]
     if naxes == 0:
-        for i in range(u.shape[1]):
-            sol(&u[0, i], st, &data[0, 0], data.shape[0], data.shape[1])
+        for i in prange(u.shape[1], nogil=True, schedule='static', num_threads=threads):
+            sol(&u[0, i], st, dp, m0, m1)
     elif naxes == 1:
-        for i in range(u.shape[0]):
-            sol(&u[i, 0], st, &data[0, 0], data.shape[0], data.shape[1])
+        for i in prange(u.shape[0], nogil=True, schedule='static', num_threads=threads):
+            sol(&u[i, 0], st, dp, m0, m1)
 
 cpdef HeptaDMA_inner_solve(T[:] u, double[:, ::1] data):
     HeptaDMA_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void HeptaDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void HeptaDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int n = m1
         int k
@@ -493,7 +544,7 @@ cpdef PDMA_inner_solve(T[:] u, double[:, ::1] data):
     PDMA_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void PDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void PDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int n = m1
         int k
@@ -517,7 +568,7 @@ cpdef TDMA_inner_solve(T[:] u, double[:, ::1] data):
     TDMA_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void TDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void TDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int n = m1
         int i
@@ -535,7 +586,7 @@ cpdef TDMA_O_inner_solve(T[:] u, double[:, ::1] data):
     TDMA_O_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void TDMA_O_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void TDMA_O_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int n = m1
         int i
@@ -552,7 +603,7 @@ cpdef TwoDMA_inner_solve(T[:] u, double[:, ::1] data):
     TwoDMA_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void TwoDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void TwoDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int i, n = m1
         double* d = &data[0]
@@ -566,7 +617,7 @@ cpdef ThreeDMA_inner_solve(T[:] u, double[:, ::1] data):
     ThreeDMA_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void ThreeDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void ThreeDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int i, n = m1
         double* d = &data[0]
@@ -583,7 +634,7 @@ cpdef DiagMA_inner_solve(T[:] u, double[:, ::1] data):
     DiagMA_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void DiagMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void DiagMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int i
     for i in range(m1):
@@ -593,7 +644,7 @@ cpdef FDMA_inner_solve(T[:] u, double[:, ::1] data):
     FDMA_inner_solve_ptr[T](&u[0], u.strides[0]/u.itemsize, &data[0, 0], data.shape[0], data.shape[1])
 
 @cython.cdivision(True)
-cdef void FDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1):
+cdef void FDMA_inner_solve_ptr(T* u, int st, double* data, int m0, int m1) noexcept nogil:
     cdef:
         int i
         int n = m1
@@ -877,7 +928,7 @@ cdef void Solve_Helmholtz_1D_ptr(T* fk,
                                  double* L,
                                  T* y,
                                  int N,
-                                 int strides) nogil:
+                                 int strides) noexcept nogil:
     cdef:
         int i, j, st, ii, jj
         T sum_even = 0.0
@@ -921,29 +972,34 @@ def Solve_Helmholtz_3D_ptr(np.int64_t axis,
                            double[:,:,::1] L):
     cdef:
         vector[T] y
-        int i, j, k, strides, N
+        T* yp
+        int i, j, k, strides, N, M
+        int threads = get_num_threads()
 
     strides = fk.strides[axis]/fk.itemsize
     N = d0.shape[axis] - 2
-    y.resize(N)
+    # One work vector for each line of the (parallel) outer loop
+    M = d0.shape[1] if axis == 0 else d0.shape[0]
+    y.resize(N*M)
+    yp = &y[0]
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in prange(d0.shape[1], nogil=True, schedule='static', num_threads=threads):
             for k in range(d0.shape[2]):
                 Solve_Helmholtz_1D_ptr(&fk[0,j,k], &u_hat[0,j,k], neumann, &d0[0,j,k],
-                                       &d1[0,j,k], &d2[0,j,k], &L[0,j,k], &y[0], N,
+                                       &d1[0,j,k], &d2[0,j,k], &L[0,j,k], yp+j*N, N,
                                        strides)
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in prange(d0.shape[0], nogil=True, schedule='static', num_threads=threads):
             for k in range(d0.shape[2]):
                 Solve_Helmholtz_1D_ptr(&fk[i,0,k], &u_hat[i,0,k], neumann, &d0[i,0,k],
-                                       &d1[i,0,k], &d2[i,0,k], &L[i,0,k], &y[0], N,
+                                       &d1[i,0,k], &d2[i,0,k], &L[i,0,k], yp+i*N, N,
                                        strides)
 
     elif axis == 2:
-        for i in range(d0.shape[0]):
+        for i in prange(d0.shape[0], nogil=True, schedule='static', num_threads=threads):
             for j in range(d0.shape[1]):
                 Solve_Helmholtz_1D_ptr(&fk[i,j,0], &u_hat[i,j,0], neumann, &d0[i,j,0],
-                                       &d1[i,j,0], &d2[i,j,0], &L[i,j,0], &y[0], N,
+                                       &d1[i,j,0], &d2[i,j,0], &L[i,j,0], yp+i*N, N,
                                        strides)
 
 def Solve_Helmholtz_2D_ptr(np.int64_t axis,
@@ -956,20 +1012,25 @@ def Solve_Helmholtz_2D_ptr(np.int64_t axis,
                            double[:,::1] L):
     cdef:
         vector[T] y
-        int i, j, strides, N
+        T* yp
+        int i, j, strides, N, M
+        int threads = get_num_threads()
 
     strides = fk.strides[axis]/fk.itemsize
     N = d0.shape[axis] - 2
-    y.resize(N)
+    # One work vector for each line of the (parallel) loop
+    M = d0.shape[1] if axis == 0 else d0.shape[0]
+    y.resize(N*M)
+    yp = &y[0]
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in prange(d0.shape[1], nogil=True, schedule='static', num_threads=threads):
             Solve_Helmholtz_1D_ptr(&fk[0,j], &u_hat[0,j], neumann, &d0[0,j],
-                                   &d1[0,j], &d2[0,j], &L[0,j], &y[0], N,
+                                   &d1[0,j], &d2[0,j], &L[0,j], yp+j*N, N,
                                    strides)
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in prange(d0.shape[0], nogil=True, schedule='static', num_threads=threads):
             Solve_Helmholtz_1D_ptr(&fk[i,0], &u_hat[i,0], neumann, &d0[i,0],
-                                   &d1[i,0], &d2[i,0], &L[i,0], &y[0], N,
+                                   &d1[i,0], &d2[i,0], &L[i,0], yp+i*N, N,
                                    strides)
 
 def LU_Biharmonic(a0, alfa, beta, sii, siu, siuu, ail, aii, aiu,
@@ -1,5 +1,6 @@
 import numba as nb
 import numpy as np
+from .la import get_num_threads
 
 M_PI_2 = np.pi/2
 
@@ -21,6 +22,7 @@ def LU_Helmholtz(A, B, A_s, B_s, neumann, d0, d1, d2, L, axis):
 
 def Solve_Helmholtz(b, u, neumann, d0, d1, d2, L, axis):
     n = d0.ndim
+    nb.set_num_threads(get_num_threads())
     y = np.zeros(d0.shape[axis]-2).astype(u.dtype)
     if n == 1:
         Solve_Helmholtz_1D(b, u, neumann, d0, d1, d2, L, y)
@@ -183,37 +185,44 @@ def Solve_Helmholtz_1D(fk, u_hat, neumann, d0, d1, d2, L, y):
         for i in range(1, N):
             u_hat[i] /= (i*i)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Solve_Helmholtz_2D(fk, u_hat, neumann, d0, d1, d2, L, y, axis):
+    # Each line of the parallel loop needs its own work array y
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in nb.prange(d0.shape[1]):
+            yj = np.empty_like(y)
             Solve_Helmholtz_1D(fk[:, j], u_hat[:, j], neumann, d0[:, j],
-                               d1[:, j], d2[:, j], L[:, j], y)
+                               d1[:, j], d2[:, j], L[:, j], yj)
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
+            yi = np.empty_like(y)
             Solve_Helmholtz_1D(fk[i], u_hat[i], neumann, d0[i], d1[i], d2[i],
-                               L[i], y)
+                               L[i], yi)
 
-@nb.jit(nopython=True, fastmath=True, cache=True)
+@nb.jit(nopython=True, fastmath=True, cache=True, parallel=True)
 def Solve_Helmholtz_3D(fk, u_hat, neumann, d0, d1, d2, L, y, axis):
+    # Each line of the parallel loop needs its own work array y
     if axis == 0:
-        for j in range(d0.shape[1]):
+        for j in nb.prange(d0.shape[1]):
+            yj = np.empty_like(y)
             for k in range(d0.shape[2]):
                 Solve_Helmholtz_1D(fk[:, j, k], u_hat[:, j, k], neumann,
                                    d0[:, j, k], d1[:, j, k], d2[:, j, k],
-                                   L[:, j, k], y)
+                                   L[:, j, k], yj)
     elif axis == 1:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
+            yi = np.empty_like(y)
             for k in range(d0.shape[2]):
                 Solve_Helmholtz_1D(fk[i, :, k], u_hat[i, :, k], neumann,
                                    d0[i, :, k], d1[i, :, k], d2[i, :, k],
-                                   L[i, :, k], y)
+                                   L[i, :, k], yi)
     elif axis == 2:
-        for i in range(d0.shape[0]):
+        for i in nb.prange(d0.shape[0]):
+            yi = np.empty_like(y)
             for j in range(d0.shape[1]):
                 Solve_Helmholtz_1D(fk[i, j], u_hat[i, j], neumann,
                                    d0[i, j], d1[i, j], d2[i, j],
-                                   L[i, j], y)
+                                   L[i, j], yi)
 
 @nb.jit(nopython=True, fastmath=True, cache=True)
 def Helmholtz_matvec1D(v, b, alfa, beta, dd, ud, bd):
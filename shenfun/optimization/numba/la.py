@@ -1,5 +1,6 @@
 import numpy as np
 import numba as nb
+from shenfun.config import config
 
 __all__ = ['SolverGeneric1ND_solve_data',
            'Solve_axis_2D', 'Solve_axis_3D', 'Solve_axis_4D']
@@ -42,49 +43,70 @@ def SolverGeneric1ND_solve_data(u, data, sol, naxes, is_zero_index):
                     sol(u[i, j, :], data[i, j])
     return u
 
-@nb.jit(nopython=True, fastmath=True, cache=False)
+def get_num_threads():
+    """Return number of threads to use for independent 1D solves
+
+    Set by ``config['optimization']['threads']``. Each line is solved by the
+    same serial code, so results do not depend on the number of threads.
+    """
+    return max(1, min(int(config['optimization']['threads']),
+                      nb.config.NUMBA_NUM_THREADS))
+
 def Solve_axis_2D(data, x, innerfun, axis):
+    nb.set_num_threads(get_num_threads())
+    _Solve_axis_2D(data, x, innerfun, axis)
+
+def Solve_axis_3D(data, x, innerfun, axis):
+    nb.set_num_threads(get_num_threads())
+    _Solve_axis_3D(data, x, innerfun, axis)
+
+def Solve_axis_4D(data, x, innerfun, axis):
+    nb.set_num_threads(get_num_threads())
+    _Solve_axis_4D(data, x, innerfun, axis)
+
+@nb.jit(nopython=True, fastmath=True, cache=False, parallel=True)
+def _Solve_axis_2D(data, x, innerfun, axis):
     if axis == 0:
-        for j in range(x.shape[1]):
+        for j in nb.prange(x.shape[1]):
             innerfun(x[:, j], data)
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in nb.prange(x.shape[0]):
             innerfun(x[i, :], data)
 
-@nb.jit(nopython=True, fastmath=True, cache=False)
-def Solve_axis_3D(data, x, innerfun, axis):
+@nb.jit(nopython=True, fastmath=True, cache=False, parallel=True)
+def _Solve_axis_3D(data, x, innerfun, axis):
     if axis == 0:
-        for j in range(x.shape[1]):
+        for j in nb.prange(x.shape[1]):
             for k in range(x.shape[2]):
                 innerfun(x[:, j, k], data)
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in nb.prange(x.shape[0]):
             for k in range(x.shape[2]):
                 innerfun(x[i, :, k], data)
     elif axis == 2:
-        for i in range(x.shape[0]):
+        for i in nb.prange(x.shape[0]):
             for j in range(x.shape[1]):
                 innerfun(x[i, j], data)
 
-@nb.jit(nopython=True, fastmath=True, cache=False)
-def Solve_axis_4D(data, x, innerfun, axis):
+@nb.jit(nopython=True, fastmath=True, cache=False, parallel=True)
+def _Solve_axis_4D(data, x, innerfun, axis):
     if axis == 0:
-        for j in range(x.shape[1]):
+        for j in nb.prange(x.shape[1]):
             for k in range(x.shape[2]):
                 for l in range(x.shape[3]):
                     innerfun(x[:, j, k, l], data)
     elif axis == 1:
-        for i in range(x.shape[0]):
+        for i in nb.prange(x.shape[0]):
             for k in range(x.shape[2]):
                 for l in range(x.shape[3]):
                     innerfun(x[i, :, k, l], data)
     elif axis == 2:
-        for i in range(x.shape[0]):
+        for i in nb.prange(x.shape[0]):
             for j in range(x.shape[1]):
                 for l in range(x.shape[3]):
                     innerfun(x[i, j, :, l], data)
     elif axis == 3:
-        for i in range(x.shape[0]):
+        for i in nb.prange(x.shape[0]):
             for j in range(x.shape[1]):
                 for k in range(x.shape[2]):
                     innerfun(x[i, j, k], data)
@@ -14,10 +14,12 @@ See the [documentation](https://shenfun.readthedocs.io) for more details.
 """
 #pylint: disable=unused-argument, not-callable, no-self-use, protected-access, too-many-public-methods, missing-docstring
 
+import os
 import importlib
 import re
 import copy
 import importlib
+import functools
 from typing import NamedTuple
 from numbers import Number
 import sympy as sp
@@ -29,6 +31,103 @@ from .utilities import CachedArrayDict, split
 from .coordinates import Coordinates
 work = CachedArrayDict()
 xp = sp.Symbol('x', real=True)
+fftw_plans = {}
+
+def _plan_key(plan):
+    if isinstance(plan, functools.partial):
+        return (plan.func.__name__,) + tuple(sorted(plan.keywords.items()))
+    return (plan.__name__,)
+
+def get_fftw_plans(plan_fwd, plan_bck, shape, dtype, axes, threads, flags_fwd,
+                   flags_bck, s=None):
+    """Return planned forward and backward FFTW transforms
+
+    The backward transform uses the input array of the forward transform as
+    output array.
+
+    Parameters
+    ----------
+    plan_fwd, plan_bck : callables
+        Planners from :mod:`mpi4py_fft.fftw`, like :func:`.fftw.rfftn`
+    shape : sequence of ints
+        Shape of input array to forward transform
+    dtype : numpy.dtype
+        Type of input array to forward transform
+    axes : sequence of ints
+        Axes to transform over
+    threads : int
+        Number of threads used by FFTW
+    flags_fwd, flags_bck : sequence of ints
+        Flags for planning forward and backward transforms
+    s : sequence of ints, optional
+        Shape of transforms (Fourier only)
+
+    Note
+    ----
+    If config['fftw']['registry'] is True, then the planned transforms are
+    stored in a process-wide registry, and the transforms, along with their
+    aligned work arrays, are shared by all spaces with the same key (shape,
+    axes, dtype, kind, flags, threads). Arrays returned by transforms, when
+    no output array is provided, are then also shared between these spaces.
+    """
+    kw = {} if s is None else {'s': s}
+    key = (_plan_key(plan_fwd), _plan_key(plan_bck), tuple(shape), np.dtype(dtype).char,
+           tuple(axes), threads, tuple(flags_fwd), tuple(flags_bck), None if s is None else tuple(s))
+    use_registry = config['fftw']['registry']
+    if use_registry and key in fftw_plans:
+        return fftw_plans[key]
+    U = fftw.aligned(shape, dtype=dtype)
+    xfftn_fwd = plan_fwd(U, axes=axes, threads=threads, flags=flags_fwd, **kw)
+    V = xfftn_fwd.output_array
+    xfftn_bck = plan_bck(V, axes=axes, threads=threads, flags=flags_bck, output_array=U, **kw)
+    V.fill(0)
+    U.fill(0)
+    if use_registry:
+        fftw_plans[key] = (xfftn_fwd, xfftn_bck)
+    return xfftn_fwd, xfftn_bck
+
+def clear_fftw_plans():
+    """Remove all FFTW plans from the process-wide registry"""
+    fftw_plans.clear()
+
+def _wisdom_files(filename):
+    # One file per precision of the FFTW library and per rank
+    from mpi4py import MPI
+    rank = MPI.COMM_WORLD.Get_rank()
+    path, name = os.path.split(os.path.expanduser(filename))
+    return {key: os.path.join(path, '%s%d_%s' % (key, rank, name)) for key in fftw.fftlib}
+
+def import_fftw_wisdom(filename=None):
+    """Import FFTW wisdom for all precisions
+
+    Parameters
+    ----------
+    filename : str, optional
+        Defaults to config['fftw']['wisdom']['import']
+
+    Note
+    ----
+    Wisdom is stored in one file per rank and precision, with prefix
+    ``Fn_``, ``Dn_`` and ``Gn_``, where n is the rank. Wisdom can only be
+    imported using the same MPI configuration as used for exporting it.
+    """
+    filename = config['fftw']['wisdom']['import'] if filename is None else filename
+    for key, fl in _wisdom_files(filename).items():
+        e = fftw.fftlib[key].import_wisdom(bytearray(fl, 'utf-8'))
+        assert e == 1, "Not able to import wisdom {}".format(fl)
+
+def export_fftw_wisdom(filename=None):
+    """Export FFTW wisdom for all precisions
+
+    Parameters
+    ----------
+    filename : str, optional
+        Defaults to config['fftw']['wisdom']['export']
+    """
+    filename = config['fftw']['wisdom']['export'] if filename is None else filename
+    for key, fl in _wisdom_files(filename).items():
+        e = fftw.fftlib[key].export_wisdom(bytearray(fl, 'utf-8'))
+        assert e == 1, "Not able to export wisdom {}".format(fl)
 
 class Domain(NamedTuple):
     lower: Number
@@ -53,6 +152,8 @@ class SpectralBase:
             self.padding_factor = np.floor(N*padding_factor)/N if N > 0 else 1
         self.dealias_direct = dealias_direct
         self._mass = None         # Mass matrix (if needed)
+        self._transform_cache = {} # Constants used by transforms
+        self._tuned_kind = None   # Fastest transform kind, see TensorProductSpace.autotune
         self._dtype = dtype
         self._M = 1.0             # Normalization factor
         self._xfftn_fwd = None    # external forward transform function
@@ -210,6 +311,7 @@ class SpectralBase:
             - 'fast' - use fast transform if implemented
             - 'vandermonde' - use Vandermonde matrix
             - 'recursive' - Use low-memory implementation (only for polynomials)
+            - 'blocked' - Use panels of Vandermonde matrix (only for polynomials)
 
         Note
         ----
@@ -245,6 +347,7 @@ class SpectralBase:
             - 'fast' - use fast transform if implemented
             - 'vandermonde' - Use Vandermonde matrix
             - 'recursive' - Use low-memory implementation (only for polynomials)
+            - 'blocked' - Use panels of Vandermonde matrix (only for polynomials)
 
         Note
         ----
@@ -275,6 +378,7 @@ class SpectralBase:
             - 'fast' - Use fast transform on regular quadrature points
             - 'recursive' - Use low-memory implementation (only for polynomials)
             - 'vandermonde' - use Vandermonde on regular quadrature points
+            - 'blocked' - Use panels of Vandermonde matrix (only for polynomials)
         mesh : str or functionspace, optional
             - 'quadrature' - use quadrature mesh of self
             - 'uniform' - use uniform mesh
@@ -467,9 +571,12 @@ class SpectralBase:
             - 'vandermonde' - Use Vandermonde matrix
             - 'recursive' - Use low-memory recursive implementation
               (only for polynomials)
+            - 'blocked' - Use panels of the Vandermonde matrix, generated
+              by recursion and applied with matrix-matrix products
+              (only for polynomials)
 
         """
-        assert kind in ('vandermonde', 'recursive')
+        assert kind in ('vandermonde', 'recursive', 'blocked')
         if kind == 'vandermonde':
             P = self.evaluate_basis_all(x=x, argument=1)
             if output_array.ndim == 1:
@@ -482,13 +589,26 @@ class SpectralBase:
                 array = np.dot(P, fc[tuple(shape)])
                 output_array[:] = np.moveaxis(array, 0, self.axis)
         elif kind == 'recursive':
-            mod = config['optimization']['mode']
-            lib = importlib.import_module('.'.join(('shenfun.optimization', mod, 'transforms')))
+            lib, xj = self.get_transform_cache('backward')
             if x is None:
-                x = self.mesh(False, False)
-            N = self.N
-            a = self.get_recursion_matrix(int(N*self.padding_factor)+3, int(N*self.padding_factor)+3).diags('dia').data
+                x = xj
+            a = self.get_recursion_data(int(self.N*self.padding_factor)+3)
             lib.evaluate_expansion_all(input_array, output_array, x, self.axis, a)
+        elif kind == 'blocked':
+            _, xj = self.get_transform_cache('backward')
+            if x is None:
+                x = xj
+            M = input_array.shape[self.axis]
+            a = self.get_recursion_data(int(self.N*self.padding_factor)+3)
+            c = np.moveaxis(input_array, self.axis, 0).reshape((M, -1))
+            out = np.moveaxis(output_array, self.axis, 0)
+            shape = out.shape
+            out = out.reshape((len(x), -1))
+            h = self.get_panel_height(M)
+            for j0 in range(0, len(x), h):
+                P = self._recursion_panel(x[j0:j0+h], a, M)
+                out[j0:j0+h] = np.dot(P, c)
+            output_array[:] = np.moveaxis(out.reshape(shape), 0, self.axis)
 
     def eval(self, x, u, output_array=None):
         """Evaluate :class:`.Function` ``u`` at position ``x``
@@ -522,6 +642,9 @@ class SpectralBase:
             - 'fast' - use fast transform if implemented
             - 'vandermonde' - Use Vandermonde matrix
             - 'recursive' - Use low-memory implementation (only for polynomials)
+            - 'blocked' - Use panels of the Vandermonde matrix, generated
+              by recursion and applied with matrix-matrix products
+              (only for polynomials)
 
         Note
         ----
@@ -529,13 +652,11 @@ class SpectralBase:
         ``self.scalar_product.output_array``
 
         """
-        assert kind in ('vandermonde', 'recursive') # fast must be implemented in subclass
+        assert kind in ('vandermonde', 'recursive', 'blocked') # fast must be implemented in subclass
         input_array = self.scalar_product.input_array
         output_array = self.scalar_product.tmp_array
         M = self.shape(False)
-        xj, weights = self.points_and_weights(M)
-        if self.domain_factor() != 1:
-            weights /= float(self.domain_factor())
+        lib, xj, weights = self.get_transform_cache('scalar product')
         if kind == 'vandermonde':
             # Slow, memory demanding, Vandermonde type implementation
             P = self.evaluate_basis_all(argument=0)
@@ -549,13 +670,127 @@ class SpectralBase:
                 #output_array[:] = np.moveaxis(np.tensordot(input_array*weights[bc_shape], np.conj(P), (self.axis, 0)), -1, self.axis)
         elif kind == 'recursive':
             # Vandermonde type, but using less memory
-            mod = config['optimization']['mode']
-            lib = importlib.import_module('.'.join(('shenfun.optimization', mod, 'transforms')))
+            a = self.get_recursion_data(len(xj)+3)
+            lib.scalar_product(input_array, output_array, xj, weights, self.axis, a)
+        elif kind == 'blocked':
+            N = len(xj)
+            a = self.get_recursion_data(N+3)
+            fj = np.moveaxis(input_array, self.axis, 0).reshape((N, -1))
+            out = np.moveaxis(output_array, self.axis, 0)
+            shape = out.shape
+            out = out.reshape((shape[0], -1))
+            out[:] = 0
+            h = self.get_panel_height(shape[0])
+            for j0 in range(0, N, h):
+                P = self._recursion_panel(xj[j0:j0+h], a, shape[0])
+                out += np.dot(P.T, fj[j0:j0+h]*weights[j0:j0+h, None])
+            output_array[:] = np.moveaxis(out.reshape(shape), 0, self.axis)
+
+    @staticmethod
+    def get_panel_height(M):
+        """Return number of points in each panel used by kind='blocked'
+
+        The height is chosen such that a panel of shape (height, M) fits
+        within config['transforms']['blocked']['memory'] bytes.
+
+        Parameters
+        ----------
+        M : int
+            Number of polynomials, i.e., columns of the panel
+        """
+        return max(1, int(config['transforms']['blocked']['memory'])//(8*M))
+
+    @staticmethod
+    def _recursion_panel(x, a, M):
+        """Return Vandermonde panel of shape (len(x), M) using recursion
+
+        Uses the same three-term recurrence as the 'recursive' transforms,
+        but vectorized over all the points x.
+
+        Parameters
+        ----------
+        x : array
+            Points of the panel
+        a : array
+            Recursion data, see :meth:`.get_recursion_data`
+        M : int
+            Number of polynomials
+        """
+        anm = a[0]
+        ann = a[1] if a.shape[0] == 3 else np.zeros(M+2)
+        anp = a[-1]
+        P = np.empty((M, len(x)))
+        P[0] = 1
+        if M > 1:
+            P[1] = (x-ann[0])/anm[0]
+        for k in range(1, M-1):
+            P[k+1] = ((x-ann[k])*P[k]-anp[k]*P[k-1])/anm[k]
+        return P.T
+
+    def get_transform_cache(self, kind):
+        """Return constants used by the 'vandermonde' and 'recursive' transforms
+
+        The constants are computed once and cached on the basis. The cache
+        is cleared with :meth:`.clear_transform_cache`.
+
+        Parameters
+        ----------
+        kind : str
+            Either 'backward' or 'scalar product'
+
+        Returns
+        -------
+        tuple
+            - (lib, x) for 'backward'
+            - (lib, x, w) for 'scalar product'
+
+            where lib is the module with the recursive transforms, and x
+            and w are the quadrature points and weights.
+        """
+        mod = config['optimization']['mode']
+        key = (kind, mod)
+        if key in self._transform_cache:
+            return self._transform_cache[key]
+        lib = importlib.import_module('.'.join(('shenfun.optimization', mod, 'transforms')))
+        if kind == 'backward':
+            self._transform_cache[key] = (lib, self.mesh(False, False))
+        else:
+            xj, weights = self.points_and_weights(self.shape(False))
+            if self.domain_factor() != 1:
+                weights = weights/float(self.domain_factor())
             if xj is None:
                 xj = self.mesh(False, False)
-            N = len(xj)
-            a = self.get_recursion_matrix(N+3, N+3).diags('dia').data
-            lib.scalar_product(input_array, output_array, xj, weights, self.axis, a)
+            self._transform_cache[key] = (lib, xj, weights)
+        return self._transform_cache[key]
+
+    def get_recursion_data(self, M):
+        """Return data of recursion matrix of shape (M, M) in 'dia' format
+
+        The data are cached, see :meth:`.get_transform_cache`.
+
+        Parameters
+        ----------
+        M : int
+            Shape of recursion matrix
+        """
+        key = ('recursion', M)
+        if key not in self._transform_cache:
+            self._transform_cache[key] = self.get_recursion_matrix(M, M).diags('dia').data
+        return self._transform_cache[key]
+
+    def clear_transform_cache(self):
+        """Clear constants cached for transforms"""
+        self._transform_cache.clear()
+
+    def _plan_transform_cache(self):
+        # Precompute constants if 'recursive' is the default transform
+        self.clear_transform_cache()
+        kind = config['transforms']['kind'].get(self.family(), None)
+        if kind == 'recursive':
+            _, x = self.get_transform_cache('backward')
+            _, xj, _ = self.get_transform_cache('scalar product')
+            self.get_recursion_data(int(self.N*self.padding_factor)+3)
+            self.get_recursion_data(len(xj)+3)
 
     def apply_inverse_mass(self, array):
         """Apply inverse mass matrix
@@ -646,6 +881,7 @@ class SpectralBase:
 
         self.si = islicedict(axis=self.axis, dimensions=self.dimensions)
         self.sl = slicedict(axis=self.axis, dimensions=self.dimensions)
+        self._plan_transform_cache()
 
     def _get_truncarray(self, shape, dtype):
         shape = list(shape) if np.ndim(shape) else [shape]
@@ -1449,7 +1685,8 @@ def getCompositeBase(Orthogonal):
 
         def _evaluate_expansion_all(self, input_array, output_array, x=None, kind=None):
             if kind == 'fast':
-                assert self.family() in ('fourier', 'chebyshev', 'chebyshevu', 'legendre'),\
+                assert self.family() in ('fourier', 'chebyshev', 'chebyshevu', 'legendre',
+                                         'jacobi', 'ultraspherical'),\
                     f'Fast method not implemented for {self.family()} family'
             if kind == 'vandermonde':
                 SpectralBase._evaluate_expansion_all(self, input_array, output_array, x, kind=kind)
@@ -1462,7 +1699,8 @@ def getCompositeBase(Orthogonal):
         def _evaluate_scalar_product(self, kind=None):
             output = self.scalar_product.tmp_array
             if kind == 'fast':
-                assert self.family() in ('fourier', 'chebyshev', 'chebyshevu', 'legendre'),\
+                assert self.family() in ('fourier', 'chebyshev', 'chebyshevu', 'legendre',
+                                         'jacobi', 'ultraspherical'),\
                     f'Fast method not implemented for {self.family()} family'
             if kind == 'vandermonde':
                 SpectralBase._evaluate_scalar_product(self, kind=kind)
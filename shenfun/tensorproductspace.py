@@ -2,12 +2,15 @@
 Module for implementation of the :class:`.TensorProductSpace` class and
 related methods.
 """
+import os
 import copy
+import time
 from numbers import Number
+import yaml
 import sympy as sp
 import numpy as np
 from mpi4py_fft.mpifft import Transform, PFFT
-from mpi4py_fft.pencil import Subcomm, Pencil
+from mpi4py_fft.pencil import Subcomm, Pencil, Transfer
 from mpi4py import MPI
 from shenfun import config
 from shenfun.fourier.bases import R2C, C2C
@@ -20,14 +23,19 @@ from shenfun.coordinates import Coordinates
 comm = MPI.COMM_WORLD
 
 __all__ = ('TensorProductSpace', 'VectorSpace', 'TensorSpace',
-           'CompositeSpace', 'Convolve')
+           'CompositeSpace', 'Convolve', 'NonlinearProduct')
 
 @staticmethod
 def _get_kind(xfftn, kind):
     try:
-        family = xfftn.func.func.__self__.family()
+        base = xfftn.func.func.__self__
+        family = base.family()
         kind = {} if kind is None else kind
-        return kind.get(family, config['transforms']['kind'][family])
+        if family in kind:
+            return kind[family]
+        if base._tuned_kind is not None:
+            return base._tuned_kind
+        return config['transforms']['kind'][family]
     except:
         return None
 
@@ -42,6 +50,38 @@ def _get_mesh(xfftn, mesh):
 Transform._get_kind = _get_kind
 Transform._get_mesh = _get_mesh
 
+_autotune_table = None
+
+def _autotune_filename():
+    return os.path.expanduser(os.path.expandvars(config['transforms']['autotune']['filename']))
+
+def _load_autotune_table():
+    """Return table of fastest transform kinds, read from disk once"""
+    global _autotune_table
+    if _autotune_table is None:
+        _autotune_table = {}
+        try:
+            with open(_autotune_filename(), 'r') as f:
+                _autotune_table.update(yaml.load(f, Loader=yaml.FullLoader) or {})
+        except (OSError, yaml.YAMLError):
+            pass
+    return _autotune_table
+
+def _store_autotune_table():
+    """Store table of fastest transform kinds
+
+    The file is written to a temporary name and then atomically renamed.
+    """
+    filename = _autotune_filename()
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmpname = filename+'.%d.tmp'%(os.getpid())
+        with open(tmpname, 'w') as f:
+            yaml.dump(_autotune_table, f)
+        os.replace(tmpname, filename)
+    except OSError: # pragma: no cover
+        pass
+
 class BackwardTransform(Transform):
     def __call__(self, input_array=None, output_array=None, kind=None, mesh=None, **kw):
         """Compute backward transform
@@ -57,6 +97,7 @@ class BackwardTransform(Transform):
             - 'fast'
             - 'recursive'
             - 'vandermonde'
+            - 'blocked'
             For example kind={'chebyshev': 'vandermonde'}
 
         mesh : str or functionspace, optional
@@ -157,6 +198,7 @@ class ScalarTransform(Transform):
             - 'fast'
             - 'recursive'
             - 'vandermonde'
+            - 'blocked'
             For example kind={'chebyshev': 'vandermonde'}
         kw : dict
             parameters to serial transforms
@@ -216,6 +258,7 @@ class ForwardTransform(ScalarTransform):
             - 'fast'
             - 'recursive'
             - 'vandermonde'
+            - 'blocked'
             For example kind={'chebyshev': 'vandermonde'}
         kw : dict
             parameters to serial transforms
@@ -329,6 +372,8 @@ class TensorProductSpace(PFFT):
         self.hi = self.coors.hi
         self.sg = self.coors.sg
         self._padded_space = {}   # Storage for padded space that is otherwise as self
+        self._batched = {}        # Storage for batched transforms of stacked arrays
+        self._orthogonal = None   # Storage for orthogonal space that is otherwise as self
         shape = list(self.global_shape())
         self.axes = axes
         assert shape
@@ -468,6 +513,83 @@ class TensorProductSpace(PFFT):
             if isinstance(base.bc, BoundaryValues):
                 base.bc.set_tensor_bcs(base, self)
 
+        if config['transforms']['autotune']['use']:
+            self.autotune()
+
+    def autotune(self, kinds=None, repeat=None):
+        """Choose the fastest kind of transform for each axis
+
+        All kinds of transforms are timed for each axis, using the local
+        shape of the planned arrays. The fastest kind is used by all
+        subsequent transforms, unless overloaded by the ``kind`` argument
+        of the transforms. Decisions are stored on disk in
+        config['transforms']['autotune']['filename'] and reused by later
+        runs with the same spaces, distribution, threads and optimization
+        mode.
+
+        Parameters
+        ----------
+        kinds : sequence of str, optional
+            The kinds of transforms to time. Default is
+            config['transforms']['autotune']['kinds']. Kinds not implemented
+            for a basis are skipped.
+        repeat : int, optional
+            Number of timed backward and scalar product transforms for each
+            kind. Default is config['transforms']['autotune']['repeat']
+
+        Returns
+        -------
+        dict
+            The chosen kind of transform for each axis
+        """
+        from shenfun.matrixbase import _basis_signature
+        kinds = config['transforms']['autotune']['kinds'] if kinds is None else kinds
+        repeat = config['transforms']['autotune']['repeat'] if repeat is None else repeat
+        comm = self.comm if isinstance(self.comm, MPI.Comm) else MPI.COMM_SELF
+        rank = comm.Get_rank()
+        table = _load_autotune_table() if rank == 0 else {}
+        dims = [s.Get_size() for s in self.subcomm] if isinstance(self.subcomm, (tuple, list)) else [comm.Get_size()]
+        tuned = {}
+        changed = False
+        for base in self.xfftn:
+            key = '|'.join([_basis_signature(base), str(base.padding_factor),
+                            str(base.axis), str(self.global_shape()), str(dims),
+                            str(config['optimization']['threads']),
+                            config['optimization']['mode']])
+            kind = comm.bcast(table.get(key), root=0)
+            if kind is None:
+                timings = []
+                for k in kinds:
+                    t = self._time_transform(base, k, repeat)
+                    timings.append(comm.allreduce(t, op=MPI.MAX))
+                kind = kinds[int(np.argmin(timings))]
+                if rank == 0:
+                    table[key] = kind
+                    changed = True
+            base._tuned_kind = kind
+            tuned[base.axis] = kind
+        if changed:
+            _store_autotune_table()
+        return tuned
+
+    @staticmethod
+    def _time_transform(base, kind, repeat):
+        # Return time of backward and scalar product with given kind, or inf
+        # if the kind is not implemented for base
+        base.backward.input_array[...] = np.random.random(base.backward.input_array.shape)
+        try:
+            base.backward(kind=kind)
+            base.scalar_product(kind=kind)
+        except Exception:
+            return np.inf
+        t = np.inf
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            base.backward(kind=kind)
+            base.scalar_product(kind=kind)
+            t = min(t, time.perf_counter()-t0)
+        return t
+
     def configure_backwards(self, pencil, dtype, kw):
         """Configure transforms starting from spectral space
 
@@ -577,6 +699,78 @@ class TensorProductSpace(PFFT):
         self._padded_space[padding_factor] = paddedspace
         return paddedspace
 
+    def get_batched(self, k):
+        """Return transforms for k stacked scalar fields of self
+
+        The returned transforms work on arrays of shape ``(k,)+shape``, where
+        shape is the (local) shape of a scalar array of self. All k fields are
+        transformed with one set of serial transforms per axis and one global
+        redistribution per pencil transition, instead of k of each.
+
+        Parameters
+        ----------
+        k : int
+            The number of stacked fields
+
+        Returns
+        -------
+        dict or None
+            Dictionary with keys 'forward', 'backward' and 'scalar_product'
+            and values the corresponding batched transforms. None is returned
+            if batched transforms are not supported for self, which is the
+            case for curvilinear coordinates and for nonhomogeneous boundary
+            conditions.
+
+        Note
+        ----
+        The batched transforms are created on the first call and then stored.
+        The transforms are used by :class:`.VectorTransform` if
+        ``config['transforms']['batched']`` is True.
+        """
+        if k in self._batched:
+            return self._batched[k]
+        self._batched[k] = None
+        if not hasattr(self, 'forward'):
+            return None
+        if not self.coors.is_cartesian or len(self.get_nonhomogeneous_axes()) > 0:
+            return None
+
+        bases = {}
+        for base in self.xfftn:
+            axes = tuple([int(ax)+1 for ax in getattr(base, '_planned_axes', (base.axis,))])
+            b = base.get_unplanned()
+            b.plan((k,)+base.forward.input_array.shape, axes,
+                   base.forward.input_array.dtype, {})
+            bases[id(base)] = b
+
+        transfers = {}
+        for t in self.transfer:
+            transfers[id(t)] = Transfer(t.comm, (k,)+t.shape, t.dtype,
+                                        (k,)+t.subshapeA, t.axisA+1,
+                                        (k,)+t.subshapeB, t.axisB+1)
+
+        def _xfftn(transform, name):
+            return [getattr(bases[id(xfftn.func.func.__self__)], name)
+                    for xfftn in transform._xfftn]
+
+        def _transfer(transform):
+            return [getattr(transfers[id(trans.__self__)], trans.__name__)
+                    for trans in transform._transfer]
+
+        self._batched[k] = {
+            'forward': ForwardTransform(_xfftn(self.forward, 'forward'),
+                                        _transfer(self.forward),
+                                        self.forward._pencil, self),
+            'backward': BackwardTransform(_xfftn(self.backward, 'backward'),
+                                          _transfer(self.backward),
+                                          self.backward._pencil),
+            'scalar_product': ScalarTransform(_xfftn(self.scalar_product, 'scalar_product'),
+                                              _transfer(self.scalar_product),
+                                              self.scalar_product._pencil, self),
+            'transfer': list(transfers.values())
+        }
+        return self._batched[k]
+
     def get_refined(self, N):
         """Return space (otherwise as self) refined to new shape
 
@@ -680,12 +874,27 @@ class TensorProductSpace(PFFT):
             Chooses implementation. The method 0 is a low-memory cython
             version. Using method = 1 (default) leads to a faster cython
             implementation that, on the downside, uses more memory.
-            The final, method = 2, is a python implementation.
+            Method 2 is a python implementation. The final, method = 3, is
+            a blocked implementation for large sets of points, see Note.
+
+        Note
+        ----
+        Methods 0, 1 and 2 require all ranks to provide the same points, and
+        the result is summed over all ranks with an allreduce.
+
+        With method 3 each rank provides its own points (they may, but do
+        not need to, be the same on all ranks). The points are routed to all
+        ranks holding expansion coefficients, and each rank receives only
+        the values of its own points. The points are evaluated in blocks of
+        size config['evaluate']['blocksize'], such that memory use is
+        independent of the number of points.
         """
         if output_array is None:
             output_array = np.zeros(points.shape[1], dtype=self.forward.input_array.dtype)
         else:
             output_array[:] = 0
+        if method == 3:
+            return self._eval_blocked(points, coefficients, output_array)
         if len(self.get_nonperiodic_axes()) > 1:
             method = 1
         assert self.dimensions < 4, 'eval not implemented (yet) for higher dimensions'
@@ -696,6 +905,66 @@ class TensorProductSpace(PFFT):
         else:
             return self._eval_python(points, coefficients, output_array)
 
+    def _eval_blocked(self, points, coefficients, output_array):
+        """Evaluate Function at rank-local points, given expansion coefficients
+
+        Parameters
+        ----------
+        points : array of floats
+            Array of shape (D, N) for the N points of this rank
+        coefficients : array
+            Expansion coefficients
+        output_array : array
+            Return array, function values at points
+        """
+        comm = self.comm
+        npoints = points.shape[1]
+        if comm.Get_size() > 1:
+            counts = np.array(comm.allgather(npoints))
+            allpoints = np.zeros((counts.sum(), self.dimensions))
+            comm.Allgatherv(np.ascontiguousarray(points.T, dtype=float),
+                            [allpoints, counts*self.dimensions])
+            points = allpoints.T
+        N = points.shape[1]
+
+        # Weights for the Hermitian symmetric part of real transforms, and
+        # local slices into the Vandermonde matrices
+        ls = self.local_slice(True)
+        weights = []
+        for axis, base in enumerate(self.bases):
+            w = None
+            if isinstance(base, R2C):
+                last_conj_index = base.N//2 if base.N % 2 == 0 else base.N//2+1
+                k = np.arange(ls[axis].start, ls[axis].stop)
+                w = np.where((k > 0) & (k < last_conj_index), 2., 1.)
+            weights.append(w)
+        isreal = output_array.dtype.char in 'fdg'
+
+        c = np.asarray(coefficients)
+        values = np.zeros(N, dtype=output_array.dtype)
+        blocksize = config['evaluate']['blocksize']
+        for start in range(0, N, blocksize):
+            x = points[:, start:start+blocksize]
+            P = []
+            for axis, base in enumerate(self.bases):
+                V = base.evaluate_basis_all(x=base.map_reference_domain(x[axis]), argument=1)
+                V = V[:, ls[axis]]
+                if weights[axis] is not None:
+                    V = V*weights[axis]
+                P.append(V)
+            # Contract the last axis with a matrix product, then the remaining
+            y = c.reshape((-1, c.shape[-1])).dot(P[-1].T)
+            y = y.reshape(c.shape[:-1]+(x.shape[1],))
+            for axis in reversed(range(self.dimensions-1)):
+                y = np.einsum('...ip,pi->...p', y, P[axis])
+            values[start:start+blocksize] = y.real if isreal else y
+
+        if comm.Get_size() > 1:
+            comm.Reduce_scatter(values, output_array, recvcounts=counts.tolist(), op=MPI.SUM)
+        else:
+            output_array[:] = values
+        return output_array
+
     def _eval_python(self, points, coefficients, output_array):
         """Evaluate Function at points, given expansion coefficients
 
@@ -1180,13 +1449,21 @@ class TensorProductSpace(PFFT):
         return padded
 
     def get_orthogonal(self):
-        """Return tensor product space using the orthogonal basis for all directions"""
-        ortho = []
-        for base in self.bases:
-            ortho.append(base.get_orthogonal())
-        return TensorProductSpace(self.subcomm, ortho, axes=self.axes,
-                                  dtype=self.forward.input_array.dtype,
-                                  coordinates=self.coors.coordinates)
+        """Return tensor product space using the orthogonal basis for all directions
+
+        Note
+        ----
+        The orthogonal space is created once and stored with self. It shares
+        subcommunicators with self, and is destroyed by :meth:`destroy`.
+        """
+        if self._orthogonal is None:
+            ortho = []
+            for base in self.bases:
+                ortho.append(base.get_orthogonal())
+            self._orthogonal = TensorProductSpace(self.subcomm, ortho, axes=self.axes,
+                                                  dtype=self.forward.input_array.dtype,
+                                                  coordinates=self.coors.coordinates)
+        return self._orthogonal
 
     def get_testspace(self, kind='Galerkin', **kwargs):
         r"""Return appropriate test space
@@ -1344,6 +1621,14 @@ class TensorProductSpace(PFFT):
                 self.subcomm.destroy()
         for trans in self.transfer:
             trans.destroy()
+        for batched in self._batched.values():
+            if batched is not None:
+                for trans in batched['transfer']:
+                    trans.destroy()
+        self._batched.clear()
+        if self._orthogonal is not None:
+            self._orthogonal.destroy(destroy_subcomm=False)
+            self._orthogonal = None
 
     def _get_ndiag_cum_dofs(self):
         """Return the cumulative sum of degrees of freedom along nondiagonal axes"""
@@ -1388,9 +1673,10 @@ class CompositeSpace:
 
     def __init__(self, spaces):
         self.spaces = spaces
-        self.forward = VectorTransform([space.forward for space in spaces])
-        self.backward = VectorTransform([space.backward for space in spaces])
-        self.scalar_product = VectorTransform([space.scalar_product for space in spaces])
+        flat = self.flatten()
+        self.forward = VectorTransform([space.forward for space in spaces], flat, 'forward')
+        self.backward = VectorTransform([space.backward for space in spaces], flat, 'backward')
+        self.scalar_product = VectorTransform([space.scalar_product for space in spaces], flat, 'scalar_product')
 
     @property
     def is_composite_space(self):
@@ -1766,17 +2052,49 @@ class TensorSpace(VectorSpace):
         return TensorSpace([s.get_orthogonal() for s in self.spaces])
 
 class VectorTransform:
+    """Transform for :class:`.CompositeSpace`
 
-    __slots__ = ('_transforms',)
+    Parameters
+    ----------
+    transforms : list
+        The transforms of all the subspaces
+    spaces : list, optional
+        The flattened list of subspaces (:class:`.TensorProductSpace`)
+    name : str, optional
+        The name of the transform, 'forward', 'backward' or 'scalar_product'
+
+    Note
+    ----
+    If ``config['transforms']['batched']`` is True and all subspaces are
+    the same :class:`.TensorProductSpace`, then all components are
+    transformed together using :meth:`.TensorProductSpace.get_batched`.
+    """
+
+    __slots__ = ('_transforms', '_spaces', '_name')
 
-    def __init__(self, transforms):
+    def __init__(self, transforms, spaces=None, name=None):
         self._transforms = []
+        self._spaces = spaces
+        self._name = name
         for transform in transforms:
             if isinstance(transform, VectorTransform):
                 self._transforms += transform._transforms
             else:
                 self._transforms.append(transform)
 
+    def _get_batched(self, input_array, output_array):
+        if not config['transforms']['batched'] or self._spaces is None:
+            return None
+        T = self._spaces[0]
+        if not all(space is T for space in self._spaces[1:]):
+            return None
+        if not (input_array.flags.c_contiguous and output_array.flags.c_contiguous):
+            return None
+        batched = T.get_batched(len(self._spaces))
+        if batched is None:
+            return None
+        return batched[self._name]
+
     def __getattr__(self, name):
         obj = object.__getattribute__(self, '_transforms')
         if name == '_transforms':
@@ -1785,6 +2103,16 @@ class VectorTransform:
 
     def __call__(self, input_array, output_array, kind=None, **kw):
         mesh = kw.get('mesh', None) # only backward transform
+        if mesh is None:
+            u = input_array.__array__()
+            v = output_array.__array__()
+            transform = self._get_batched(u, v)
+            if transform is not None:
+                k = len(self._spaces)
+                transform(u.reshape((k,)+transform.input_array.shape[1:]),
+                          v.reshape((k,)+transform.output_array.shape[1:]),
+                          kind=kind, **kw)
+                return output_array
         for i, transform in enumerate(self._transforms):
             if mesh is not None:
                 mi = mesh[i] if isinstance(mesh, CompositeSpace) else mesh
@@ -1833,6 +2161,7 @@ class Convolve:
             axes.append(axis[0])
         newspace = TensorProductSpace(padding_space.comm, bases, axes=axes)
         self.newspace = newspace
+        self._work = (Array(padding_space), Array(padding_space))
 
     def __call__(self, a_hat, b_hat, ab_hat=None):
         """Compute convolution of a_hat and b_hat without truncation
@@ -1848,14 +2177,211 @@ class Convolve:
         if ab_hat is None:
             ab_hat = Function(T)
 
-        a = Array(Tp)
-        b = Array(Tp)
+        a, b = self._work
         a = Tp.backward(a_hat, a)
         b = Tp.backward(b_hat, b)
-        ab_hat = T.forward(a*b, ab_hat)
+        np.multiply(a.v, b.v, out=a.v)
+        ab_hat = T.forward(a, ab_hat)
         return ab_hat
 
 
+class NonlinearProduct:
+    r"""Class for computing dealiased pointwise products of Functions
+
+    A product like :math:`u \times \omega` is computed by transforming the
+    two operands backwards to a padded physical mesh, computing the product
+    and then transforming the result forward, with truncation, to the
+    spectral space of the operands. All work arrays are allocated once, and
+    then reused for every call.
+
+    Parameters
+    ----------
+    space : :class:`.TensorProductSpace` or :class:`.CompositeSpace`
+        The space of the operands. If a :class:`.CompositeSpace` (e.g., a
+        :class:`.VectorSpace`), then all its subspaces must be the same.
+    padding_factor : number or tuple, optional
+        Padding for the backward transforms. The default is the 3/2-rule.
+    dealias_direct : bool, optional
+        Use the 2/3-rule, i.e., set the 1/3 highest frequencies to zero.
+        Used only if ``padding_factor=1``.
+
+    Example
+    -------
+    >>> from shenfun import FunctionSpace, TensorProductSpace, VectorSpace, \
+    ...     Function, NonlinearProduct, comm
+    >>> N = (8, 8, 8)
+    >>> F0 = FunctionSpace(N[0], 'F', dtype='D')
+    >>> F1 = FunctionSpace(N[1], 'F', dtype='D')
+    >>> F2 = FunctionSpace(N[2], 'F', dtype='d')
+    >>> T = TensorProductSpace(comm, (F0, F1, F2))
+    >>> V = VectorSpace(T)
+    >>> u_hat = Function(V)
+    >>> w_hat = Function(V)
+    >>> NP = NonlinearProduct(V)
+    >>> uxw_hat = NP.cross(u_hat, w_hat)
+
+    Note
+    ----
+    The returned Functions are owned by the NonlinearProduct and will be
+    overwritten by the next call, unless an output array is provided.
+    """
+    def __init__(self, space, padding_factor=1.5, dealias_direct=False):
+        if space.is_composite_space:
+            T = space.flatten()[0]
+            assert np.all([s is T for s in space.flatten()])
+        else:
+            T = space
+        self.space = T
+        self.padded_space = T.get_dealiased(padding_factor, dealias_direct)
+        self._spaces = {}
+        self._work = {}
+
+    def get_space(self, rank, padded=False):
+        """Return space of tensor rank `rank`
+
+        Parameters
+        ----------
+        rank : int
+            Tensor rank (0, 1 or 2) of returned space
+        padded : bool, optional
+            Whether to return the padded or the regular space
+        """
+        key = (rank, padded)
+        if key not in self._spaces:
+            T = self.padded_space if padded else self.space
+            self._spaces[key] = (T, VectorSpace(T), TensorSpace(T))[rank]
+        return self._spaces[key]
+
+    def get_work(self, rank, i=0):
+        """Return padded work Array of tensor rank `rank`
+
+        Parameters
+        ----------
+        rank : int
+            Tensor rank (0, 1 or 2) of work array
+        i : int, optional
+            Return work array number i of this rank
+        """
+        key = (rank, i)
+        if key not in self._work:
+            self._work[key] = Array(self.get_space(rank, True))
+        return self._work[key]
+
+    def get_output(self, rank):
+        """Return (not padded) Function of tensor rank `rank` owned by self"""
+        key = (rank, 'out')
+        if key not in self._work:
+            self._work[key] = Function(self.get_space(rank))
+        return self._work[key]
+
+    def backward(self, u_hat, i=0):
+        """Return `u_hat` transformed backwards to padded work array i
+
+        Parameters
+        ----------
+        u_hat : :class:`.Function`
+        i : int, optional
+            Use padded work array number i
+        """
+        rank = u_hat.function_space().tensor_rank
+        u = self.get_work(rank, i)
+        return self.get_space(rank, True).backward(u_hat, u)
+
+    def forward(self, u, output_array=None):
+        """Return padded Array `u` transformed forward with truncation
+
+        Parameters
+        ----------
+        u : :class:`.Array`
+            Padded work array of tensor rank 0, 1 or 2
+        output_array : :class:`.Function`, optional
+            Return result in this array
+        """
+        rank = u.function_space().tensor_rank
+        if output_array is None:
+            output_array = self.get_output(rank)
+        return self.get_space(rank, True).forward(u, output_array)
+
+    def _backward_pair(self, a_hat, b_hat):
+        a = self.backward(a_hat, 0)
+        if b_hat is a_hat:
+            return a, a
+        return a, self.backward(b_hat, 1)
+
+    def mult(self, a_hat, b_hat, output_array=None):
+        """Return dealiased product of `a_hat` and `b_hat`
+
+        Parameters
+        ----------
+        a_hat, b_hat : :class:`.Function`
+            Scalar or vector Functions. If one is a vector and the other a
+            scalar, then all components of the vector are multiplied by the
+            scalar.
+        output_array : :class:`.Function`, optional
+            Return result in this array
+        """
+        a, b = self._backward_pair(a_hat, b_hat)
+        rank = max(a.rank, b.rank)
+        c = self.get_work(rank, 2)
+        np.multiply(a.v, b.v, out=c.v)
+        return self.forward(c, output_array)
+
+    def dot(self, a_hat, b_hat, output_array=None):
+        """Return dealiased dot product of vectors `a_hat` and `b_hat`
+
+        Parameters
+        ----------
+        a_hat, b_hat : :class:`.Function`
+            Vector Functions
+        output_array : :class:`.Function`, optional
+            Return scalar result in this array
+        """
+        a, b = self._backward_pair(a_hat, b_hat)
+        assert a.rank == 1 and b.rank == 1
+        c = self.get_work(0, 2)
+        w = self.get_work(0, 3)
+        np.multiply(a.v[0], b.v[0], out=c.v)
+        for i in range(1, a.shape[0]):
+            np.multiply(a.v[i], b.v[i], out=w.v)
+            np.add(c.v, w.v, out=c.v)
+        return self.forward(c, output_array)
+
+    def cross(self, a_hat, b_hat, output_array=None):
+        """Return dealiased cross product of vectors `a_hat` and `b_hat`
+
+        Parameters
+        ----------
+        a_hat, b_hat : :class:`.Function`
+            Vector Functions
+        output_array : :class:`.Function`, optional
+            Return result in this array. The result is a scalar in 2D and
+            a vector in 3D.
+        """
+        from shenfun.utilities import cross
+        a, b = self._backward_pair(a_hat, b_hat)
+        assert a.rank == 1 and b.rank == 1
+        c = self.get_work(0 if a.shape[0] == 2 else 1, 2)
+        c = cross(c, a, b)
+        return self.forward(c, output_array)
+
+    def outer(self, a_hat, b_hat, output_array=None):
+        """Return dealiased outer product of vectors `a_hat` and `b_hat`
+
+        Parameters
+        ----------
+        a_hat, b_hat : :class:`.Function`
+            Vector Functions
+        output_array : :class:`.Function`, optional
+            Return result (a second rank tensor) in this array
+        """
+        from shenfun.utilities import outer
+        a, b = self._backward_pair(a_hat, b_hat)
+        assert a.rank == 1 and b.rank == 1
+        c = self.get_work(2, 2)
+        c = outer(a, b, c)
+        return self.forward(c, output_array)
+
+
 class BoundaryValues:
     """Class for setting nonhomogeneous boundary conditions inside a multi-
     dimensional :class:`.TensorProductSpace`.
@@ -27,7 +27,7 @@ The Chebyshev (first and second kind) and Legendre polynomials can be defined as
 
 import numpy as np
 import sympy as sp
-from scipy.special import eval_jacobi, roots_jacobi #, gamma
+from scipy.special import eval_jacobi, roots_jacobi, gammaln
 from shenfun.matrixbase import SparseMatrix
 from shenfun.spectralbase import getCompositeBase, getBCGeneric, BoundaryConditions, Domain
 from shenfun.jacobi.recursions import cn, h, alfa
@@ -120,6 +120,11 @@ class Orthogonal(JacobiBase):
             points = self.map_true_domain(points)
         return points, weights
 
+    def get_fast_scaling(self, N):
+        k = np.arange(N)
+        a = float(self.alpha)
+        return np.exp(gammaln(k+1)+gammaln(a+1)-gammaln(k+a+1))
+
     @staticmethod
     def jacobiQ(x, alpha, N):
         V = np.zeros((x.shape[0], N))
@@ -432,7 +432,6 @@ def dot(u, v, output_array=None, forward_output=True):
 
         uv_hat = Function(To)
         uv_hat = uv.forward(uv_hat)
-        Top.destroy(destroy_subcomm=False)
         return uv_hat
 
     return uv
@@ -11,7 +11,8 @@ class LagrangianParticles:
     Parameters
     ----------
     points : array
-        Initial location of particles. (D, N) array, with N particles in D dimensions
+        Initial location of particles. (D, N) array, with N particles in D
+        dimensions. With MPI each rank holds its own particles.
     dt : float
         Time step
     u_hat : :class:`.Function`
@@ -30,7 +31,7 @@ class LagrangianParticles:
         self.x[:] = self.x + self.dt*up
 
     def rhs(self):
-        return self.u_hat.eval(self.x, output_array=self.up)
+        return self.u_hat.eval(self.x, output_array=self.up, method=3)
 
 if __name__ == '__main__':
     from shenfun import *
@@ -163,6 +163,27 @@ def test_inner():
     inner(curl(h), curl(w))
     inner(h, grad(div(w)))
 
+@pytest.mark.parametrize('family', ('C', 'L'))
+def test_Inner(family):
+    from shenfun.forms.inner import Inner
+    D = shenfun.FunctionSpace(N, family, bc=(0, 0))
+    F = shenfun.FunctionSpace(6, 'F', dtype='d')
+    T = shenfun.TensorProductSpace(comm, (D, F))
+    v = shenfun.TestFunction(T)
+    uh = shenfun.Function(T)
+    uh[:] = np.random.random(uh.shape)
+    f = shenfun.Function(T)
+    f[:] = np.random.random(f.shape)
+    uf = shenfun.Expr(uh)
+    I = Inner(v, uf+0.1*div(grad(uf))+0.2*shenfun.Dx(uf, 0, 1)+shenfun.Dx(uf, 1, 1))
+    I += Inner(v, f)
+    b = inner(v, uf+0.1*div(grad(uf))+0.2*shenfun.Dx(uf, 0, 1)+shenfun.Dx(uf, 1, 1))
+    b += inner(v, f)
+    assert np.allclose(I(), b)
+    # Matrices sharing axis and scale are fused
+    assert len(I._fused) < sum([len(A) for A in I.A])
+    T.destroy()
+
 def test_tensor2():
     B0 = shenfun.FunctionSpace(8, 'C')
     T = shenfun.TensorProductSpace(comm, (B0, B0))
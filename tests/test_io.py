@@ -1,11 +1,12 @@
 import os
 import functools
 import numpy as np
+import sympy as sp
 from mpi4py import MPI
 import pytest
 #from mpi4py_fft import generate_xdmf
 from shenfun import FunctionSpace, TensorProductSpace, ShenfunFile, Function,\
-    Array, CompositeSpace, VectorSpace, generate_xdmf
+    Array, CompositeSpace, VectorSpace, generate_xdmf, Checkpoint
 
 N = (12, 13, 14, 15)
 comm = MPI.COMM_WORLD
@@ -162,6 +163,89 @@ def test_mixed_3D(backend, forward_output, as_scalar):
     T.destroy()
     cleanup()
 
+@pytest.mark.parametrize('forward_output', (True, False))
+def test_async_2D(forward_output):
+    if skip['hdf5']:
+        return
+    K0 = FunctionSpace(N[0], 'F', dtype='d')
+    K1 = FunctionSpace(N[1], 'C')
+    T = TensorProductSpace(comm, (K0, K1))
+    filename = 'testasync_{}'.format(ex[forward_output])
+    hfile = writer(filename, T, asynchronous=True, buffers=2)
+    u = Function(T) if forward_output else Array(T)
+    for step in range(4):
+        u[:] = step
+        hfile.write(step, {'u': [u, (u, [slice(None), 4])]})
+    u0 = Function(T) if forward_output else Array(T)
+    hfile.read(u0, 'u', step=2)
+    assert np.allclose(u0, 2)
+    hfile.close()
+    read = reader(filename, T)
+    read.read(u0, 'u', step=3)
+    assert np.allclose(u0, 3)
+    T.destroy()
+    cleanup()
+
+def test_checkpoint():
+    if skip['hdf5']:
+        return
+    K0 = FunctionSpace(N[0], 'C')
+    K1 = FunctionSpace(N[1], 'F', dtype='d')
+    T = TensorProductSpace(comm, (K0, K1))
+    u = Function(T)
+    w = Function(T, val=3)
+    chk = Checkpoint('testcheckpoint', checkevery=2, data={'0': {'U': [u], 'W': [w]}})
+    for tstep in range(7):
+        u[:] = tstep
+        chk.update(tstep*0.1, tstep)
+    gens = chk.get_generations()
+    assert [g[0] for g in gens] == [3, 2]
+    assert gens[0][1] == 'testcheckpoint.chk.h5'
+    u0 = Function(T)
+    chk = Checkpoint('testcheckpoint')
+    chk.read(u0, 'U', step=0)
+    assert np.allclose(u0, 6)
+    chk.read(u0, 'W', step=0)
+    assert np.allclose(u0, 3)
+    chk.open()
+    assert chk.f.attrs['tstep'] == 6
+    chk.f.attrs['valid'] = False
+    chk.close()
+    chk.read(u0, 'U', step=0)
+    assert np.allclose(u0, 4)
+    T.destroy()
+    cleanup()
+
+@pytest.mark.parametrize('tol', (None, 1e-8))
+def test_spectral(tol):
+    if skip['hdf5']:
+        return
+    x, y, z = sp.symbols('x,y,z', real=True)
+    K0 = FunctionSpace(N[0], 'C', bc=(0, 1))
+    K1 = FunctionSpace(N[1], 'F', dtype='D')
+    K2 = FunctionSpace(N[2], 'F', dtype='d')
+    T = TensorProductSpace(comm, (K0, K1, K2))
+    ue = (1-x**2)*sp.cos(y)*sp.sin(2*z) + (1+x)/2
+    u = Function(T, buffer=ue)
+    hfile = writer('testspectral', T, backend='spectral', tol=tol)
+    hfile.write(0, {'u': [u]})
+    hfile.write(1, {'u': [2*u]})
+    read = reader('testspectral', T, backend='spectral')
+    hfile.open('r')
+    assert hfile.f['u/0'].shape[:3] == (3, 3, 3)
+    hfile.close()
+    T0 = read.get_space('u')
+    assert T0.bases[0].boundary_condition() == 'Dirichlet'
+    u0 = Function(T0)
+    read.read(u0, 'u', step=1)
+    assert np.allclose(u0, 2*u, atol=1e-7)
+    u1 = Function(T)
+    read.read(u1, 'u', step=0, modes=(None, 1, None))
+    assert np.allclose(u1, Function(T, buffer=(1+x)/2), atol=1e-7)
+    T.destroy()
+    T0.destroy()
+    cleanup()
+
 
 if __name__ == '__main__':
     for bnd in ('hdf5', 'netcdf4'):
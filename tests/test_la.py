@@ -1,6 +1,8 @@
 import numpy as np
 import pytest
-from shenfun import SparseMatrix, la
+from shenfun import SparseMatrix, la, config, FunctionSpace, TensorProductSpace, \
+    TrialFunction, Function, inner, div, grad, comm
+import shenfun
 import warnings
 
 warnings.filterwarnings('ignore')
@@ -47,6 +49,180 @@ def test_XDMA(di):
     assert np.allclose(uh2, uh)
     assert np.allclose(uh[:, 0], u_hat)
 
+@pytest.mark.parametrize('di', d)
+def test_XDMA_threads(di):
+    """Threaded line solves must not depend on the number of threads"""
+    M = SparseMatrix(di, (N, N))
+    np.random.seed(1)
+    bh = np.random.random((N, 6, N))
+    threads = config['optimization']['threads']
+    try:
+        for axis in (0, 2):
+            config['optimization']['threads'] = 1
+            u0 = la.Solver(M)(bh.copy(), np.zeros_like(bh), axis=axis)
+            config['optimization']['threads'] = 3
+            u1 = la.Solver(M)(bh.copy(), np.zeros_like(bh), axis=axis)
+            assert np.array_equal(u0, u1)
+    finally:
+        config['optimization']['threads'] = threads
+
+def test_generic_solvers_shared():
+    """Shared and threaded assembly must give identical solutions"""
+    F0 = FunctionSpace(6, 'F', dtype='D')
+    F1 = FunctionSpace(8, 'F', dtype='d')
+    C0 = FunctionSpace(12, 'C', bc=(0, 0))
+    C1 = FunctionSpace(10, 'L', bc=(0, 0))
+    T1 = TensorProductSpace(comm, (C0, F0, F1))
+    spaces = [(T1, la.SolverGeneric1ND)]
+    if comm.Get_size() == 1:
+        # SolverGeneric2ND requires two undistributed axes
+        T2 = TensorProductSpace(comm, (F1, C0, C1))
+        spaces.append((T2, la.SolverGeneric2ND))
+    opts = (config['matrix']['sparse']['share_lu'], config['optimization']['threads'])
+    results = []
+    try:
+        for share, threads in ((False, 1), (True, 1), (True, 2)):
+            config['matrix']['sparse']['share_lu'] = share
+            config['optimization']['threads'] = threads
+            sols = []
+            for T, Sol in spaces:
+                u = TrialFunction(T)
+                v = shenfun.TestFunction(T)
+                sol = Sol(inner(v, div(grad(u)) - 2*u))
+                np.random.seed(1)
+                b = Function(T)
+                b[:] = np.random.random(b.shape)
+                sols.append(sol(b, Function(T)))
+                if Sol is la.SolverGeneric1ND and comm.Get_size() == 1:
+                    nsolvers = len({id(s) for m in sol.solvers1D for s in m})
+                    assert nsolvers == (14 if share else 30), nsolvers
+            results.append(sols)
+    finally:
+        config['matrix']['sparse']['share_lu'], config['optimization']['threads'] = opts
+    for sols in results[1:]:
+        for s0, s1 in zip(sols, results[0]):
+            assert np.array_equal(s0, s1)
+
+
+@pytest.mark.skipif(comm.Get_size() > 1, reason='Solver2D requires undistributed axes')
+@pytest.mark.parametrize('method,preconditioner', [('gmres', 'fdm'), ('gmres', 'lu'),
+                                                   ('gmres', None), ('cg', 'fdm'),
+                                                   ('cg', 'diagonal'), ('minres', 'fdm')])
+@pytest.mark.parametrize('family', ('L', 'C'))
+def test_krylov(method, preconditioner, family):
+    if family == 'C' and method != 'gmres':
+        pytest.skip('Chebyshev matrices are not symmetric')
+    C0 = FunctionSpace(12, family, bc=(0, 0))
+    C1 = FunctionSpace(10, family, bc=(0, 0))
+    T = TensorProductSpace(comm, (C0, C1))
+    u = TrialFunction(T)
+    v = shenfun.TestFunction(T)
+    A = inner(v, -div(grad(u)) + 2*u)
+    np.random.seed(1)
+    b = Function(T)
+    b[:] = np.random.random(b.shape)
+    u0 = la.Solver2D(A)(b.copy(), Function(T))
+    sol = la.SolverKrylov(A, method=method, preconditioner=preconditioner)
+    u1 = sol(b.copy(), Function(T))
+    assert sol.info == 0
+    assert np.allclose(u0, u1)
+
+
+@pytest.mark.parametrize('family', ('L', 'C', 'J'))
+def test_fdm(family):
+    kw = {'alpha': 1, 'beta': 1} if family == 'J' else {}
+    C0 = FunctionSpace(12, family, bc=(0, 0), **kw)
+    C1 = FunctionSpace(10, family, bc=(0, 0), **kw)
+    F0 = FunctionSpace(8, 'F', dtype='D')
+    F1 = FunctionSpace(6, 'F', dtype='d')
+    spaces = [((C0, F0, F1), la.SolverGeneric1ND)]
+    if comm.Get_size() == 1:
+        spaces += [((C0, C1), la.Solver2D), ((F1, C0, C1), la.SolverGeneric2ND)]
+    for bases, Sol in spaces:
+        T = TensorProductSpace(comm, bases)
+        u = TrialFunction(T)
+        v = shenfun.TestFunction(T)
+        np.random.seed(1)
+        b = Function(T)
+        b[:] = np.random.random(b.shape)
+        u0 = Sol(inner(v, -div(grad(u)) + 2*u))(b.copy(), Function(T))
+        u1 = la.SolverFDM(inner(v, -div(grad(u)) + 2*u))(b.copy(), Function(T))
+        assert np.allclose(u0, u1)
+
+@pytest.mark.skipif(comm.Get_size() > 1, reason='Solver2D requires undistributed axes')
+def test_fdm_constraint():
+    bc = {'left': {'N': 0}, 'right': {'N': 0}}
+    T = TensorProductSpace(comm, (FunctionSpace(12, 'L', bc=bc), FunctionSpace(10, 'L', bc=bc)))
+    u = TrialFunction(T)
+    v = shenfun.TestFunction(T)
+    np.random.seed(1)
+    b = Function(T)
+    b[:] = np.random.random(b.shape)
+    u0 = la.Solver2D(inner(v, -div(grad(u))))(b.copy(), Function(T), constraints=((0, 1),))
+    u1 = la.SolverFDM(inner(v, -div(grad(u))))(b.copy(), Function(T), constraints=((0, 1),))
+    assert np.allclose(u0, u1)
+
+@pytest.mark.parametrize('family', ('L', 'C'))
+def test_schur(family):
+    N = 16
+    F = FunctionSpace(8, 'F', dtype='d')
+    D = FunctionSpace(N, family, bc=(0, 0))
+    P = FunctionSpace(N, family)
+    TD = TensorProductSpace(comm, (D, F))
+    TP = TensorProductSpace(comm, (P, F), modify_spaces_inplace=True)
+    P.slice = lambda: slice(0, N-2)
+    Q = shenfun.CompositeSpace([shenfun.VectorSpace(TD), TP])
+    u, p = TrialFunction(Q)
+    v, q = shenfun.TestFunction(Q)
+    A = inner(grad(v), grad(u)) + inner(div(v), p) + inner(q, div(u))
+    b = Function(Q)
+    b[:] = np.random.random(b.shape)
+    b = Function(Q, buffer=b.backward().forward())
+    sol0 = la.BlockMatrixSolver(A)
+    u0 = sol0(b.copy(), constraints=((2, 0, 0),))
+    u1 = la.SchurComplementSolver(A)(b.copy(), constraints=((2, 0, 0),))
+    assert np.allclose(u0, u1)
+    lu = sol0._lu
+    u0 = sol0(b.copy(), constraints=((2, 0, 0),))
+    assert sol0._lu is lu
+    assert np.allclose(u0, u1)
+    sol2 = la.BlockMatrixSolver(A)
+    sol2(b.copy(), constraints=((2, 0, 0),))
+    assert all(sol2._lu[key] is lu[key] for key in lu)
+
+def test_cached_solve():
+    M = SparseMatrix({-2: 1, 0: -2, 2: 1}, (N, N))
+    b = np.ones(N)
+    u0 = M.solve(b.copy())
+    sol = M.solver
+    u1 = M.solve(b.copy())
+    assert M.solver is sol
+    assert np.allclose(u0, u1)
+    M.scale = 2
+    assert np.allclose(M.solve(b.copy()), u0/2)
+    assert M.solver is not sol
+    M[0] = -4
+    assert np.allclose(M.solve(b.copy()), la.Solve(M)(b.copy()))
+    F = FunctionSpace(8, 'F', dtype='d')
+    D = FunctionSpace(N, 'L', bc=(0, 0))
+    T = TensorProductSpace(comm, (D, F))
+    u = TrialFunction(T)
+    v = shenfun.TestFunction(T)
+    A = inner(v, div(grad(u)))[0]
+    b = Function(T)
+    b[:] = np.random.random(b.shape)
+    b = Function(T, buffer=b.backward().forward())
+    u0 = A.solve(b.copy(), Function(T))
+    sol = A._solver
+    u1 = A.solve(b.copy(), Function(T))
+    assert A._solver is sol
+    assert np.allclose(u0, u1)
+    A.scale = A.scale*2
+    u1 = A.solve(b.copy(), Function(T))
+    assert A._solver is not sol
+    assert np.allclose(u0/2, u1)
+    T.destroy()
+
 
 if __name__ == "__main__":
     #test_solve('GC')
@@ -772,6 +772,46 @@ def test_exact(b0, b1):
     C.incorporate_scale()
     assert np.linalg.norm(C.diags('csr').data) < 1e-8
 
+def test_matrix_cache(tmp_path):
+    use, directory = config['matrix']['cache']['use'], config['matrix']['cache']['directory']
+    config['matrix']['cache']['use'] = True
+    config['matrix']['cache']['directory'] = str(tmp_path)
+    try:
+        J = FunctionSpace(12, 'J', bc=(0, 0), alpha=1, beta=1)
+        u = shenfun.TrialFunction(J)
+        v = shenfun.TestFunction(J)
+        B0 = inner(v, div(grad(u)), kind='vandermonde')
+        assert len(list(tmp_path.iterdir())) == 1
+        B1 = inner(v, div(grad(u)), kind='vandermonde')
+        assert B1._assembly_method == B0._assembly_method
+        assert B0 == B1
+        B2 = inner(v, u, kind='vandermonde')
+        assert len(list(tmp_path.iterdir())) == 2
+        assert B2 != B1
+    finally:
+        config['matrix']['cache']['use'] = use
+        config['matrix']['cache']['directory'] = directory
+
+def test_banded():
+    from scipy.sparse import diags as sp_diags
+    N = 8
+    d = {-2: np.arange(1, N-1), 0: 2, 1: -np.ones(N-1)}
+    A = SparseMatrix(d, (N, N), scale=2)
+    (l, u), ab = A.banded()
+    assert (l, u) == (2, 1)
+    B = sp_diags(list(d.values()), list(d.keys()), shape=(N, N)).toarray()
+    for i, j in product(range(N), range(N)):
+        if -l <= j-i <= u:
+            assert ab[u+i-j, j] == B[i, j]
+    for format in ('dia', 'csr', 'csc'):
+        assert np.allclose(A.diags(format).toarray(), 2*B)
+    assert A.banded()[1] is ab
+    A.diags('csc').data[:] = 0
+    assert np.allclose(A.diags('csc').toarray(), 2*B)
+    A[0] = 3
+    assert A.banded()[1] is not ab
+    assert np.allclose(A.diags('csr', False).diagonal(), 3)
+
 if __name__ == '__main__':
     import sympy as sp
     x = sp.symbols('x', real=True)
@@ -1,5 +1,6 @@
 from __future__ import print_function
 from time import time
+import os
 import functools
 from itertools import product
 import pytest
@@ -569,6 +570,32 @@ def test_refine():
     Tp.destroy()
     Vp.destroy()
 
+def test_refine_direct():
+    def get_bases(N):
+        return (FunctionSpace(N[0], 'C', bc=(0, 0)),
+                FunctionSpace(N[1], 'F', dtype='D'),
+                FunctionSpace(N[2], 'F', dtype='d'))
+    N, M = (12, 10, 9), (20, 16, 14)
+    T = TensorProductSpace(comm, get_bases(N))
+    u = Array(T)
+    u[:] = np.random.random(u.shape)
+    u_hat = u.forward()
+    u0 = u_hat.refine(M, direct=False)
+    u1 = u_hat.refine(M)
+    assert np.allclose(u0, u1)
+    # Assign to a differently distributed space and back again
+    T2 = TensorProductSpace(comm, get_bases(M), slab=True)
+    u2 = Function(T2)
+    u_hat.assign(u2)
+    u3 = Function(T)
+    u2.assign(u3)
+    assert np.allclose(u3, u_hat)
+    # Truncation
+    u4 = u1.refine(N)
+    assert np.allclose(u4, u_hat)
+    T.destroy()
+    T2.destroy()
+
 def test_eval_expression():
     import sympy as sp
     from shenfun import div, grad
@@ -623,6 +650,192 @@ def test_eval_expression2(fam):
     T.destroy()
 
 
+@pytest.mark.parametrize('fam', ('C', 'L', 'F'))
+def test_batched(fam):
+    from shenfun import TensorSpace
+    N = (8, 9, 10)
+    B0 = FunctionSpace(N[0], fam, bc=(0, 0)) if fam != 'F' else FunctionSpace(N[0], 'F', dtype='D')
+    T = TensorProductSpace(comm, (B0, FunctionSpace(N[1], 'F', dtype='D'),
+                                  FunctionSpace(N[2], 'F', dtype='d')))
+    batched = config['transforms']['batched']
+    for W in (VectorSpace(T), TensorSpace(T)):
+        for padding_factor in (1, 1.5):
+            Wp = W.get_dealiased(padding_factor)
+            u_hat = Function(W)
+            u_hat[:] = random_like(u_hat)
+            u_hat = u_hat.backward().forward()
+            u0, u1 = Array(Wp), Array(Wp)
+            config['transforms']['batched'] = False
+            u0 = u_hat.backward(u0, padding_factor=padding_factor)
+            f0 = Wp.forward(u0, Function(W))
+            config['transforms']['batched'] = True
+            u1 = u_hat.backward(u1, padding_factor=padding_factor)
+            f1 = Wp.forward(u1, Function(W))
+            assert Wp.flatten()[0].get_batched(len(Wp.flatten())) is not None
+            assert np.allclose(u0, u1)
+            assert np.allclose(f0, f1)
+            assert np.allclose(f1, u_hat)
+    config['transforms']['batched'] = batched
+    T.destroy()
+
+
+@pytest.mark.parametrize('fam', ('C', 'F'))
+def test_nonlinearproduct(fam):
+    from shenfun import TensorSpace, NonlinearProduct
+    N = (8, 9, 10)
+    B0 = FunctionSpace(N[0], fam, bc=(0, 0)) if fam != 'F' else FunctionSpace(N[0], 'F', dtype='D')
+    T = TensorProductSpace(comm, (B0, FunctionSpace(N[1], 'F', dtype='D'),
+                                  FunctionSpace(N[2], 'F', dtype='d')))
+    V = VectorSpace(T)
+    W = TensorSpace(T)
+    u_hat = Function(V)
+    w_hat = Function(V)
+    u_hat[:] = random_like(u_hat)
+    w_hat[:] = random_like(w_hat)
+    u_hat = u_hat.backward().forward()
+    w_hat = w_hat.backward().forward()
+    NP = NonlinearProduct(V)
+    Vp = V.get_dealiased(1.5)
+    Wp = W.get_dealiased(1.5)
+    u = u_hat.backward(padding_factor=1.5)
+    w = w_hat.backward(padding_factor=1.5)
+    uxw_hat = NP.cross(u_hat, w_hat)
+    assert np.allclose(uxw_hat, Vp.forward(np.cross(u, w, axis=0), Function(V)))
+    assert uxw_hat is NP.cross(u_hat, w_hat)
+    uw_hat = NP.dot(u_hat, w_hat)
+    assert np.allclose(uw_hat, Vp.spaces[0].forward(np.sum(u*w, axis=0), Function(T)))
+    uu = np.einsum('i...,j...->ij...', u, u).reshape((9,)+u.shape[1:])
+    assert np.allclose(NP.outer(u_hat, u_hat), Wp.forward(uu, Function(W)))
+    assert np.allclose(NP.mult(u_hat, w_hat[0]), Vp.forward(u*w[0], Function(V)))
+    T.destroy()
+
+
+def test_fftw_registry(tmp_path):
+    from shenfun import clear_fftw_plans, import_fftw_wisdom, export_fftw_wisdom
+    x, y = symbols("x,y")
+    u = {}
+    registry = config['fftw']['registry']
+    try:
+        for use in (False, True):
+            config['fftw']['registry'] = use
+            T = [TensorProductSpace(comm, (FunctionSpace(12, 'C', bc=(0, 0)),
+                                           FunctionSpace(10, 'F', dtype='d')))
+                 for i in range(2)]
+            assert (T[0].bases[1].forward.xfftn is T[1].bases[1].forward.xfftn) is use
+            ua = Array(T[0], buffer=(1-x**2)*sin(y))
+            u[use] = ua.forward(Function(T[1])).backward(Array(T[0]))
+            for Ti in T:
+                Ti.destroy()
+    finally:
+        config['fftw']['registry'] = registry
+        clear_fftw_plans()
+    assert np.allclose(u[False], u[True])
+    fl = str(tmp_path / 'shenfun.wisdom')
+    export_fftw_wisdom(fl)
+    import_fftw_wisdom(fl)
+
+
+@pytest.mark.parametrize('fam', ('C', 'L', 'F'))
+def test_eval_blocked(fam):
+    blocksize = config['evaluate']['blocksize']
+    config['evaluate']['blocksize'] = 7
+    bases = [FunctionSpace(9, fam, dtype='D'), FunctionSpace(8, 'F', dtype='D'),
+             FunctionSpace(7, 'F', dtype='d')]
+    if fam != 'F':
+        bases[0] = FunctionSpace(9, fam, bc=(0, 0))
+    T = TensorProductSpace(comm, bases)
+    u = Function(T)
+    np.random.seed(1)
+    u[:] = np.random.random(u.shape)
+    u = u.backward().forward()
+    points = np.random.random((3, 40))*2-1
+    u0 = u.eval(points, method=2)
+    # Each rank evaluates its own points
+    s = slice(comm.Get_rank(), None, comm.Get_size())
+    try:
+        u1 = u.eval(np.ascontiguousarray(points[:, s]), method=3)
+    finally:
+        config['evaluate']['blocksize'] = blocksize
+    assert np.allclose(u0[s], u1)
+    T.destroy()
+
+def test_autotune(tmp_path):
+    import shenfun.tensorproductspace as tps
+    autotune = config['transforms']['autotune'].copy()
+    table = tps._autotune_table
+    config['transforms']['autotune']['filename'] = str(tmp_path / 'transforms.yaml')
+    config['transforms']['autotune']['use'] = True
+    tps._autotune_table = None
+    try:
+        T = TensorProductSpace(comm, (FunctionSpace(12, 'L', bc=(0, 0)),
+                                      FunctionSpace(10, 'F', dtype='d')))
+        kinds = [base._tuned_kind for base in T.bases]
+        assert kinds[1] == 'fast'
+        assert kinds[0] in config['transforms']['autotune']['kinds']
+        u = Function(T)
+        u[:] = np.random.random(u.shape)
+        u = u.backward().forward()
+        assert np.allclose(u, u.backward(kind={'legendre': 'vandermonde'}).forward())
+        assert comm.bcast(os.path.isfile(tps._autotune_filename()), root=0)
+        # Decisions are reused
+        tps._autotune_table = None
+        T2 = TensorProductSpace(comm, (FunctionSpace(12, 'L', bc=(0, 0)),
+                                       FunctionSpace(10, 'F', dtype='d')))
+        assert [base._tuned_kind for base in T2.bases] == kinds
+    finally:
+        config['transforms']['autotune'].update(autotune)
+        tps._autotune_table = table
+    T.destroy()
+    T2.destroy()
+
+@pytest.mark.parametrize('padding', (1, 1.5))
+def test_tpmatrix_matvec(padding):
+    from shenfun import TestFunction, TrialFunction, div, grad
+    bases = (FunctionSpace(10, 'C', bc=(0, 0)), FunctionSpace(9, 'L', bc=(0, 0)),
+             FunctionSpace(8, 'F', dtype='d'))
+    T = TensorProductSpace(comm, bases)
+    Tp = T.get_dealiased(padding_factor=padding)
+    u = TrialFunction(Tp)
+    v = TestFunction(Tp)
+    mats = inner(v, div(grad(u)))
+    u_hat = Function(Tp)
+    np.random.seed(1)
+    u_hat[:] = np.random.random(u_hat.shape)+1j*np.random.random(u_hat.shape)
+    u_hat = u_hat.backward().forward()
+    b0 = inner(v, div(grad(u_hat)))
+    for step in range(2):
+        b = Function(Tp)
+        c = Function(Tp)
+        for mat in mats:
+            b += mat.matvec(u_hat, c)
+        assert np.allclose(b, b0)
+    for mat in mats:
+        mat.destroy()
+    T.destroy()
+    Tp.destroy()
+
+def test_orthogonal_cached():
+    from shenfun import TestFunction
+    T = TensorProductSpace(comm, (FunctionSpace(10, 'C', bc=(0, 0)),
+                                  FunctionSpace(8, 'F', dtype='d')))
+    V = VectorSpace(T)
+    To = T.get_orthogonal()
+    assert To is T.get_orthogonal()
+    assert V.get_orthogonal()[0] is To
+    x, y = symbols('x,y', real=True)
+    u = Array(V, buffer=(sin(y)*(1-x**2), x*cos(y)))
+    v = TestFunction(V)
+    f0 = inner(v, u)
+    f1 = inner(v, u)
+    assert np.allclose(f0, f1)
+    assert np.allclose(f0[1], inner(TestFunction(T), u[1]))
+    assert T.get_orthogonal() is To
+    uo = project(u[0], To)
+    assert np.allclose(uo.backward(), u[0])
+    T.destroy()
+    assert T._orthogonal is None
+
+
 if __name__ == '__main__':
     test_transform('F', 2)
     #test_transform('d', 2)
@@ -616,6 +616,72 @@ def test_leg2cheb():
         assert np.linalg.norm(C2(u, transpose=True)-1) < 1e-8
         assert np.linalg.norm(C2(u)-C(u)) < 1e-8
 
+@pytest.mark.parametrize('family,kw', (('J', dict(alpha=1, beta=2)),
+                                       ('J', dict(alpha=1.5, beta=-0.5)),
+                                       ('Q', dict(alpha=1)),
+                                       ('Q', dict(alpha=0.5))))
+def test_djt(family, kw):
+    for N, ref in ((40, 'vandermonde'), (1200, 'recursive')):
+        if N > 40 and kw['alpha'] != kw.get('beta', kw['alpha']):
+            continue
+        J = shenfun.FunctionSpace(N, family, **kw)
+        assert J.has_fast_transform()
+        u = shenfun.Function(J)
+        u[:] = 1/(1+np.arange(N))
+        a0 = u.backward(kind=ref).copy()
+        a1 = u.backward(kind='fast').copy()
+        assert np.linalg.norm(a0-a1)/np.linalg.norm(a0) < 1e-10
+        s0 = J.scalar_product(a0, kind=ref).copy()
+        s1 = J.scalar_product(a0, kind='fast').copy()
+        assert np.linalg.norm(s0-s1)/np.linalg.norm(s0) < 1e-10
+    F = shenfun.FunctionSpace(6, 'F', dtype='D')
+    J = shenfun.FunctionSpace(20, family, bc=(0, 0), **kw)
+    T = shenfun.TensorProductSpace(shenfun.comm, (F, J), dtype='D')
+    u = shenfun.Function(T)
+    u[:] = np.random.random(u.shape)
+    u = u.backward().forward()
+    assert np.linalg.norm(u - u.backward(kind={T.bases[1].family(): 'fast'}).forward(kind={T.bases[1].family(): 'fast'})) < 1e-8
+    T.destroy()
+    J = shenfun.FunctionSpace(20, family, alpha=0.3)
+    assert not J.has_fast_transform()
+
+def test_transform_cache():
+    L = shenfun.FunctionSpace(20, 'L', bc=(0, 0))
+    mode = shenfun.config['optimization']['mode']
+    assert ('backward', mode) in L._transform_cache
+    assert ('scalar product', mode) in L._transform_cache
+    u = shenfun.Function(L)
+    u[:-2] = np.random.random(18)
+    a0 = u.backward(kind='recursive').copy()
+    L.clear_transform_cache()
+    assert len(L._transform_cache) == 0
+    a1 = u.backward(kind='recursive').copy()
+    assert np.allclose(a0, a1)
+    assert np.allclose(a0, u.backward(kind='vandermonde'))
+    assert ('backward', mode) in L._transform_cache
+
+@pytest.mark.parametrize('family', ('L', 'J', 'Q'))
+def test_blocked(family):
+    memory = config['transforms']['blocked']['memory']
+    config['transforms']['blocked']['memory'] = 800 # Force several panels
+    F = shenfun.FunctionSpace(6, 'F', dtype='D')
+    J = shenfun.FunctionSpace(40, family, bc=(0, 0))
+    T = shenfun.TensorProductSpace(shenfun.comm, (J, F))
+    kind = {J.family(): 'blocked'}
+    u = shenfun.Function(T)
+    u[:] = np.random.random(u.shape)+1j*np.random.random(u.shape)
+    u[-2:] = 0
+    a0 = u.backward(kind={J.family(): 'vandermonde'}).copy()
+    a1 = u.backward(kind=kind).copy()
+    assert np.allclose(a0, a1)
+    s0 = T.scalar_product(a0, kind={J.family(): 'vandermonde'}).copy()
+    s1 = T.scalar_product(a0, kind=kind).copy()
+    assert np.allclose(s0[:-2], s1[:-2])
+    assert np.allclose(a1.forward(kind=kind), u)
+    config['transforms']['blocked']['memory'] = memory
+    T.destroy()
+
+
 if __name__ == '__main__':
     from time import time
     config['optimization']['mode'] = 'cython'